@@ -0,0 +1,124 @@
+import copy
+import logging
+from bot_engines import instrumentation
+from bot_engines.constant_phrase_bot import ConstantPhraseBot
+from bot_engines.blob_state import AsyncBlobStateStore
+from bot_engines.client_pool import get_async_twitter_client, get_async_blob_service_client
+from bot_engines.posting import AsyncTweetPoster
+from bot_engines.rate_budget import AsyncRateBudget
+
+
+class AsyncConstantPhraseBot(ConstantPhraseBot):
+    """
+    asyncio variant of ConstantPhraseBot.run() with the same config contract.
+    The management API stays on the synchronous ConstantPhraseBot.
+    Must be created and run on the event loop that will own its clients.
+    """
+
+    state_store_class = AsyncBlobStateStore
+    budget_class = AsyncRateBudget
+
+    def __init__(self, config):
+        super().__init__(config)
+        self._legacy = None
+
+    def make_blob_service_client(self):
+        return get_async_blob_service_client(self.config['blob_connection_string'])
+
+    @property
+    def async_client(self):
+        return get_async_twitter_client(self.config)
+
+    async def _load_legacy_state(self):
+        try:
+            return self.from_legacy(await self.state_store.read(self.enabled_blob_name),
+                                    await self.state_store.read(self.overrides_blob_name))
+        except Exception as e:
+            logging.info(f"No legacy state found, using defaults: {e}")
+        return self.from_legacy()
+
+    def _legacy_state(self):
+        # Only reached after load_state_async, which fetched the legacy blobs if needed
+        return copy.deepcopy(self._legacy) or self.from_legacy()
+
+    def load_state(self):
+        if self._state is None:
+            raise RuntimeError("AsyncConstantPhraseBot: await load_state_async() first")
+        return self._state
+
+    async def load_state_async(self):
+        if self._state is None:
+            with instrumentation.phase('state_read'):
+                try:
+                    state, etag = await self.state_store.read_with_etag(self.state_blob_name)
+                except Exception as e:
+                    logging.info(f"Error loading state, defaulting to enabled: {e}")
+                    state, etag = None, None
+                if state is None:
+                    self._legacy = await self._load_legacy_state()
+                    state = self._legacy_state()
+            self._state, self._etag = state, etag
+        return self._state
+
+    async def update_state_async(self, mutate):
+        await self.load_state_async()
+        with instrumentation.phase('state_write'):
+            self._state, self._etag = await self.state_store.update(self.state_blob_name, mutate,
+                                                                    **self.update_kwargs())
+        return self._state
+
+    def make_poster(self):
+        return AsyncTweetPoster(self.async_client, time_budget_seconds=self.config.get('post_time_budget_seconds', 60),
+                                budget=self.budget)
+
+    async def post_tweet(self):
+        """Post the appropriate phrase for today"""
+        today = self.get_today()
+        phrase = self.get_phrase_for_today(today)
+        poster = self.make_poster()
+
+        outbox = self.make_outbox()
+        with instrumentation.phase('outbox'):
+            await outbox.drain_async(poster)
+
+        with instrumentation.phase('post'):
+            result = await poster.post(phrase)
+        self.record_post(outbox, result, today, phrase)
+
+        try:
+            await self.update_state_async(self.after_post_mutation(today, phrase, result.tweet_id, outbox))
+        except Exception as e:
+            logging.error(f"Error saving state: {e}")
+
+        return result.ok
+
+    async def drain_outbox(self):
+        await self.load_state_async()
+        outbox = self.make_outbox()
+        if not outbox.entries:
+            return False
+        if not self.is_enabled():
+            logging.info('Bot is disabled via kill switch')
+            return False
+
+        with instrumentation.phase('outbox'):
+            await outbox.drain_async(self.make_poster())
+        try:
+            await self.update_state_async(self.after_post_mutation(None, None, None, outbox))
+        except Exception as e:
+            logging.error(f"Error saving state: {e}")
+        return bool(outbox.posted)
+
+    async def run(self):
+        """Main run method - checks time and posts if appropriate"""
+        if not self.is_target_time():
+            if self.schedule.is_retry_due():
+                return await self.drain_outbox()
+            return False
+
+        await self.load_state_async()
+        if not self.is_enabled():
+            logging.info('Bot is disabled via kill switch')
+            return False
+
+        return await self.post_tweet()
@@ -0,0 +1,157 @@
+import asyncio
+import logging
+from bot_engines import instrumentation
+from bot_engines.sequential_content_bot import SequentialContentBot
+from bot_engines.content_pack import open_content
+from bot_engines.blob_state import AsyncBlobStateStore
+from bot_engines.client_pool import get_async_twitter_client, get_async_blob_service_client
+from bot_engines.posting import AsyncTweetPoster
+from bot_engines.post_journal import PostJournal, AsyncTimelineVerifier
+from bot_engines.rate_budget import AsyncRateBudget, UPDATE_PROFILE
+from bot_engines.render_queue import RenderQueue
+from bot_engines.tweet_length import split_tweet
+
+
+class AsyncSequentialContentBot(SequentialContentBot):
+    """
+    asyncio variant of SequentialContentBot with the same config contract.
+    The state fetch overlaps the content load, and the profile update overlaps the tweet.
+    refill_queue and handle_http_request are coroutines here; the management API itself
+    runs on the synchronous SequentialContentBot.
+    Must be created and run on the event loop that will own its clients.
+    """
+
+    state_store_class = AsyncBlobStateStore
+    budget_class = AsyncRateBudget
+
+    def make_blob_service_client(self):
+        return get_async_blob_service_client(self.config['blob_connection_string'])
+
+    @property
+    def async_client(self):
+        return get_async_twitter_client(self.config)
+
+    async def get_state(self):
+        try:
+            with instrumentation.phase('state_read'):
+                return self.loaded_state(await self.state_store.read(self.blob_name))
+        except Exception as e:
+            logging.warning(f"Error loading state: {e}")
+        return None
+
+    async def save_state(self, state):
+        try:
+            with instrumentation.phase('state_write'):
+                await self.state_store.write(self.blob_name, state)
+            logging.info(f"Saved state to blob '{self.blob_name}': {state}")
+            return True
+        except Exception as e:
+            logging.error(f"Error saving state: {e}")
+            return False
+
+    async def load_queue(self):
+        if not self.config.get('render_queue_size'):
+            return None
+        try:
+            with instrumentation.phase('queue_read'):
+                data = await self.state_store.read(self.queue_blob_name)
+            return RenderQueue(data) if data else None
+        except Exception as e:
+            logging.warning(f"Error loading render queue: {e}")
+            return None
+
+    async def refill_queue(self, count=None):
+        # Rendering is CPU-bound; keep it off the loop
+        queue = await asyncio.to_thread(self.build_queue, await self.get_state(), count)
+        await self.state_store.write(self.queue_blob_name, queue.data, ensure_ascii=False, separators=(',', ':'))
+        return queue
+
+    async def handle_http_request(self, req):
+        # The actions read and write state through the blocking clients, so they run on a thread
+        return await asyncio.to_thread(SequentialContentBot(self.config).handle_http_request, req)
+
+    async def update_description(self, description):
+        token = await self.budget.acquire(UPDATE_PROFILE)
+        if token.wait:
+            return False
+        # tweepy has no async v1.1 API; run the blocking call off the loop
+        applied, headers = await asyncio.to_thread(self.set_profile_description, description)
+        await self.budget.observe(token, headers)
+        return applied
+
+    def make_verifier(self):
+        return AsyncTimelineVerifier(self.async_client)
+
+    async def reconcile(self, entry, tweet_text):
+        self.begin_reconcile(entry)
+        try:
+            tweet_id = await self.make_verifier().find(entry, split_tweet(tweet_text)[0])
+        except Exception as e:
+            logging.warning(f"Could not check the timeline, relying on duplicate detection: {e}")
+            return None
+        return self.reconciled(tweet_id)
+
+    def open_content_timed(self):
+        with instrumentation.phase('content'):
+            return open_content(self.config)
+
+    async def post_timed(self, poster, tweet_text):
+        with instrumentation.phase('post'):
+            return await poster.post_thread(split_tweet(tweet_text))
+
+    def make_poster(self):
+        return AsyncTweetPoster(self.async_client, time_budget_seconds=self.config.get('post_time_budget_seconds', 60),
+                                budget=self.budget)
+
+    async def run(self):
+        # Content is a local mmap/JSON load; fetch the state and queue from storage meanwhile
+        content, state, queue = await asyncio.gather(
+            asyncio.to_thread(self.open_content_timed),
+            self.get_state(),
+            self.load_queue()
+        )
+        index = content.cursor_index()
+        position = self.validate_state(state, index)
+        item = self.next_item(content, index, position, queue)
+        poster = self.make_poster()
+
+        # Tweets left over from earlier failed runs go out first, in order
+        outbox = self.make_outbox(state)
+        with instrumentation.phase('outbox'):
+            await outbox.drain_async(poster)
+
+        profile = dict((state or {}).get('profile') or {})
+        previous_profile = dict(profile)
+        description = self.description_to_apply(profile, item['description'])
+
+        tweet_text = item['tweet_text']
+        failures = (state or {}).get('failures')
+        journal = PostJournal((state or {}).get('journal'))
+        pending = journal.pending_for(position, tweet_text)
+        tweet_id = await self.reconcile(pending, tweet_text) if pending else None
+        if tweet_id:
+            if description:
+                self.record_description(profile, description, await self.update_description(description))
+            journal.complete(tweet_id)
+            await self.save_state(self.make_state(index.advance(position), index, outbox, profile, journal.entry))
+            return
+
+        # Record the intent before posting (see SequentialContentBot.run)
+        journalled = not poster.blocked
+        if journalled:
+            journal.begin(position, tweet_text)
+            if not await self.save_state(self.make_state(position, index, outbox, profile, journal.entry, failures)):
+                logging.error("Not posting: could not save the posting journal")
+                return
+
+        tasks = [self.post_timed(poster, tweet_text)]
+        if description:
+            tasks.append(self.update_description(description))
+        result, *applied = await asyncio.gather(*tasks)
+        if description:
+            self.record_description(profile, description, applied[0])
+
+        new_state = self.settle_post(result, tweet_text, position, index, outbox, profile, journal, failures,
+                                     changed=journalled or profile != previous_profile)
+        if new_state is not None:
+            await self.save_state(new_state)
@@ -0,0 +1,257 @@
+import json
+import logging
+import threading
+from bot_engines import instrumentation
+
+# Process-level cache of the last seen version of each state blob.
+# Maps (account, container, blob) -> (etag, raw_bytes)
+_etag_cache = {}
+_created_containers = set()
+_lock = threading.Lock()
+
+
+class StateConflictError(Exception):
+    """A conditional write lost a race with another writer"""
+
+
+def _download_kwargs(cached):
+    from azure.core import MatchConditions
+
+    # With a cached copy, an unchanged blob answers 304 without a body
+    if cached is None:
+        return {}
+    return {'etag': cached[0], 'match_condition': MatchConditions.IfModified}
+
+
+def _upload_kwargs(etag, conditional):
+    from azure.core import MatchConditions
+
+    upload_kwargs = {'overwrite': True}
+    if conditional and etag:
+        upload_kwargs.update(etag=etag, match_condition=MatchConditions.IfNotModified)
+    elif conditional:
+        upload_kwargs['overwrite'] = False
+    return upload_kwargs
+
+
+class BlobStateStore:
+    """
+    JSON state documents in a blob container.
+    Reads are a single (conditional) GET: a missing blob means "no state" and an
+    unchanged blob is served from the worker's cache via If-None-Match.
+    The bookkeeping around each request is shared with AsyncBlobStateStore; only the I/O differs.
+    """
+
+    def __init__(self, blob_service_client, container_name):
+        self.blob_service_client = blob_service_client
+        self.container_name = container_name
+
+    def _cache_key(self, blob_name):
+        return (self.blob_service_client.account_name, self.container_name, blob_name)
+
+    def _blob_client(self, blob_name):
+        return self.blob_service_client.get_blob_client(container=self.container_name, blob=blob_name)
+
+    def _begin_read(self, blob_name):
+        """(cache key, cached (etag, raw) or None) for a read"""
+        key = self._cache_key(blob_name)
+        instrumentation.count('blob_get')
+        return key, _etag_cache.get(key)
+
+    @staticmethod
+    def _read_result(key, etag, raw):
+        """Cache the blob as downloaded or revalidated, and parse it"""
+        _etag_cache[key] = (etag, raw)
+        return json.loads(raw), etag
+
+    @staticmethod
+    def _not_modified(key, cached):
+        instrumentation.count('blob_not_modified')
+        return BlobStateStore._read_result(key, *cached)
+
+    @staticmethod
+    def _not_found(key):
+        _etag_cache.pop(key, None)
+        return None, None
+
+    @staticmethod
+    def _encode(state, dumps_kwargs):
+        raw = json.dumps(state, **dumps_kwargs).encode('utf-8')
+        instrumentation.count('blob_put')
+        instrumentation.count('blob_bytes_written', len(raw))
+        return raw
+
+    def _written(self, blob_name, raw, result):
+        _etag_cache[self._cache_key(blob_name)] = (result['etag'], raw)
+        return result['etag']
+
+    def _conflict(self, blob_name):
+        _etag_cache.pop(self._cache_key(blob_name), None)
+        return StateConflictError(f"State blob '{blob_name}' was changed by another writer")
+
+    @staticmethod
+    def _update_retry(blob_name, attempt, retries):
+        logging.warning(f"Concurrent update of '{blob_name}', retrying ({attempt + 1}/{retries})")
+
+    @staticmethod
+    def _update_failed(blob_name, retries):
+        return StateConflictError(f"Could not update '{blob_name}' after {retries} attempts")
+
+    def read_with_etag(self, blob_name):
+        """Return (state, etag), or (None, None) if the blob does not exist"""
+        from azure.core.exceptions import ResourceNotFoundError, ResourceNotModifiedError
+
+        key, cached = self._begin_read(blob_name)
+        try:
+            downloader = self._blob_client(blob_name).download_blob(**_download_kwargs(cached))
+            raw = downloader.readall()
+        except ResourceNotModifiedError:
+            return self._not_modified(key, cached)
+        except ResourceNotFoundError:
+            return self._not_found(key)
+
+        instrumentation.count('blob_bytes_read', len(raw))
+        return self._read_result(key, downloader.properties.etag, raw)
+
+    def read(self, blob_name):
+        """Return the state document, or None if the blob does not exist"""
+        return self.read_with_etag(blob_name)[0]
+
+    def write(self, blob_name, state, etag=None, conditional=False, **dumps_kwargs):
+        """
+        Write the state document and remember its new ETag.
+        With conditional=True the write only succeeds if the blob is unchanged since it was
+        read (etag), or still missing (etag=None); otherwise StateConflictError is raised.
+        Returns the new ETag.
+        """
+        from azure.core.exceptions import ResourceNotFoundError, ResourceModifiedError, ResourceExistsError
+
+        raw = self._encode(state, dumps_kwargs)
+        blob_client = self._blob_client(blob_name)
+        upload_kwargs = _upload_kwargs(etag, conditional)
+        try:
+            try:
+                result = blob_client.upload_blob(raw, **upload_kwargs)
+            except ResourceNotFoundError:
+                # Container missing (first write on a fresh storage account)
+                self.ensure_container()
+                result = blob_client.upload_blob(raw, **upload_kwargs)
+        except (ResourceModifiedError, ResourceExistsError) as e:
+            raise self._conflict(blob_name) from e
+        return self._written(blob_name, raw, result)
+
+    def update(self, blob_name, mutate, default, current=None, retries=3, **dumps_kwargs):
+        """
+        Optimistic read-modify-write of a state document.
+        mutate(state) edits the document in place and returns True if it changed it.
+        default() builds the document when the blob does not exist yet.
+        current: (state, etag) from an earlier read, to skip the initial download.
+        Returns (state, etag) as stored; nothing is written if mutate reports no change.
+        """
+        for attempt in range(retries):
+            if current is not None and attempt == 0:
+                state, etag = current
+            else:
+                state, etag = self.read_with_etag(blob_name)
+                if state is None:
+                    state = default()
+
+            if not mutate(state):
+                return state, etag
+
+            try:
+                return state, self.write(blob_name, state, etag=etag, conditional=True, **dumps_kwargs)
+            except StateConflictError:
+                self._update_retry(blob_name, attempt, retries)
+
+        raise self._update_failed(blob_name, retries)
+
+    def _container_key(self):
+        """The container's key in _created_containers, or None if it was already created by this worker"""
+        key = (self.blob_service_client.account_name, self.container_name)
+        return None if key in _created_containers else key
+
+    def ensure_container(self):
+        """Create the container once per worker; normally done at deploy time"""
+        from azure.core.exceptions import ResourceExistsError
+
+        key = self._container_key()
+        if key is None:
+            return
+        with _lock:
+            try:
+                self.blob_service_client.get_container_client(self.container_name).create_container()
+                logging.info(f"Created container: {self.container_name}")
+            except ResourceExistsError:
+                pass
+            _created_containers.add(key)
+
+
+class AsyncBlobStateStore(BlobStateStore):
+    """BlobStateStore over an azure.storage.blob.aio client; shares the worker's ETag cache"""
+
+    async def read_with_etag(self, blob_name):
+        from azure.core.exceptions import ResourceNotFoundError, ResourceNotModifiedError
+
+        key, cached = self._begin_read(blob_name)
+        try:
+            downloader = await self._blob_client(blob_name).download_blob(**_download_kwargs(cached))
+            raw = await downloader.readall()
+        except ResourceNotModifiedError:
+            return self._not_modified(key, cached)
+        except ResourceNotFoundError:
+            return self._not_found(key)
+
+        instrumentation.count('blob_bytes_read', len(raw))
+        return self._read_result(key, downloader.properties.etag, raw)
+
+    async def read(self, blob_name):
+        return (await self.read_with_etag(blob_name))[0]
+
+    async def write(self, blob_name, state, etag=None, conditional=False, **dumps_kwargs):
+        from azure.core.exceptions import ResourceNotFoundError, ResourceModifiedError, ResourceExistsError
+
+        raw = self._encode(state, dumps_kwargs)
+        blob_client = self._blob_client(blob_name)
+        upload_kwargs = _upload_kwargs(etag, conditional)
+        try:
+            try:
+                result = await blob_client.upload_blob(raw, **upload_kwargs)
+            except ResourceNotFoundError:
+                await self.ensure_container()
+                result = await blob_client.upload_blob(raw, **upload_kwargs)
+        except (ResourceModifiedError, ResourceExistsError) as e:
+            raise self._conflict(blob_name) from e
+        return self._written(blob_name, raw, result)
+
+    async def update(self, blob_name, mutate, default, current=None, retries=3, **dumps_kwargs):
+        for attempt in range(retries):
+            if current is not None and attempt == 0:
+                state, etag = current
+            else:
+                state, etag = await self.read_with_etag(blob_name)
+                if state is None:
+                    state = default()
+
+            if not mutate(state):
+                return state, etag
+
+            try:
+                return state, await self.write(blob_name, state, etag=etag, conditional=True, **dumps_kwargs)
+            except StateConflictError:
+                self._update_retry(blob_name, attempt, retries)
+
+        raise self._update_failed(blob_name, retries)
+
+    async def ensure_container(self):
+        from azure.core.exceptions import ResourceExistsError
+
+        key = self._container_key()
+        if key is None:
+            return
+        try:
+            await self.blob_service_client.get_container_client(self.container_name).create_container()
+            logging.info(f"Created container: {self.container_name}")
+        except ResourceExistsError:
+            pass
+        _created_containers.add(key)
@@ -0,0 +1,154 @@
+import hashlib
+import threading
+import weakref
+from bot_engines import instrumentation
+
+# Process-level pool of authenticated clients, shared across invocations in a worker.
+# Reusing them keeps their HTTP sessions (and TLS connections) alive between triggers.
+# The SDKs are imported on first use so that importing this module stays cheap.
+# Maps (kind, identity) -> (credentials_hash, client)
+_pool = {}
+_lock = threading.Lock()
+
+TWITTER_CREDENTIAL_KEYS = ('consumer_key', 'consumer_secret', 'access_token', 'access_token_secret')
+
+
+def _hash(*values):
+    return hashlib.sha256('\0'.join(values).encode('utf-8')).hexdigest()
+
+
+def _get_or_create(kind, identity, credentials_hash, factory):
+    """Return the pooled client, replacing it if the credentials behind it changed"""
+    key = (kind, identity)
+    entry = _pool.get(key)
+    if entry is not None and entry[0] == credentials_hash:
+        return entry[1]
+
+    with _lock:
+        entry = _pool.get(key)
+        if entry is None or entry[0] != credentials_hash:
+            instrumentation.count('clients_created')
+            entry = (credentials_hash, factory())
+            _pool[key] = entry
+        return entry[1]
+
+
+def _twitter_identity(config):
+    # One entry per app + user pair; the secrets only decide whether the entry is stale
+    return _hash(config['consumer_key'], config['access_token'])
+
+
+def _keep_last_response(client):
+    """
+    tweepy.Client returns no response headers; keep the last response on the client, as
+    tweepy.API does, so rate-limit headers of successful calls reach the RateBudget
+    """
+    def hook(response, *args, **kwargs):
+        client.last_response = response
+    client.session.hooks['response'].append(hook)
+    return client
+
+
+def get_twitter_client(config):
+    """Pooled tweepy.Client (API v2) for the credentials in config"""
+    import tweepy
+    credentials = [config[k] for k in TWITTER_CREDENTIAL_KEYS]
+    return _get_or_create(
+        'twitter_v2',
+        _twitter_identity(config),
+        _hash(*credentials),
+        lambda: _keep_last_response(tweepy.Client(
+            consumer_key=config['consumer_key'],
+            consumer_secret=config['consumer_secret'],
+            access_token=config['access_token'],
+            access_token_secret=config['access_token_secret']
+        ))
+    )
+
+
+def get_twitter_api_v1(config):
+    """Pooled tweepy.API (v1.1) for the credentials in config"""
+    import tweepy
+    credentials = [config[k] for k in TWITTER_CREDENTIAL_KEYS]
+    return _get_or_create(
+        'twitter_v1',
+        _twitter_identity(config),
+        _hash(*credentials),
+        lambda: tweepy.API(tweepy.OAuth1UserHandler(*credentials))
+    )
+
+
+def get_blob_service_client(connection_string):
+    """Pooled BlobServiceClient; the connection string is parsed once per worker"""
+    from azure.storage.blob import BlobServiceClient
+    connection_hash = _hash(connection_string)
+    return _get_or_create(
+        'blob',
+        connection_hash,
+        connection_hash,
+        lambda: BlobServiceClient.from_connection_string(connection_string)
+    )
+
+
+def clear_pool():
+    """Drop all pooled clients (mainly useful for local tooling)"""
+    with _lock:
+        _pool.clear()
+        _async_pools.clear()
+
+
+# ============================================================================
+# Async clients - bound to the event loop they were created on
+# ============================================================================
+
+# Maps event loop -> {(kind, identity): (credentials_hash, client)}.
+# Keyed by the loop itself, so a new loop never inherits clients of a dead one with the same id.
+# Pooled clients reference their loop, so loops are dropped once closed rather than collected.
+_async_pools = weakref.WeakKeyDictionary()
+
+
+def _get_or_create_async(kind, identity, credentials_hash, factory):
+    """_get_or_create for clients bound to the running event loop"""
+    import asyncio
+    loop = asyncio.get_running_loop()
+    key = (kind, identity)
+    with _lock:
+        # Clients of a closed loop can neither be used nor closed any more
+        for closed in [other for other in _async_pools if other.is_closed()]:
+            del _async_pools[closed]
+        pool = _async_pools.setdefault(loop, {})
+        entry = pool.get(key)
+        if entry is None or entry[0] != credentials_hash:
+            instrumentation.count('clients_created')
+            entry = (credentials_hash, factory())
+            pool[key] = entry
+        return entry[1]
+
+
+def get_async_twitter_client(config):
+    """Pooled tweepy AsyncClient (API v2) for the credentials in config and the running loop"""
+    from tweepy.asynchronous import AsyncClient
+    credentials = [config[k] for k in TWITTER_CREDENTIAL_KEYS]
+    return _get_or_create_async(
+        'twitter_v2_async',
+        _twitter_identity(config),
+        _hash(*credentials),
+        lambda: AsyncClient(
+            consumer_key=config['consumer_key'],
+            consumer_secret=config['consumer_secret'],
+            access_token=config['access_token'],
+            access_token_secret=config['access_token_secret']
+        )
+    )
+
+
+def get_async_blob_service_client(connection_string):
+    """Pooled async BlobServiceClient for the running loop"""
+    from azure.storage.blob.aio import BlobServiceClient
+    connection_hash = _hash(connection_string)
+    return _get_or_create_async(
+        'blob_async',
+        connection_hash,
+        connection_hash,
+        lambda: BlobServiceClient.from_connection_string(connection_string)
+    )
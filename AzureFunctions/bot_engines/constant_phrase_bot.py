@@ -1,10 +1,24 @@
-import tweepy
-import json
 import logging
 from datetime import datetime
-from azure.storage.blob import BlobServiceClient
+from bot_engines import instrumentation
+from bot_engines.client_pool import get_twitter_client, get_blob_service_client
+from bot_engines.blob_state import BlobStateStore
+from bot_engines.schedule import DailySchedule
+from bot_engines.posting import TweetPoster, Outbox
+from bot_engines.rate_budget import RateBudget
+from bot_engines.tweet_length import weighted_length, MAX_WEIGHTED_LENGTH
+from bot_engines.override_store import (
+    OverrideStore, normalize_date, parse_bulk_operations, validate_bulk_operations, apply_bulk_operations
+)
+
+STATE_VERSION = 1
+
 
 class ConstantPhraseBot:
+    # The async variant swaps in its storage classes
+    state_store_class = BlobStateStore
+    budget_class = RateBudget
+
     def __init__(self, config):
         """
         config: {
@@ -13,172 +27,256 @@ class ConstantPhraseBot:
             'access_token': str,
             'access_token_secret': str,
             'blob_connection_string': str,
-            'bot_name': str,  # Used to generate blob names: {bot_name}_overrides.json, {bot_name}_enabled.json
+            'bot_name': str,  # Used to generate the state blob name: {bot_name}_state.json
             'constant_phrase': str,
             'timezone': ZoneInfo object,  # Timezone for date matching
-            'target_hour': int  # Target hour to post (in configured timezone)
+            'target_hour': int,  # Target hour to post (in configured timezone)
+            'retry_hours': int,  # Optional, hourly follow-up slots that drain a failed post (default 0)
+            'post_time_budget_seconds': int  # Optional, time allowed for posting retries (default 60)
         }
         """
         self.config = config
-        self.client = tweepy.Client(
-            consumer_key=config['consumer_key'],
-            consumer_secret=config['consumer_secret'],
-            access_token=config['access_token'],
-            access_token_secret=config['access_token_secret']
-        )
-
-        self.blob_service_client = BlobServiceClient.from_connection_string(config['blob_connection_string'])
+        # Clients are pooled per worker and reused across invocations
+        self.blob_service_client = self.make_blob_service_client()
         self.container_name = "bot-state"
         self.bot_name = config['bot_name']
+        self.state_blob_name = f"{self.bot_name}_state.json"
+        self.state_store = self.state_store_class(self.blob_service_client, self.container_name)
+        # Pre-consolidation blobs, read once to migrate into the state document
         self.overrides_blob_name = f"{self.bot_name}_overrides.json"
         self.enabled_blob_name = f"{self.bot_name}_enabled.json"
-        self._ensure_container_exists()
+        self._state = None
+        self._etag = None
+        self.schedule = DailySchedule(config['timezone'], config['target_hour'], retry_hours=config.get('retry_hours', 0))
+        self.budget = self.budget_class(self.state_store, config)
+
+    def make_blob_service_client(self):
+        return get_blob_service_client(self.config['blob_connection_string'])
+
+    @property
+    def client(self):
+        # Created on first use, so management API requests never load tweepy
+        return get_twitter_client(self.config)
 
     # ============================================================================
     # Infrastructure & State Management
     # ============================================================================
 
-    def _ensure_container_exists(self):
-        """Create container if it doesn't exist"""
+    @staticmethod
+    def from_legacy(enabled_state=None, overrides=None):
+        """State document from the pre-consolidation enabled/overrides blobs (defaults where missing)"""
+        state = {'version': STATE_VERSION, 'enabled': True, 'overrides': {}, 'last_post': None}
+        if enabled_state is not None:
+            state['enabled'] = enabled_state.get('enabled', True)
+        if overrides is not None:
+            state['overrides'] = overrides
+        return state
+
+    def _legacy_state(self):
+        """Build a state document from the pre-consolidation enabled/overrides blobs"""
         try:
-            container_client = self.blob_service_client.get_container_client(self.container_name)
-            container_client.create_container()
-            logging.info(f"Created container: {self.container_name}")
+            return self.from_legacy(self.state_store.read(self.enabled_blob_name),
+                                    self.state_store.read(self.overrides_blob_name))
         except Exception as e:
-            # Container likely already exists
-            logging.info(f"Container {self.container_name} already exists or error: {e}")
+            logging.info(f"No legacy state found, using defaults: {e}")
+        return self.from_legacy()
+
+    def load_state(self):
+        """
+        Load the state document (kill switch, overrides, last post) once per bot instance.
+        Defaults to enabled with no overrides if nothing is stored yet.
+        """
+        if self._state is None:
+            with instrumentation.phase('state_read'):
+                try:
+                    state, etag = self.state_store.read_with_etag(self.state_blob_name)
+                except Exception as e:
+                    logging.info(f"Error loading state, defaulting to enabled: {e}")
+                    state, etag = None, None
+                if state is None:
+                    state = self._legacy_state()
+            self._state, self._etag = state, etag
+        return self._state
+
+    def update_state(self, mutate):
+        """Apply mutate(state) -> changed and persist with a single conditional write"""
+        self.load_state()
+        with instrumentation.phase('state_write'):
+            self._state, self._etag = self.state_store.update(self.state_blob_name, mutate, **self.update_kwargs())
+        return self._state
+
+    def update_kwargs(self):
+        """BlobStateStore.update arguments for the state document, from the state as loaded"""
+        return {'default': self._legacy_state, 'current': (self._state, self._etag), 'indent': 2,
+                'ensure_ascii': False}
 
     def is_enabled(self):
         """Check if bot is enabled"""
-        try:
-            blob_client = self.blob_service_client.get_blob_client(
-                container=self.container_name,
-                blob=self.enabled_blob_name
-            )
-            blob_data = blob_client.download_blob().readall()
-            state = json.loads(blob_data)
-            return state.get('enabled', True)  # Default to enabled
-        except Exception as e:
-            logging.info(f"No enabled state found, defaulting to enabled: {e}")
-            return True  # Default to enabled if no state file
+        return self.load_state().get('enabled', True)  # Default to enabled
 
     def set_enabled(self, enabled):
         """Enable or disable the bot"""
-        blob_client = self.blob_service_client.get_blob_client(
-            container=self.container_name,
-            blob=self.enabled_blob_name
-        )
-        state = {'enabled': enabled}
-        blob_client.upload_blob(
-            json.dumps(state, indent=2),
-            overwrite=True
-        )
+        def mutate(state):
+            changed = state.get('enabled', True) != enabled
+            state['enabled'] = enabled
+            return changed
+
+        self.update_state(mutate)
         status = "enabled" if enabled else "disabled"
         logging.info(f"Bot {status}")
 
     def get_overrides(self):
-        """Load overrides from blob storage"""
-        try:
-            blob_client = self.blob_service_client.get_blob_client(
-                container=self.container_name,
-                blob=self.overrides_blob_name
-            )
-            blob_data = blob_client.download_blob().readall()
-            return json.loads(blob_data)
-        except Exception as e:
-            logging.info(f"No overrides found or error loading: {e}")
-            return {}
+        """Scheduled overrides from the state document"""
+        return dict(self.load_state().get('overrides', {}))
 
     def save_overrides(self, overrides):
-        """Save overrides to blob storage"""
-        blob_client = self.blob_service_client.get_blob_client(
-            container=self.container_name,
-            blob=self.overrides_blob_name
-        )
-        blob_client.upload_blob(
-            json.dumps(overrides, indent=2, ensure_ascii=False),
-            overwrite=True
-        )
+        """Replace the scheduled overrides"""
+        def mutate(state):
+            changed = state.get('overrides') != overrides
+            state['overrides'] = overrides
+            return changed
+
+        self.update_state(mutate)
         logging.info("Overrides saved successfully")
 
     def cleanup_past_overrides(self, overrides, today_str):
-        """Remove overrides for dates in the past (including today)"""
-        today_date = datetime.strptime(today_str, '%Y-%m-%d').date()
-        original_count = len(overrides)
-
-        # Remove all dates <= today
-        cleaned_overrides = {
-            date: phrase for date, phrase in overrides.items()
-            if datetime.strptime(date, '%Y-%m-%d').date() > today_date
-        }
+        """Return overrides without dates in the past (including today)"""
+        store = OverrideStore(overrides)
 
-        if len(cleaned_overrides) < original_count:
-            self.save_overrides(cleaned_overrides)
-            removed = original_count - len(cleaned_overrides)
+        # Remove all dates <= today: a prefix cut on the date-ordered keys
+        removed = store.expire_through(today_str)
+
+        if removed:
             logging.info(f"Cleaned up {removed} past override(s)")
         else:
             logging.info("No past overrides to clean up")
+        return store.to_dict()
 
     # ============================================================================
     # Timer Trigger - Tweet Posting Logic
     # ============================================================================
 
-    def get_phrase_for_today(self):
-        """Get phrase for today - check override first, then use constant"""
+    def get_today(self):
         # Use configured timezone for date matching
-        today = datetime.now(self.config['timezone']).strftime('%Y-%m-%d')
+        return datetime.now(self.config['timezone']).strftime('%Y-%m-%d')
+
+    def get_phrase_for_today(self, today=None):
+        """Get phrase for today - check override first, then use constant"""
+        today = today or self.get_today()
         overrides = self.get_overrides()
 
-        phrase = None
         if today in overrides:
             logging.info(f"Using override phrase for {today}")
-            phrase = overrides[today]
-        else:
-            logging.info(f"Using constant phrase for {today}")
-            phrase = self.config['constant_phrase']
+            return overrides[today]
 
-        # Clean up past overrides (including today's after using it)
-        self.cleanup_past_overrides(overrides, today)
+        logging.info(f"Using constant phrase for {today}")
+        return self.config['constant_phrase']
 
-        return phrase
+    def is_target_time(self, now=None):
+        """Check if now is within tolerance of today's exact (DST-aware) fire instant"""
+        local_now = datetime.now(self.config['timezone']) if now is None else now.astimezone(self.config['timezone'])
+        due = self.schedule.due_instant(local_now)
 
-    def is_target_time(self):
-        """Check if current time (rounded to nearest hour) matches target hour"""
-        from datetime import timedelta
+        if due is None:
+            next_fire = self.schedule.next_fire(local_now).astimezone(self.config['timezone'])
+            logging.info(f'Not the target time. Current time: {local_now.strftime("%H:%M")}, next post at {next_fire.isoformat()}')
+            return False
 
-        now = datetime.now(self.config['timezone'])
-        target_hour = self.config['target_hour']
+        logging.info(f'Target time reached: {local_now.strftime("%H:%M")} (scheduled {due.astimezone(self.config["timezone"]).strftime("%H:%M")})')
+        return True
 
-        # Round to nearest hour: add 30 minutes and take the hour
-        rounded_hour = (now + timedelta(minutes=30)).hour
+    def make_poster(self):
+        return TweetPoster(self.client, time_budget_seconds=self.config.get('post_time_budget_seconds', 60),
+                           budget=self.budget)
 
-        if rounded_hour != target_hour:
-            logging.info(f'Not the target hour. Current time: {now.strftime("%H:%M")} (rounds to {rounded_hour}:00), Target: {target_hour}:00')
-            return False
+    def make_outbox(self):
+        return Outbox(self.load_state().get('outbox'))
 
-        logging.info(f'Target time reached: {now.strftime("%H:%M")} (rounds to {rounded_hour}:00)')
-        return True
+    def queue_failed_post(self, outbox, result, today, phrase):
+        """Keep a transient failure for the follow-up slots of today's schedule"""
+        due = self.schedule.due_instant()
+        if result.retryable and self.schedule.retry_hours and due is not None:
+            outbox.enqueue(phrase, not_after=self.schedule.retry_deadline(due), date=today)
+
+    def record_post(self, outbox, result, today, phrase):
+        if result.ok:
+            logging.info(f"Tweet posted successfully: {phrase}")
+            logging.info(f"Tweet ID: {result.tweet_id}")
+        else:
+            self.queue_failed_post(outbox, result, today, phrase)
 
     def post_tweet(self):
         """Post the appropriate phrase for today"""
-        phrase = self.get_phrase_for_today()
+        today = self.get_today()
+        phrase = self.get_phrase_for_today(today)
+        poster = self.make_poster()
+
+        # Anything still pending from an earlier slot goes out first (expired entries are dropped)
+        outbox = self.make_outbox()
+        with instrumentation.phase('outbox'):
+            outbox.drain(poster)
+
+        with instrumentation.phase('post'):
+            result = poster.post(phrase)
+        self.record_post(outbox, result, today, phrase)
 
         try:
-            response = self.client.create_tweet(text=phrase)
-            logging.info(f"Tweet posted successfully: {phrase}")
-            logging.info(f"Tweet ID: {response.data['id']}")
-            return True
+            self.update_state(self.after_post_mutation(today, phrase, result.tweet_id, outbox))
         except Exception as e:
-            logging.error(f"Error posting tweet: {e}")
-            return False
+            logging.error(f"Error saving state: {e}")
 
-    def run(self):
-        """Main run method - checks time and posts if appropriate"""
+        return result.ok
+
+    def drain_outbox(self):
+        """Follow-up slot: retry a failed post, costing a single state read when there is none"""
+        outbox = self.make_outbox()
+        if not outbox.entries:
+            return False
         if not self.is_enabled():
             logging.info('Bot is disabled via kill switch')
             return False
 
+        with instrumentation.phase('outbox'):
+            outbox.drain(self.make_poster())
+        try:
+            self.update_state(self.after_post_mutation(None, None, None, outbox))
+        except Exception as e:
+            logging.error(f"Error saving state: {e}")
+        return bool(outbox.posted)
+
+    def after_post_mutation(self, today, phrase, tweet_id, outbox=None):
+        """
+        State mutation applied after a posting attempt: clean up past overrides
+        (including today's after using it), record the post and the outbox, in a single write
+        """
+        def mutate(state):
+            changed = False
+            if today is not None:
+                overrides = state.get('overrides', {})
+                state['overrides'] = self.cleanup_past_overrides(overrides, today)
+                changed = len(state['overrides']) != len(overrides)
+            if outbox is not None and outbox.changed:
+                for entry, posted_id in outbox.posted:
+                    state['last_post'] = {'date': entry.get('date'), 'tweet_id': posted_id, 'phrase': entry['text']}
+                state['outbox'] = outbox.entries
+                changed = True
+            if tweet_id is not None:
+                state['last_post'] = {'date': today, 'tweet_id': tweet_id, 'phrase': phrase}
+                changed = True
+            return changed
+
+        return mutate
+
+    def run(self):
+        """Main run method - checks time and posts if appropriate"""
+        # Time check first: it needs no storage, so off-target invocations stay free
         if not self.is_target_time():
+            if self.schedule.is_retry_due():
+                return self.drain_outbox()
+            return False
+
+        if not self.is_enabled():
+            logging.info('Bot is disabled via kill switch')
             return False
 
         return self.post_tweet()
@@ -189,43 +287,84 @@ class ConstantPhraseBot:
 
     def add_override(self, date, phrase):
         """Add or update an override for a specific date"""
-        overrides = self.get_overrides()
-        overrides[date] = phrase
-        self.save_overrides(overrides)
+        def mutate(state):
+            store = OverrideStore(state.get('overrides'))
+            changed = store.add(date, phrase)
+            state['overrides'] = store.to_dict()
+            return changed
+
+        self.update_state(mutate)
         logging.info(f"Override added for {date}")
 
     def remove_override(self, date):
         """Remove an override for a specific date"""
-        overrides = self.get_overrides()
-        if date in overrides:
-            del overrides[date]
-            self.save_overrides(overrides)
-            logging.info(f"Override removed for {date}")
-            return True
-        return False
+        def mutate(state):
+            store = OverrideStore(state.get('overrides'))
+            changed = store.remove(date)
+            state['overrides'] = store.to_dict()
+            return changed
+
+        if date not in self.get_overrides():
+            return False
+        self.update_state(mutate)
+        logging.info(f"Override removed for {date}")
+        return True
 
     def list_overrides(self):
         """List all scheduled overrides"""
         return self.get_overrides()
 
+    def apply_bulk_overrides(self, operations):
+        """Apply normalized add/remove operations in a single state write"""
+        summary = {}
+
+        def mutate(state):
+            store = OverrideStore(state.get('overrides'))
+            summary.clear()
+            summary.update(apply_bulk_operations(store, operations))
+            state['overrides'] = store.to_dict()
+            return summary['added'] + summary['removed'] > 0
+
+        self.update_state(mutate)
+        logging.info(f"Bulk override update applied: {summary}")
+        return summary
+
+    def handle_bulk_override_request(self, operations):
+        """Handle a bulk list of add/remove operations (all-or-nothing validation)"""
+        normalized, errors = validate_bulk_operations(operations)
+        if errors:
+            return {"status": 400, "body": {"error": "Invalid operations", "details": errors}}
+
+        summary = self.apply_bulk_overrides(normalized)
+        return {
+            "status": 200,
+            "body": {"success": True, "operations": len(normalized), **summary, "overrides": self.get_overrides()}
+        }
+
     def handle_schedule_override_request(self, action, request_body=None):
         """Handle schedule override API requests"""
         if action == 'list':
             overrides = self.list_overrides()
             return {"status": 200, "body": overrides}
 
-        # For add/remove, need request body
+        # For add/remove/bulk, need request body
         if not request_body:
             return {"status": 400, "body": {"error": "Request body required"}}
 
-        date = request_body.get('date')
-        if not date:
+        if action == 'bulk':
+            return self.handle_bulk_override_request(request_body)
+
+        try:
+            date = normalize_date(request_body.get('date') or '')
+        except ValueError:
             return {"status": 400, "body": {"error": "Please provide 'date' in format YYYY-MM-DD"}}
 
         if action == 'add':
             phrase = request_body.get('phrase')
             if not phrase:
                 return {"status": 400, "body": {"error": "Please provide 'phrase' for the override"}}
+            if weighted_length(phrase) > MAX_WEIGHTED_LENGTH:
+                return {"status": 400, "body": {"error": f"Phrase is longer than {MAX_WEIGHTED_LENGTH} weighted characters"}}
 
             self.add_override(date, phrase)
             return {
@@ -255,7 +394,7 @@ class ConstantPhraseBot:
         else:
             return {
                 "status": 400,
-                "body": {"error": f"Unknown action: {action}. Use 'add', 'remove', or 'list'"}
+                "body": {"error": f"Unknown action: {action}. Use 'add', 'remove', 'bulk', or 'list'"}
             }
 
     def handle_kill_switch_request(self, action):
@@ -264,7 +403,11 @@ class ConstantPhraseBot:
             enabled = self.is_enabled()
             return {
                 "status": 200,
-                "body": {"enabled": enabled, "status": "enabled" if enabled else "disabled"}
+                "body": {
+                    "enabled": enabled,
+                    "status": "enabled" if enabled else "disabled",
+                    "next_post": self.schedule.next_fire().astimezone(self.config['timezone']).isoformat()
+                }
             }
 
         elif action == 'enable':
@@ -307,13 +450,17 @@ class ConstantPhraseBot:
                 if not action:
                     return {
                         "status": 400,
-                        "body": {"error": "Missing required parameter 'action'. Use 'add', 'remove', or 'list'"}
+                        "body": {"error": "Missing required parameter 'action'. Use 'add', 'remove', 'bulk', or 'list'"}
                     }
 
                 request_body = None
                 if action != 'list':
                     try:
-                        request_body = req.get_json()
+                        if action == 'bulk':
+                            # JSON list of operations or NDJSON, one operation per line
+                            request_body = parse_bulk_operations(req.get_body())
+                        else:
+                            request_body = req.get_json()
                     except ValueError:
                         return {
                             "status": 400,
@@ -0,0 +1,61 @@
+import json
+import logging
+import os
+import threading
+from bot_engines import instrumentation
+
+# Process-level cache shared by every bot running in this worker.
+# Maps absolute path -> (signature, parsed_content)
+_cache = {}
+_lock = threading.Lock()
+
+
+def _file_signature(path):
+    """Cheap change detector for a file: (mtime_ns, size)"""
+    st = os.stat(path)
+    return (st.st_mtime_ns, st.st_size)
+
+
+def _read_json(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def load_json_cached(path):
+    """
+    Load a JSON file, reusing the parsed object while the file is unchanged.
+    The returned object is shared between callers and must be treated as read-only.
+    """
+    return load_cached(path, _read_json)
+
+
+def load_cached(path, loader):
+    """
+    Return loader(path), reusing the previous result while the file is unchanged.
+    The returned object is shared between callers and must be treated as read-only.
+    """
+    key = os.path.abspath(path)
+    signature = _file_signature(key)
+
+    entry = _cache.get(key)
+    if entry is not None and entry[0] == signature:
+        return entry[1]
+
+    with _lock:
+        # Another thread may have loaded it while we were waiting
+        entry = _cache.get(key)
+        if entry is not None and entry[0] == signature:
+            return entry[1]
+
+        instrumentation.count('content_cache_miss')
+        with instrumentation.phase('content_parse'):
+            content = loader(key)
+        _cache[key] = (signature, content)
+        logging.info(f"Loaded content file into cache: {key}")
+        return content
+
+
+def clear_cache():
+    """Drop all cached content (mainly useful for local tooling)"""
+    with _lock:
+        _cache.clear()
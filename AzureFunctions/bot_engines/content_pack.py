@@ -0,0 +1,197 @@
+import mmap
+import struct
+from bot_engines.content_cache import load_cached, load_json_cached
+from bot_engines.cursor import CursorIndex
+
+# =============================================================================
+# Content pack format (all integers little-endian)
+#
+#   header:       magic b"SQCP", version u16, flags u16, major_count u32, item_count u32
+#   major table:  major_count x (first_item u32, minor_count u32, label_off u32, label_len u32)
+#   item table:   item_count  x (text_off u32, text_len u32, label_off u32, label_len u32)
+#   blob:         UTF-8 strings, offsets are relative to the start of the blob
+#
+# Items are stored in reading order, so the item index is a global cursor over
+# the corpus and first_item is the prefix sum of the minor counts.
+# =============================================================================
+
+PACK_MAGIC = b"SQCP"
+PACK_VERSION = 1
+FLAG_MINOR_LABELS = 0x1
+
+_HEADER = struct.Struct('<4sHHII')
+_ENTRY = struct.Struct('<IIII')
+
+
+class ContentPack:
+    """Read-only, memory-mapped view over a content pack file"""
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, flags, major_count, item_count = _HEADER.unpack_from(self._mm, 0)
+        if magic != PACK_MAGIC or version != PACK_VERSION:
+            raise ValueError(f"Not a supported content pack: {path}")
+
+        self.has_minor_labels = bool(flags & FLAG_MINOR_LABELS)
+        self._major_count = major_count
+        self._item_count = item_count
+        self._majors_off = _HEADER.size
+        self._items_off = self._majors_off + major_count * _ENTRY.size
+        self._blob_off = self._items_off + item_count * _ENTRY.size
+        self._cursor_index = None
+
+    def _major_entry(self, major):
+        if not 0 <= major < self._major_count:
+            raise IndexError(f"Major index out of range: {major}")
+        return _ENTRY.unpack_from(self._mm, self._majors_off + major * _ENTRY.size)
+
+    def _item_entry(self, major, minor):
+        first_item, minor_count, _, _ = self._major_entry(major)
+        if not 0 <= minor < minor_count:
+            raise IndexError(f"Minor index out of range: {major}/{minor}")
+        return _ENTRY.unpack_from(self._mm, self._items_off + (first_item + minor) * _ENTRY.size)
+
+    def _string(self, offset, length):
+        start = self._blob_off + offset
+        return self._mm[start:start + length].decode('utf-8')
+
+    def major_count(self):
+        return self._major_count
+
+    def minor_count(self, major):
+        return self._major_entry(major)[1]
+
+    def item_count(self):
+        return self._item_count
+
+    def cursor_index(self):
+        if self._cursor_index is None:
+            self._cursor_index = CursorIndex(self._major_entry(i)[1] for i in range(self._major_count))
+        return self._cursor_index
+
+    def text(self, major, minor):
+        text_off, text_len, _, _ = self._item_entry(major, minor)
+        return self._string(text_off, text_len)
+
+    def major_label(self, major):
+        _, _, label_off, label_len = self._major_entry(major)
+        return self._string(label_off, label_len)
+
+    def minor_label(self, major, minor):
+        """Stored label for an item, or None if the pack carries no minor labels"""
+        if not self.has_minor_labels:
+            return None
+        _, _, label_off, label_len = self._item_entry(major, minor)
+        return self._string(label_off, label_len)
+
+
+class JsonContent:
+    """Same interface as ContentPack, backed by the legacy nested JSON corpus"""
+
+    def __init__(self, content, minor_list_key, text_key, major_label_key, minor_label_key=None):
+        self._content = content
+        self._minor_list_key = minor_list_key
+        self._text_key = text_key
+        self._major_label_key = major_label_key
+        self._minor_label_key = minor_label_key
+        self.has_minor_labels = bool(minor_label_key)
+        self._cursor_index = None
+
+    def major_count(self):
+        return len(self._content)
+
+    def minor_count(self, major):
+        return len(self._content[major][self._minor_list_key])
+
+    def item_count(self):
+        return self.cursor_index().total
+
+    def cursor_index(self):
+        if self._cursor_index is None:
+            self._cursor_index = CursorIndex.for_content(self)
+        return self._cursor_index
+
+    def text(self, major, minor):
+        return self._content[major][self._minor_list_key][minor][self._text_key]
+
+    def major_label(self, major):
+        return self._content[major][self._major_label_key]
+
+    def minor_label(self, major, minor):
+        if not self._minor_label_key:
+            return None
+        return self._content[major][self._minor_list_key][minor][self._minor_label_key]
+
+
+def open_pack(path):
+    """Open a content pack, sharing the mapping across bots in this worker"""
+    return load_cached(path, ContentPack)
+
+
+def open_content(config):
+    """
+    Return the content source for a SequentialContentBot config.
+    Prefers 'content_pack_path'; falls back to the JSON corpus at 'content_file_path'.
+    """
+    if config.get('content_pack_path'):
+        return open_pack(config['content_pack_path'])
+
+    return JsonContent(
+        load_json_cached(config['content_file_path']),
+        config['minor_list_key'],
+        config['text_key'],
+        config['major_label_key'],
+        config.get('minor_label_key')
+    )
+
+
+# =============================================================================
+# Writing
+# =============================================================================
+
+def write_pack(path, units):
+    """
+    Write a content pack.
+    units: list of (major_label, [(text, minor_label_or_None), ...])
+    """
+    has_minor_labels = any(label is not None for _, items in units for _, label in items)
+    blob = bytearray()
+
+    def add_string(s):
+        data = (s or '').encode('utf-8')
+        offset = len(blob)
+        blob.extend(data)
+        return offset, len(data)
+
+    major_entries = []
+    item_entries = []
+    for major_label, items in units:
+        label_off, label_len = add_string(major_label)
+        major_entries.append((len(item_entries), len(items), label_off, label_len))
+        for text, minor_label in items:
+            text_off, text_len = add_string(text)
+            minor_off, minor_len = add_string(minor_label)
+            item_entries.append((text_off, text_len, minor_off, minor_len))
+
+    flags = FLAG_MINOR_LABELS if has_minor_labels else 0
+    with open(path, 'wb') as f:
+        f.write(_HEADER.pack(PACK_MAGIC, PACK_VERSION, flags, len(major_entries), len(item_entries)))
+        for entry in major_entries:
+            f.write(_ENTRY.pack(*entry))
+        for entry in item_entries:
+            f.write(_ENTRY.pack(*entry))
+        f.write(blob)
+
+
+def units_from_json(content, minor_list_key, text_key, major_label_key, minor_label_key=None):
+    """Convert the nested JSON corpus layout into write_pack units"""
+    return [
+        (
+            major[major_label_key],
+            [(item[text_key], item[minor_label_key] if minor_label_key else None)
+             for item in major[minor_list_key]]
+        )
+        for major in content
+    ]
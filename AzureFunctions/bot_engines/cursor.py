@@ -0,0 +1,55 @@
+from bisect import bisect_right
+
+
+class CursorIndex:
+    """
+    Maps a single global item position to (major, minor) and back.
+    prefix[i] is the global position of the first item of major unit i;
+    prefix[-1] is the total number of items.
+    """
+
+    def __init__(self, minor_counts):
+        self.prefix = [0]
+        for count in minor_counts:
+            self.prefix.append(self.prefix[-1] + count)
+
+    @classmethod
+    def for_content(cls, content):
+        return cls(content.minor_count(i) for i in range(content.major_count()))
+
+    @property
+    def total(self):
+        return self.prefix[-1]
+
+    @property
+    def major_count(self):
+        return len(self.prefix) - 1
+
+    def is_valid(self, position):
+        # bool is an int subclass; a corrupted state's True must not pass as position 1
+        return isinstance(position, int) and not isinstance(position, bool) and 0 <= position < self.total
+
+    def locate(self, position):
+        """Global position -> (major, minor)"""
+        if not self.is_valid(position):
+            raise IndexError(f"Position out of range: {position}")
+        major = bisect_right(self.prefix, position) - 1
+        return major, position - self.prefix[major]
+
+    def position_of(self, major, minor=0):
+        """(major, minor) -> global position"""
+        if not 0 <= major < self.major_count:
+            raise IndexError(f"Major index out of range: {major}")
+        if not 0 <= minor < self.prefix[major + 1] - self.prefix[major]:
+            raise IndexError(f"Minor index out of range: {major}/{minor}")
+        return self.prefix[major] + minor
+
+    def position_at_percent(self, percent):
+        """Position of the item at the given percentage (0-100) of the corpus"""
+        if not 0 <= percent <= 100:
+            raise ValueError(f"Percent must be between 0 and 100: {percent}")
+        return min(int(self.total * percent / 100), self.total - 1)
+
+    def advance(self, position, steps=1):
+        """Position after posting `steps` more items, wrapping at the end of the corpus"""
+        return (position + steps) % self.total
@@ -0,0 +1,51 @@
+from functools import lru_cache
+
+_ONES = ['', 'א', 'ב', 'ג', 'ד', 'ה', 'ו', 'ז', 'ח', 'ט']
+_TENS = ['', 'י', 'כ', 'ל', 'מ', 'נ', 'ס', 'ע', 'פ', 'צ']
+_HUNDREDS = ['', 'ק', 'ר', 'ש', 'ת']
+
+# Label styles: bare letters, ASCII quote marks, or Hebrew geresh / gershayim
+PLAIN = 'plain'
+ASCII = 'ascii'
+HEBREW = 'hebrew'
+_MARKS = {PLAIN: ('', ''), ASCII: ("'", '"'), HEBREW: ('׳', '״')}
+
+
+def _letters(n):
+    """Letters for 1 <= n <= 999, largest value first"""
+    letters = []
+    hundreds, rest = divmod(n, 100)
+    # 500-900 are written with ת repeated, as in ת"ק or תת"ק
+    letters.append('ת' * (hundreds // 4) + _HUNDREDS[hundreds % 4])
+    if rest in (15, 16):
+        # ט"ו / ט"ז rather than the spellings of divine names
+        letters.append('ט' + _ONES[rest - 9])
+    else:
+        letters.append(_TENS[rest // 10] + _ONES[rest % 10])
+    return ''.join(letters)
+
+
+def _punctuate(letters, style):
+    geresh, gershayim = _MARKS[style]
+    if len(letters) == 1:
+        return letters + geresh
+    return letters[:-1] + gershayim + letters[-1]
+
+
+@lru_cache(maxsize=4096)
+def gematria(n, style=PLAIN):
+    """
+    Hebrew numeral for a positive integer, e.g. 15 -> 'טו', 118 -> 'קיח'.
+    Thousands are written as a separate group followed by a geresh (5785 -> ה'תשפ"ה
+    in ASCII style, התשפה in PLAIN style). style: PLAIN, ASCII or HEBREW.
+    """
+    if not isinstance(n, int) or isinstance(n, bool) or n < 1:
+        raise ValueError(f"Hebrew numerals need a positive integer, got {n!r}")
+    if style not in _MARKS:
+        raise ValueError(f"Unknown numeral style {style!r}; use {PLAIN!r}, {ASCII!r} or {HEBREW!r}")
+
+    thousands, rest = divmod(n, 1000)
+    label = _punctuate(_letters(rest), style) if rest else ''
+    if thousands:
+        label = gematria(thousands, PLAIN) + _MARKS[style][0] + label
+    return label
@@ -0,0 +1,67 @@
+import hashlib
+import threading
+import time
+from email.utils import formatdate
+
+
+class CachedResponse:
+    """A serialized response body with its validators"""
+
+    def __init__(self, body, status, etag, last_modified, expires_at):
+        self.body = body
+        self.status = status
+        self.etag = etag
+        self.last_modified = last_modified
+        self.expires_at = expires_at
+
+    def headers(self):
+        return {
+            'ETag': self.etag,
+            'Last-Modified': formatdate(self.last_modified, usegmt=True),
+            'Cache-Control': 'no-cache'
+        }
+
+    def matches(self, if_none_match):
+        """True if an If-None-Match header value covers this response"""
+        if not if_none_match:
+            return False
+        tags = [tag.strip() for tag in if_none_match.split(',')]
+        return '*' in tags or self.etag in tags or f'W/{self.etag}' in tags
+
+
+class ResponseCache:
+    """
+    Short-TTL, in-worker cache for read-only API responses.
+    Entries are keyed by request (e.g. endpoint + action) and dropped on any mutation.
+    Last-Modified is the first time this worker saw the current body.
+    """
+
+    def __init__(self, ttl_seconds):
+        self.ttl_seconds = ttl_seconds
+        self._entries = {}
+        self._first_seen = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None or entry.expires_at <= time.monotonic():
+            return None
+        return entry
+
+    def put(self, key, body, status=200):
+        """Cache a serialized body (str or bytes) and return the CachedResponse"""
+        data = body.encode('utf-8') if isinstance(body, str) else body
+        etag = '"%s"' % hashlib.sha1(data).hexdigest()
+        with self._lock:
+            last_modified = self._first_seen.setdefault((key, etag), time.time())
+            # Keep only the validator of the current body for this key
+            for stale in [k for k in self._first_seen if k[0] == key and k[1] != etag]:
+                del self._first_seen[stale]
+            entry = CachedResponse(body, status, etag, last_modified, time.monotonic() + self.ttl_seconds)
+            self._entries[key] = entry
+        return entry
+
+    def invalidate(self):
+        """Drop all cached bodies (validators are kept so unchanged data keeps its ETag)"""
+        with self._lock:
+            self._entries.clear()
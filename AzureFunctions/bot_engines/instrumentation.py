@@ -0,0 +1,138 @@
+import contextvars
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+# Metrics of the bot run in progress. Set per run (thread or asyncio task) and
+# inherited by asyncio.to_thread, so helpers deep in the call stack can record
+# into it without the run object being threaded through.
+_current = contextvars.ContextVar('bot_run_metrics', default=None)
+
+# Names that already ran in this worker process; a name's first run is the cold one
+# (its clients, content and ETag caches start empty)
+_warm = set()
+_warm_lock = threading.Lock()
+
+_meter = None
+_instruments = None
+
+METRICS_PREFIX = "Bot run metrics: "
+
+
+class RunMetrics:
+    """
+    Per-phase durations (ms), counters and dimensions of one bot run.
+    Phases may overlap (async runs gather them), so they need not add up to the total.
+    """
+
+    def __init__(self, bot, engine, trigger):
+        self.dimensions = {'bot': bot, 'engine': engine, 'trigger': trigger}
+        self.phases = {}
+        self.counters = {}
+        self.started = time.perf_counter()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = (time.perf_counter() - start) * 1000
+            with self._lock:
+                self.phases[name] = self.phases.get(name, 0.0) + elapsed
+
+    def count(self, name, n=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def to_dict(self):
+        return {
+            **self.dimensions,
+            'total_ms': round((time.perf_counter() - self.started) * 1000, 1),
+            'phases_ms': {name: round(ms, 1) for name, ms in self.phases.items()},
+            'counters': dict(self.counters)
+        }
+
+
+def count(name, n=1):
+    """Increment a counter of the current run; a no-op outside an instrumented run"""
+    metrics = _current.get()
+    if metrics is not None:
+        metrics.count(name, n)
+
+
+def phase(name):
+    """Context manager timing a phase of the current run; a no-op outside an instrumented run"""
+    metrics = _current.get()
+    return metrics.phase(name) if metrics is not None else nullcontext()
+
+
+@contextmanager
+def instrumented_run(bot, engine, trigger='timer'):
+    """
+    Collect metrics for one bot run and emit them when it ends:
+    a single log record carrying every value as JSON (see emit), plus
+    OpenTelemetry metrics when an exporter is configured.
+    """
+    with _warm_lock:
+        cold = bot not in _warm
+        _warm.add(bot)
+
+    metrics = RunMetrics(bot, engine, trigger)
+    metrics.dimensions['cold'] = cold
+    token = _current.set(metrics)
+    ok = False
+    try:
+        yield metrics
+        ok = True
+    finally:
+        _current.reset(token)
+        metrics.dimensions['ok'] = ok
+        emit(metrics)
+
+
+def emit(metrics):
+    """
+    Log the run's metrics as METRICS_PREFIX + JSON. The Functions host forwards only the
+    message of a worker's log record to Application Insights (custom dimensions passed in
+    `extra` are dropped), so every value is in the message, e.g.:
+        traces | where message startswith "Bot run metrics: "
+        | extend m = parse_json(substring(message, strlen("Bot run metrics: ")))
+        | project timestamp, bot = tostring(m.bot), total_ms = todouble(m.total_ms)
+    """
+    data = metrics.to_dict()
+    logging.info(METRICS_PREFIX + json.dumps(data, ensure_ascii=False))
+    _record_otel(data)
+
+
+def _otel_instruments():
+    """Histograms and counters on the global OpenTelemetry meter, or None if it is not installed"""
+    global _meter, _instruments
+    if _instruments is None:
+        try:
+            from opentelemetry import metrics as otel_metrics
+        except ImportError:
+            _instruments = False
+            return None
+        _meter = otel_metrics.get_meter('twitterbots')
+        _instruments = {
+            'duration': _meter.create_histogram('bot.run.duration', unit='ms'),
+            'phase': _meter.create_histogram('bot.phase.duration', unit='ms'),
+            'calls': _meter.create_counter('bot.calls')
+        }
+    return _instruments or None
+
+
+def _record_otel(data):
+    instruments = _otel_instruments()
+    if instruments is None:
+        return
+    attributes = {k: data[k] for k in ('bot', 'engine', 'trigger', 'cold', 'ok')}
+    instruments['duration'].record(data['total_ms'], attributes)
+    for name, ms in data['phases_ms'].items():
+        instruments['phase'].record(ms, {**attributes, 'phase': name})
+    for name, n in data['counters'].items():
+        instruments['calls'].add(n, {**attributes, 'counter': name})
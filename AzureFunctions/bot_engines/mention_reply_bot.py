@@ -0,0 +1,268 @@
+import json
+import logging
+import re
+from bot_engines import instrumentation
+from bot_engines.client_pool import get_twitter_client, get_blob_service_client
+from bot_engines.blob_state import BlobStateStore
+from bot_engines.posting import TweetPoster, ACCESS, DUPLICATE, classify_error, response_headers, last_response_headers
+from bot_engines.rate_budget import RateBudget, LIKE
+
+STATE_VERSION = 1
+
+# Reply actions
+REPLY = 'reply'
+LIKE_AND_REPLY = 'like_and_reply'
+
+_ONLY_MENTIONS = re.compile(r'^(@\w+\s*)+$')
+
+EVENTS_PREFIX = "Mention run events: "
+
+
+class EventBuffer:
+    """
+    Events of one run, logged as a single record instead of one write per event:
+    EVENTS_PREFIX + JSON {'bot', 'counts': {event: n}, 'events': [...]}, all in the message
+    since the Functions host does not forward logging extras (see instrumentation.emit).
+    """
+
+    def __init__(self, bot_name):
+        self.bot_name = bot_name
+        self.events = []
+
+    def add(self, event, **fields):
+        self.events.append({'event': event, **fields})
+
+    def flush(self):
+        if not self.events:
+            return
+        counts = {}
+        for entry in self.events:
+            counts[entry['event']] = counts.get(entry['event'], 0) + 1
+        record = {'bot': self.bot_name, 'counts': counts, 'events': self.events}
+        logging.info(EVENTS_PREFIX + json.dumps(record, ensure_ascii=False))
+        self.events = []
+
+
+def _replied_to(tweet):
+    """Id of the tweet this one replies to, or None"""
+    for reference in getattr(tweet, 'referenced_tweets', None) or []:
+        if reference.type == 'replied_to':
+            return str(reference.id)
+    return None
+
+
+class MentionReplyBot:
+    def __init__(self, config):
+        """
+        config: {
+            'consumer_key': str,
+            'consumer_secret': str,
+            'access_token': str,  # OAuth 1.0a user token; its prefix is the bot's user id
+            'access_token_secret': str,
+            'blob_connection_string': str,
+            'bot_name': str,  # Used to generate the state blob name: {bot_name}_state.json
+            'reply_text': str,
+            'page_size': int,  # Optional, mentions per request, 5-100 (default 100)
+            'max_pages': int,  # Optional, pages fetched when catching up on a backlog (default 5)
+            'max_replies_per_run': int,  # Optional, replies sent per run; the rest wait for the next (default 10)
+            'max_pending': int,  # Optional, replies kept for later runs (default 50)
+            'post_time_budget_seconds': int  # Optional, time allowed for posting retries (default 30)
+        }
+        """
+        self.config = config
+        self.blob_service_client = get_blob_service_client(config['blob_connection_string'])
+        self.container_name = "bot-state"
+        self.bot_name = config['bot_name']
+        self.state_blob_name = f"{self.bot_name}_state.json"
+        self.state_store = BlobStateStore(self.blob_service_client, self.container_name)
+        # OAuth 1.0a access tokens are "{user_id}-{secret}"; no get_me call needed
+        self.user_id = config['access_token'].partition('-')[0]
+        self.events = EventBuffer(self.bot_name)
+        self.budget = RateBudget(self.state_store, config)
+
+    @property
+    def client(self):
+        return get_twitter_client(self.config)
+
+    # ============================================================================
+    # State - {'version', 'since_id', 'pending': [{'id', 'action', 'reply_to'}, ...],
+    #          'backlog': {'since_id', 'until_id'} (mentions between them not fetched yet)}
+    # ============================================================================
+
+    def get_state(self):
+        try:
+            with instrumentation.phase('state_read'):
+                state = self.state_store.read(self.state_blob_name)
+            if state is not None:
+                return state
+            logging.info(f"Blob '{self.state_blob_name}' does not exist")
+        except Exception as e:
+            logging.warning(f"Error loading state: {e}")
+        return None
+
+    def save_state(self, state):
+        try:
+            with instrumentation.phase('state_write'):
+                self.state_store.write(self.state_blob_name, state)
+            return True
+        except Exception as e:
+            logging.error(f"Error saving state: {e}")
+            return False
+
+    # ============================================================================
+    # Polling
+    # ============================================================================
+
+    def fetch_mentions(self, since_id, until_id=None, max_results=None):
+        """
+        Mentions newer than since_id (and older than until_id), newest first, the newest id seen,
+        and the oldest id fetched if more than max_pages of mentions were waiting (else None):
+        a later run continues below it. One request unless there is more than a page of them.
+        """
+        max_results = max_results or self.config.get('page_size', 100)
+        mentions, newest_id, oldest_id, token = [], None, None, None
+        for _ in range(self.config.get('max_pages', 5)):
+            instrumentation.count('twitter_calls')
+            with instrumentation.phase('poll'):
+                response = self.client.get_users_mentions(
+                    self.user_id,
+                    since_id=since_id,
+                    until_id=until_id,
+                    pagination_token=token,
+                    max_results=max_results,
+                    tweet_fields=['author_id', 'in_reply_to_user_id', 'referenced_tweets'],
+                    user_auth=True
+                )
+            meta = response.meta or {}
+            newest_id = newest_id or meta.get('newest_id')
+            oldest_id = meta.get('oldest_id') or oldest_id
+            mentions.extend(response.data or [])
+            token = meta.get('next_token')
+            if not token or since_id is None:
+                break
+        else:
+            self.events.add('backlog_deferred', fetched=len(mentions), until_id=oldest_id)
+            logging.warning(f"More than {len(mentions)} new mentions, older ones wait for the next run")
+            return mentions, newest_id, oldest_id
+        return mentions, newest_id, None
+
+    def classify(self, tweet):
+        """
+        The reply action for a mention, following the original streaming bot:
+        skip our own tweets; answer replies to us and plain mentions; when someone only tags
+        us under another user's tweet, like their tag and answer the tweet they replied to.
+        Returns {'id', 'action', 'reply_to'} or None.
+        """
+        tweet_id = str(tweet.id)
+        if str(tweet.author_id) == self.user_id:
+            return None
+        in_reply_to_user = str(tweet.in_reply_to_user_id) if tweet.in_reply_to_user_id else None
+        parent = _replied_to(tweet)
+        if parent and in_reply_to_user != self.user_id and _ONLY_MENTIONS.match(tweet.text.strip()):
+            return {'id': tweet_id, 'action': LIKE_AND_REPLY, 'reply_to': parent}
+        return {'id': tweet_id, 'action': REPLY, 'reply_to': tweet_id}
+
+    # ============================================================================
+    # Replying
+    # ============================================================================
+
+    def make_poster(self):
+        return TweetPoster(self.client, time_budget_seconds=self.config.get('post_time_budget_seconds', 30),
+                           budget=self.budget)
+
+    def like(self, tweet_id, token):
+        """Like a tweet, settling the budget token taken for it"""
+        instrumentation.count('twitter_calls')
+        try:
+            self.client.like(tweet_id, user_auth=True)
+            self.budget.observe(token, last_response_headers(self.client))
+            return True
+        except Exception as e:
+            self.budget.observe(token, response_headers(e))
+            self.events.add('like_failed', id=tweet_id, kind=classify_error(e))
+            logging.warning(f"Failed to like {tweet_id}: {e}")
+            return False
+
+    def send(self, poster, entry):
+        """Carry out one action. Returns False if it should be retried on a later run."""
+        if entry['action'] == LIKE_AND_REPLY and not entry.get('liked'):
+            token = self.budget.acquire(LIKE)
+            if token.wait:
+                # Like and reply go out together; both wait for the budget
+                self.events.add('like_deferred', id=entry['id'])
+                return False
+            entry['liked'] = self.like(entry['id'], token)
+        result = poster.post(self.config['reply_text'], in_reply_to_tweet_id=entry['reply_to'])
+        if result.ok:
+            self.events.add('replied', id=entry['id'], reply_to=entry['reply_to'], tweet_id=result.tweet_id)
+            return True
+        if result.kind == DUPLICATE:
+            self.events.add('already_replied', id=entry['id'])
+            return True
+        self.events.add('reply_failed', id=entry['id'], kind=result.kind)
+        # Deleted or protected tweets cannot be answered; only retry what may still work,
+        # and keep everything while X refuses the bot's own access
+        return not (result.retryable or result.kind == ACCESS)
+
+    def send_batch(self, pending):
+        """Send up to max_replies_per_run of the pending actions, oldest first. Returns those left."""
+        poster = self.make_poster()
+        budget = self.config.get('max_replies_per_run', 10)
+        left = []
+        for entry in pending:
+            if budget <= 0 or poster.blocked:
+                left.append(entry)
+                continue
+            budget -= 1
+            with instrumentation.phase('reply'):
+                if not self.send(poster, entry):
+                    left.append(entry)
+        return left
+
+    def run(self):
+        state = self.get_state() or {'version': STATE_VERSION, 'since_id': None, 'pending': []}
+        since_id = state.get('since_id')
+        backlog = state.get('backlog')
+        try:
+            if since_id is None:
+                # First run: start from the newest mention instead of answering the whole history
+                _, newest_id, _ = self.fetch_mentions(None, max_results=5)
+                self.events.add('cursor_started', since_id=newest_id)
+                mentions = []
+            elif backlog:
+                # An earlier run fetched only the newest of a backlog: continue below the oldest it got,
+                # before polling for new mentions again
+                mentions, _, until_id = self.fetch_mentions(backlog['since_id'], until_id=backlog['until_id'])
+                newest_id = None
+                backlog = {**backlog, 'until_id': until_id} if until_id else None
+            else:
+                mentions, newest_id, until_id = self.fetch_mentions(since_id)
+                backlog = {'since_id': since_id, 'until_id': until_id} if until_id else None
+        except Exception as e:
+            logging.error(f"Failed to fetch mentions ({classify_error(e)}): {e}")
+            return {'mentions': 0, 'error': str(e)}
+
+        instrumentation.count('mentions', len(mentions))
+        pending = list(state.get('pending', []))
+        queued = {entry['id'] for entry in pending}
+        for tweet in reversed(mentions):
+            entry = self.classify(tweet)
+            if entry is None:
+                self.events.add('skipped_self', id=str(tweet.id))
+            elif entry['id'] not in queued:
+                pending.append(entry)
+
+        left = self.send_batch(pending) if pending else []
+        handled = len(pending) - len(left)
+        max_pending = self.config.get('max_pending', 50)
+        if len(left) > max_pending:
+            self.events.add('pending_dropped', count=len(left) - max_pending)
+            left = left[-max_pending:]
+
+        new_state = {'version': STATE_VERSION, 'since_id': newest_id or since_id, 'pending': left}
+        if backlog:
+            new_state['backlog'] = backlog
+        if new_state != state:
+            self.save_state(new_state)
+        self.events.flush()
+        return {'mentions': len(mentions), 'handled': handled, 'pending': len(left)}
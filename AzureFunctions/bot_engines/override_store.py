@@ -0,0 +1,126 @@
+import json
+from bisect import bisect_right, insort
+from datetime import date
+from bot_engines.tweet_length import weighted_length, MAX_WEIGHTED_LENGTH
+
+
+def normalize_date(value):
+    """Validate a YYYY-MM-DD string and return it in canonical ISO form"""
+    return date.fromisoformat(value).isoformat()
+
+
+class OverrideStore:
+    """
+    Date-keyed phrase overrides kept in date order.
+    Keys are ISO dates (YYYY-MM-DD), whose string order is their chronological
+    order, so lookups and expiry are bisections with no date parsing.
+    """
+
+    def __init__(self, overrides=None):
+        self._phrases = dict(overrides or {})
+        self._keys = sorted(self._phrases)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __contains__(self, date_str):
+        return date_str in self._phrases
+
+    def get(self, date_str, default=None):
+        return self._phrases.get(date_str, default)
+
+    def add(self, date_str, phrase):
+        """Add or replace an override. Returns True if the store changed."""
+        if date_str in self._phrases:
+            changed = self._phrases[date_str] != phrase
+        else:
+            insort(self._keys, date_str)
+            changed = True
+        self._phrases[date_str] = phrase
+        return changed
+
+    def remove(self, date_str):
+        """Remove an override. Returns True if it existed."""
+        if date_str not in self._phrases:
+            return False
+        del self._phrases[date_str]
+        del self._keys[bisect_right(self._keys, date_str) - 1]
+        return True
+
+    def expire_through(self, date_str):
+        """Drop every override dated on or before date_str. Returns the number removed."""
+        cut = bisect_right(self._keys, date_str)
+        for key in self._keys[:cut]:
+            del self._phrases[key]
+        del self._keys[:cut]
+        return cut
+
+    def to_dict(self):
+        """Overrides as an ordered {date: phrase} dict, earliest first"""
+        return {key: self._phrases[key] for key in self._keys}
+
+
+# =============================================================================
+# Bulk operations
+# =============================================================================
+
+def parse_bulk_operations(body):
+    """
+    Parse a bulk request body into a list of operation dicts.
+    Accepts a JSON list, {"operations": [...]}, or NDJSON (one operation per line, which
+    for a single line is a lone operation object).
+    Raises ValueError if the body cannot be parsed.
+    """
+    text = body.decode('utf-8') if isinstance(body, bytes) else body
+    try:
+        parsed = json.loads(text)
+    except ValueError:
+        parsed = [json.loads(line) for line in text.splitlines() if line.strip()]
+
+    if isinstance(parsed, dict):
+        parsed = parsed['operations'] if 'operations' in parsed else [parsed]
+    if not isinstance(parsed, list) or not all(isinstance(op, dict) for op in parsed):
+        raise ValueError("Expected a list of operations")
+    return parsed
+
+
+def validate_bulk_operations(operations):
+    """
+    Normalize operations to (op, date, phrase) tuples.
+    Returns (normalized, errors); errors is a list of messages with operation indexes.
+    """
+    normalized = []
+    errors = []
+    for i, operation in enumerate(operations):
+        op = operation.get('op') or operation.get('action')
+        try:
+            date_str = normalize_date(operation.get('date', ''))
+        except (TypeError, ValueError):
+            errors.append(f"Operation {i}: please provide 'date' in format YYYY-MM-DD")
+            continue
+
+        if op == 'add':
+            phrase = operation.get('phrase')
+            if not phrase:
+                errors.append(f"Operation {i}: please provide 'phrase' for the override")
+                continue
+            if weighted_length(phrase) > MAX_WEIGHTED_LENGTH:
+                errors.append(f"Operation {i}: phrase is longer than {MAX_WEIGHTED_LENGTH} weighted characters")
+                continue
+            normalized.append(('add', date_str, phrase))
+        elif op == 'remove':
+            normalized.append(('remove', date_str, None))
+        else:
+            errors.append(f"Operation {i}: unknown op '{op}'. Use 'add' or 'remove'")
+    return normalized, errors
+
+
+def apply_bulk_operations(store, operations):
+    """Apply normalized operations in order. Returns counts per outcome."""
+    summary = {'added': 0, 'unchanged': 0, 'removed': 0, 'not_found': 0}
+    for op, date_str, phrase in operations:
+        if op == 'add':
+            summary['added' if store.add(date_str, phrase) else 'unchanged'] += 1
+        else:
+            summary['removed' if store.remove(date_str) else 'not_found'] += 1
+    return summary
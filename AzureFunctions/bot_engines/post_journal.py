@@ -0,0 +1,102 @@
+import hashlib
+import html
+import unicodedata
+from datetime import datetime, timedelta, timezone
+
+
+def content_hash(text):
+    return hashlib.sha256(unicodedata.normalize('NFC', text).encode('utf-8')).hexdigest()
+
+
+def _utcnow():
+    return datetime.now(timezone.utc)
+
+
+class PostJournal:
+    """
+    Write-ahead record of the post in flight, kept in the bot's state document as
+    {'position', 'hash', 'started_at' (ISO UTC), 'tweet_id' (once posted)}.
+    The intent is saved before create_tweet; if the run then fails to save its final
+    state, the next run finds the entry still pending and reconciles it instead of
+    posting the same item blindly.
+    """
+
+    def __init__(self, entry=None):
+        self.entry = entry
+
+    def pending_for(self, position, text):
+        """The unconfirmed entry an earlier run left for this post, or None"""
+        entry = self.entry
+        if not entry or 'tweet_id' in entry:
+            return None
+        if entry.get('position') != position or entry.get('hash') != content_hash(text):
+            # Left for another item (seek, content change): it no longer describes this post
+            return None
+        return entry
+
+    def begin(self, position, text, now=None):
+        self.entry = {
+            'position': position,
+            'hash': content_hash(text),
+            'started_at': (now or _utcnow()).isoformat()
+        }
+        return self.entry
+
+    def complete(self, tweet_id):
+        """Confirm the post; tweet_id is None when only a duplicate rejection proves it went out"""
+        self.entry = {**self.entry, 'tweet_id': tweet_id}
+
+    def abandon(self):
+        """The post did not go out (or went to the outbox); nothing is in flight"""
+        self.entry = None
+
+
+# =============================================================================
+# Verification - was a journalled post published after all?
+# =============================================================================
+
+def _normalized(text):
+    # The API returns text HTML-escaped (&amp;, &lt;, &gt;)
+    return unicodedata.normalize('NFC', html.unescape(text)).strip()
+
+
+class TimelineVerifier:
+    """
+    Looks for a post in the account's own recent tweets.
+    find() returns the tweet id, or None if no tweet with that text was posted since
+    the entry was started. Raises when the timeline cannot be read (e.g. the API
+    tier has no read access); callers then fall back to X's duplicate check.
+    """
+
+    def __init__(self, client, max_results=20, slack_seconds=60):
+        self.client = client
+        self.max_results = max_results
+        self.slack = timedelta(seconds=slack_seconds)
+
+    def _query(self, entry):
+        since = datetime.fromisoformat(entry['started_at']) - self.slack
+        return {'start_time': since, 'max_results': self.max_results, 'exclude': ['replies', 'retweets'],
+                'user_auth': True}
+
+    @staticmethod
+    def _match(response, text):
+        wanted = _normalized(text)
+        for tweet in response.data or []:
+            if _normalized(tweet.text) == wanted:
+                return str(tweet.id)
+        return None
+
+    def find(self, entry, text):
+        me = self.client.get_me(user_auth=True)
+        response = self.client.get_users_tweets(me.data.id, **self._query(entry))
+        return self._match(response, text)
+
+
+class AsyncTimelineVerifier(TimelineVerifier):
+    """TimelineVerifier for tweepy's AsyncClient"""
+
+    async def find(self, entry, text):
+        me = await self.client.get_me(user_auth=True)
+        response = await self.client.get_users_tweets(me.data.id, **self._query(entry))
+        return self._match(response, text)
+
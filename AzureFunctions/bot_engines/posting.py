@@ -0,0 +1,410 @@
+import asyncio
+import logging
+import random
+import time
+from datetime import datetime, timezone
+from bot_engines import instrumentation
+from bot_engines.rate_budget import CREATE_TWEET, observed_windows
+
+# Error kinds
+RATE_LIMITED = 'rate_limited'
+TRANSIENT = 'transient'
+PERMANENT = 'permanent'
+# X refused the text as a duplicate of a recent tweet: it is already out
+DUPLICATE = 'duplicate'
+# X refused the credentials, app or account (401, access-level 403): no post can go out
+# until someone fixes them, so the item is kept rather than retried or skipped
+ACCESS = 'access'
+
+# 403 codes and message fragments about the tweet itself rather than who sends it
+_CONTENT_CODES = {170, 186, 324, 385, 433}
+_CONTENT_MESSAGES = ('too long', 'text', 'media', 'reply')
+
+
+def is_duplicate(error):
+    """True for X's 403 for a tweet identical to a recent one from the same account"""
+    if 187 in (getattr(error, 'api_codes', None) or []):
+        return True
+    return any('duplicate' in str(message).lower() for message in getattr(error, 'api_messages', None) or [])
+
+
+def is_content_rejection(error):
+    """True for a 403 that refuses this tweet (too long, bad media, reply not allowed), not the sender"""
+    if _CONTENT_CODES & set(getattr(error, 'api_codes', None) or []):
+        return True
+    return any(fragment in str(message).lower()
+               for message in getattr(error, 'api_messages', None) or [] for fragment in _CONTENT_MESSAGES)
+
+
+def classify_error(error):
+    """Classify a tweepy / transport exception as RATE_LIMITED, TRANSIENT, DUPLICATE, ACCESS or PERMANENT"""
+    import tweepy
+
+    if isinstance(error, tweepy.TooManyRequests):
+        return RATE_LIMITED
+    if isinstance(error, tweepy.TwitterServerError):
+        return TRANSIENT
+    if isinstance(error, tweepy.Unauthorized):
+        return ACCESS
+    if isinstance(error, tweepy.Forbidden):
+        if is_duplicate(error):
+            return DUPLICATE
+        # Other 403s (suspended app, access tier such as code 453, locked account) are about the sender
+        return PERMANENT if is_content_rejection(error) else ACCESS
+    if isinstance(error, tweepy.HTTPException):
+        # 400 / 404: retrying the same request cannot help
+        return PERMANENT
+    if isinstance(error, (ConnectionError, TimeoutError, asyncio.TimeoutError)):
+        return TRANSIENT
+
+    import requests
+    if isinstance(error, (requests.ConnectionError, requests.Timeout)):
+        return TRANSIENT
+    try:
+        import aiohttp
+        if isinstance(error, aiohttp.ClientConnectionError):
+            return TRANSIENT
+    except ImportError:
+        pass
+    return PERMANENT
+
+
+def response_headers(error):
+    """Response headers of a tweepy HTTPException (requests or aiohttp response), or {}"""
+    response = getattr(error, 'response', None)
+    return getattr(response, 'headers', None) or {}
+
+
+def last_response_headers(client):
+    """Headers of the client's last response (tweepy.API, pooled tweepy.Client), or {}"""
+    response = getattr(client, 'last_response', None)
+    return getattr(response, 'headers', None) or {}
+
+
+def server_delay(error, now=None):
+    """
+    Seconds the server asked us to wait, or None: until the latest reset of the windows
+    reported exhausted (15-minute, user or app 24-hour), else x-rate-limit-reset / Retry-After
+    """
+    headers = response_headers(error)
+    now = now if now is not None else time.time()
+    exhausted = [reset for _, _, _, remaining, reset in observed_windows(headers) if remaining < 1]
+    if exhausted:
+        return max(0.0, max(exhausted) - now)
+    reset = headers.get('x-rate-limit-reset')
+    if reset:
+        try:
+            return max(0.0, float(reset) - now)
+        except ValueError:
+            pass
+    retry_after = headers.get('retry-after') or headers.get('Retry-After')
+    if retry_after:
+        try:
+            return max(0.0, float(retry_after))
+        except ValueError:
+            pass
+    return None
+
+
+class PostResult:
+    def __init__(self, ok, response=None, error=None, kind=None, attempts=0):
+        self.ok = ok
+        self.response = response
+        self.error = error
+        self.kind = kind
+        self.attempts = attempts
+        # Threads (post_thread): ids of the posted parts and the parts left unsent
+        self.thread_ids = []
+        self.unsent = []
+
+    @property
+    def tweet_id(self):
+        return self.response.data['id'] if self.ok and self.response is not None else None
+
+    @property
+    def retryable(self):
+        return not self.ok and self.kind in (RATE_LIMITED, TRANSIENT)
+
+
+class TweetPoster:
+    """
+    create_tweet with error classification and retries inside a time budget.
+    Rate limits wait for the server's reset time when it fits in the budget;
+    transient errors back off exponentially with full jitter.
+    With a RateBudget, every attempt first checks the budget shared with the other bots on
+    the same credentials, then settles its token there with the response's rate-limit headers.
+    """
+
+    def __init__(self, client, time_budget_seconds=60, max_attempts=5, base_delay=2.0, max_delay=30.0,
+                 sleep=time.sleep, clock=time.monotonic, budget=None):
+        self.client = client
+        self.budget = budget
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.sleep = sleep
+        self.clock = clock
+        self.deadline = clock() + time_budget_seconds
+        # The budget token of the attempt in flight
+        self._token = None
+        # Once rate limited past the budget (RATE_LIMITED) or refused access (ACCESS), the kind:
+        # later posts in this run then fail with it without a call
+        self.blocked = None
+
+    def _next_delay(self, error, kind, attempt):
+        """Seconds to wait before the next attempt, or None to give up"""
+        if kind == ACCESS:
+            self.blocked = ACCESS
+            return None
+        if kind in (PERMANENT, DUPLICATE) or attempt >= self.max_attempts:
+            return None
+        delay = server_delay(error) if kind == RATE_LIMITED else None
+        if delay is None:
+            delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+        if self.clock() + delay > self.deadline:
+            if kind == RATE_LIMITED:
+                self.blocked = RATE_LIMITED
+            return None
+        return delay
+
+    def _acquire(self):
+        """
+        Take a token from the shared budget, waiting for it if that fits in the time budget.
+        Returns False to defer this and later posts of the run without calling X.
+        """
+        if self.budget is None:
+            return True
+        self._token = self.budget.acquire(CREATE_TWEET)
+        if self._worth_waiting():
+            self.sleep(self._token.wait)
+            self._token = self.budget.acquire(CREATE_TWEET)
+        return self._allowed()
+
+    def _worth_waiting(self):
+        return self._token.wait and self.clock() + self._token.wait <= self.deadline
+
+    def _allowed(self):
+        if self._token.wait:
+            self.blocked = RATE_LIMITED
+        return not self._token.wait
+
+    def _observe(self, headers):
+        if self.budget is not None:
+            self.budget.observe(self._token, headers)
+
+    def _retry_delay(self, error, attempt):
+        """(seconds to wait before retrying, None) or (None, the failed PostResult)"""
+        kind = classify_error(error)
+        instrumentation.count(f'twitter_{kind}')
+        delay = self._next_delay(error, kind, attempt)
+        if delay is None:
+            if kind == ACCESS:
+                logging.error(f"X refused the bot's access; check its credentials, app and account: {error}")
+            logging.error(f"Failed to post tweet ({kind}, {attempt} attempt(s)): {error}")
+            return None, PostResult(False, error=error, kind=kind, attempts=attempt)
+        logging.warning(f"Posting failed ({kind}), retrying in {delay:.1f}s: {error}")
+        return delay, None
+
+    @staticmethod
+    def _thread_part(result, reply, parts, i):
+        """Record a reply of post_thread. Returns False once the thread has stopped."""
+        if not reply.ok:
+            result.unsent = parts[i:]
+            return False
+        result.thread_ids.append(reply.tweet_id)
+        return True
+
+    def post(self, text, **kwargs):
+        if self.blocked:
+            return PostResult(False, kind=self.blocked)
+        attempt = 0
+        while True:
+            if not self._acquire():
+                return PostResult(False, kind=RATE_LIMITED, attempts=attempt)
+            attempt += 1
+            instrumentation.count('twitter_calls')
+            try:
+                response = self.client.create_tweet(text=text, **kwargs)
+                self._observe(last_response_headers(self.client))
+                return PostResult(True, response=response, attempts=attempt)
+            except Exception as e:
+                self._observe(response_headers(e))
+                delay, failed = self._retry_delay(e, attempt)
+                if failed:
+                    return failed
+                self.sleep(delay)
+
+    def post_thread(self, parts):
+        """
+        Post parts as a reply chain. Returns the first part's result; if a later part
+        fails, the parts from it onwards are left in result.unsent.
+        """
+        result = self.post(parts[0])
+        if not result.ok:
+            return result
+        result.thread_ids = [result.tweet_id]
+        for i, part in enumerate(parts[1:], 1):
+            reply = self.post(part, in_reply_to_tweet_id=result.thread_ids[-1])
+            if not self._thread_part(result, reply, parts, i):
+                break
+        return result
+
+
+class AsyncTweetPoster(TweetPoster):
+    """TweetPoster for tweepy's AsyncClient"""
+
+    def __init__(self, client, **kwargs):
+        kwargs.setdefault('sleep', asyncio.sleep)
+        super().__init__(client, **kwargs)
+
+    async def _acquire(self):
+        if self.budget is None:
+            return True
+        self._token = await self.budget.acquire(CREATE_TWEET)
+        if self._worth_waiting():
+            await self.sleep(self._token.wait)
+            self._token = await self.budget.acquire(CREATE_TWEET)
+        return self._allowed()
+
+    async def _observe(self, headers):
+        if self.budget is not None:
+            await self.budget.observe(self._token, headers)
+
+    async def post(self, text, **kwargs):
+        if self.blocked:
+            return PostResult(False, kind=self.blocked)
+        attempt = 0
+        while True:
+            if not await self._acquire():
+                return PostResult(False, kind=RATE_LIMITED, attempts=attempt)
+            attempt += 1
+            instrumentation.count('twitter_calls')
+            try:
+                response = await self.client.create_tweet(text=text, **kwargs)
+                # AsyncClient keeps no response; the budget counts its own tokens until the next headers
+                await self._observe(last_response_headers(self.client))
+                return PostResult(True, response=response, attempts=attempt)
+            except Exception as e:
+                await self._observe(response_headers(e))
+                delay, failed = self._retry_delay(e, attempt)
+                if failed:
+                    return failed
+                await self.sleep(delay)
+
+    async def post_thread(self, parts):
+        result = await self.post(parts[0])
+        if not result.ok:
+            return result
+        result.thread_ids = [result.tweet_id]
+        for i, part in enumerate(parts[1:], 1):
+            reply = await self.post(part, in_reply_to_tweet_id=result.thread_ids[-1])
+            if not self._thread_part(result, reply, parts, i):
+                break
+        return result
+
+
+# =============================================================================
+# Outbox - tweets that could not be sent yet, kept in the bot's state document
+# =============================================================================
+
+class Outbox:
+    """
+    Pending tweets, oldest first. Entries: {'text', 'queued_at', 'not_after' (optional ISO UTC),
+    'in_reply_to' (optional tweet id), 'reply_to_previous' (optional, reply to the entry before it)}.
+    Bounded so a long outage cannot build an unbounded backlog.
+    """
+
+    def __init__(self, entries=None, max_entries=12):
+        self.entries = list(entries or [])
+        self.max_entries = max_entries
+        self.changed = False
+        # (entry, tweet_id) for entries posted by drain()
+        self.posted = []
+        self._last_id = None
+
+    def __len__(self):
+        return len(self.entries)
+
+    def enqueue(self, text, not_after=None, **meta):
+        """Queue a tweet (meta is stored on the entry). Returns False if the outbox is full."""
+        if len(self.entries) >= self.max_entries:
+            logging.warning(f"Outbox full ({self.max_entries}), not queueing tweet")
+            return False
+        entry = {'text': text, 'queued_at': datetime.now(timezone.utc).isoformat(), **meta}
+        if not_after is not None:
+            entry['not_after'] = not_after.isoformat()
+        self.entries.append(entry)
+        self.changed = True
+        logging.info(f"Queued tweet in outbox ({len(self.entries)} pending)")
+        return True
+
+    def _pop_expired(self, now):
+        while self.entries and 'not_after' in self.entries[0] and \
+                datetime.fromisoformat(self.entries[0]['not_after']) < now:
+            logging.warning(f"Dropping expired outbox entry: {self.entries.pop(0)['text']}")
+            self.changed = True
+            self._last_id = None
+
+    def enqueue_thread(self, parts, in_reply_to=None, **meta):
+        """
+        Queue the parts of a thread, each replying to the one before it; the first replies
+        to in_reply_to (the last part already posted) if given. All or nothing.
+        """
+        if len(self.entries) + len(parts) > self.max_entries:
+            logging.warning(f"Outbox full ({self.max_entries}), not queueing {len(parts)}-part thread")
+            return False
+        for i, part in enumerate(parts):
+            if i:
+                self.enqueue(part, reply_to_previous=True, **meta)
+            elif in_reply_to:
+                self.enqueue(part, in_reply_to=in_reply_to, **meta)
+            else:
+                self.enqueue(part, **meta)
+        return True
+
+    def _reply_kwargs(self, entry):
+        if entry.get('in_reply_to'):
+            return {'in_reply_to_tweet_id': entry['in_reply_to']}
+        if entry.get('reply_to_previous') and self._last_id:
+            return {'in_reply_to_tweet_id': self._last_id}
+        return {}
+
+    def _settle(self, result):
+        """Apply the result for the head entry. Returns False if draining should stop."""
+        if result.ok or result.kind in (PERMANENT, DUPLICATE):
+            if result.ok:
+                logging.info(f"Posted outbox entry: {self.entries[0]['text']}")
+                self.posted.append((self.entries[0], result.tweet_id))
+                self._last_id = result.tweet_id
+            elif result.kind == DUPLICATE:
+                # Sent by an earlier run whose state was not saved
+                logging.warning(f"Outbox entry was already posted: {self.entries[0]['text']}")
+                self._last_id = None
+            else:
+                logging.error(f"Dropping outbox entry that cannot be posted: {self.entries[0]['text']}")
+                self._last_id = None
+            self.entries.pop(0)
+            self.changed = True
+            return True
+        return False
+
+    def drain(self, poster):
+        """Post pending entries in order. Returns True if the outbox is now empty."""
+        now = datetime.now(timezone.utc)
+        while self.entries:
+            self._pop_expired(now)
+            if not self.entries:
+                break
+            if not self._settle(poster.post(self.entries[0]['text'], **self._reply_kwargs(self.entries[0]))):
+                return False
+        return True
+
+    async def drain_async(self, poster):
+        now = datetime.now(timezone.utc)
+        while self.entries:
+            self._pop_expired(now)
+            if not self.entries:
+                break
+            if not self._settle(await poster.post(self.entries[0]['text'], **self._reply_kwargs(self.entries[0]))):
+                return False
+        return True
@@ -0,0 +1,60 @@
+from datetime import datetime, timezone
+
+
+class PostingCalendar:
+    """
+    When a sequential bot's items go out, projected from its cursor and trigger schedule.
+    Each scheduled run posts one item, so fire n after now posts position
+    (position + n) % total: the time of any item, and the items of any time range,
+    follow arithmetically without replaying the runs in between.
+    The projection assumes every run posts; a failed post or a seek shifts
+    everything after it.
+    """
+
+    def __init__(self, schedule, index, position, now=None):
+        self.schedule = schedule
+        self.index = index
+        self.position = position
+        self.now = now or datetime.now(timezone.utc)
+
+    def fire_of(self, position, cycle=0):
+        """Number of runs before the one posting position (in the given later cycle through the corpus)"""
+        if not self.index.is_valid(position):
+            raise IndexError(f"Position out of range: {position}")
+        return (position - self.position) % self.index.total + cycle * self.index.total
+
+    def post_time(self, position, cycle=0):
+        return self.schedule.nth_fire(self.fire_of(position, cycle), self.now)
+
+    def cycle_end(self):
+        """Time of the last post before the corpus starts over from the current position"""
+        return self.schedule.nth_fire(self.index.total - 1, self.now)
+
+    def entries(self, start=0, count=None):
+        """(post_at, position) of runs start, start + 1, ... (count of them, or endless), computed lazily"""
+        position = self.index.advance(self.position, start)
+        for post_at in self.schedule.fires(start, count, self.now):
+            yield post_at, position
+            position += 1
+            if position == self.index.total:
+                position = 0
+
+    def between(self, start, end):
+        """(post_at, position) of the posts from start (inclusive) to end (exclusive)"""
+        first = self.schedule.fire_index(start, self.now)
+        return self.entries(first, max(self.schedule.fire_index(end, self.now) - first, 0))
+
+    def range_from(self, start, count):
+        """(post_at, position) of the first count posts at or after start"""
+        return self.entries(self.schedule.fire_index(start, self.now), count)
+
+    def page(self, start, end=None, offset=0, count=24):
+        """
+        (post_at, position) of up to count posts from the offset-th post at or after start
+        (and before end), and the offset of the next page, or None when the range ends there
+        """
+        first = self.schedule.fire_index(start, self.now) + offset
+        if end is None:
+            return self.entries(first, count), offset + count
+        available = max(self.schedule.fire_index(end, self.now) - first, 0)
+        return self.entries(first, min(count, available)), offset + count if available > count else None
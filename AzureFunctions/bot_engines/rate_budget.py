@@ -0,0 +1,181 @@
+import hashlib
+import logging
+import time
+from bot_engines import instrumentation
+
+BUDGET_VERSION = 2
+
+# Endpoints drawing from the budget
+CREATE_TWEET = 'create_tweet'
+UPDATE_PROFILE = 'update_profile'
+LIKE = 'like'
+
+# Rate-limit windows X reports in response headers:
+# header prefix -> (window name, window length in seconds)
+WINDOWS = {
+    'x-rate-limit': ('15m', 15 * 60),
+    'x-user-limit-24hour': ('24h', 24 * 60 * 60),
+    'x-app-limit-24hour': ('24h_app', 24 * 60 * 60),
+}
+
+
+def _identity(value):
+    # Blob names identify credentials without storing them
+    return hashlib.sha256(value.encode('utf-8')).hexdigest()[:16]
+
+
+def budget_blob_name(config):
+    """The budget blob of a bot's credentials: one per app key and access token pair"""
+    return f"rate_budget_{_identity(config['consumer_key'] + '|' + config['access_token'])}.json"
+
+
+def observed_windows(headers):
+    """[(name, window_seconds, limit, remaining, reset_epoch), ...] from response headers"""
+    windows = []
+    for prefix, (name, seconds) in WINDOWS.items():
+        try:
+            limit = int(headers.get(f'{prefix}-limit'))
+            remaining = int(headers.get(f'{prefix}-remaining'))
+            reset = int(headers.get(f'{prefix}-reset'))
+        except (TypeError, ValueError):
+            continue
+        windows.append((name, seconds, limit, remaining, reset))
+    return windows
+
+
+def _refill(bucket, now):
+    """A bucket whose window has reset is full again; its next reset is a window later"""
+    if now >= bucket['reset']:
+        windows_passed = (now - bucket['reset']) // bucket['window'] + 1
+        bucket['reset'] += windows_passed * bucket['window']
+        bucket['remaining'] = bucket['limit']
+
+
+class BudgetToken:
+    """
+    A call allowed by RateBudget.acquire() (wait == 0), or deferred for wait seconds.
+    current: the budget document and ETag acquire() read, which observe() updates;
+    None if the budget could not be read and the call goes ahead unchecked.
+    """
+
+    def __init__(self, endpoint, wait=0, current=None):
+        self.endpoint = endpoint
+        self.wait = wait
+        self.current = current
+
+
+class RateBudget:
+    """
+    X rate limits shared by every bot and invocation using the same credentials.
+    One blob per app key and access token pair, with a token bucket per endpoint and limit window:
+        {'version', 'buckets': {"{endpoint}|{window}": {'limit', 'remaining', 'reset', 'window'}}}
+    Buckets are learnt from X's x-rate-limit-*, x-user-limit-24hour-* and x-app-limit-24hour-*
+    response headers and refill when their window resets. App-wide limits are tracked in each
+    of the app's blobs, which re-learn the app's remaining calls from every response.
+    acquire() reads the budget before the call (normally a 304 from the worker's ETag cache);
+    when a bucket is empty it defers the call with the seconds until it refills, so the caller
+    does not draw a 429. observe() then takes the call's token and records the headers X
+    reported in a single conditional write. Storage failures never block a call: the budget
+    then stands aside and X's own limits apply.
+    """
+
+    def __init__(self, state_store, config, clock=time.time):
+        self.state_store = state_store
+        self.blob_name = budget_blob_name(config)
+        self.clock = clock
+
+    @staticmethod
+    def _default():
+        return {'version': BUDGET_VERSION, 'buckets': {}}
+
+    @staticmethod
+    def _buckets(budget, endpoint):
+        keys = (f"{endpoint}|{name}" for name, _ in WINDOWS.values())
+        return [budget['buckets'][key] for key in keys if key in budget['buckets']]
+
+    def _token(self, endpoint, current, now):
+        """The token for a call, given the budget as read"""
+        budget, etag = current
+        budget = budget or self._default()
+        buckets = self._buckets(budget, endpoint)
+        for bucket in buckets:
+            _refill(bucket, now)
+        wait = max((bucket['reset'] - now for bucket in buckets if bucket['remaining'] < 1), default=0)
+        if wait:
+            instrumentation.count('rate_budget_deferred')
+            logging.warning(f"Rate limit budget for {endpoint} exhausted; next call allowed in {wait:.0f}s")
+            return BudgetToken(endpoint, wait)
+        return BudgetToken(endpoint, current=(budget, etag))
+
+    @staticmethod
+    def _unchecked(endpoint, error):
+        logging.warning(f"Rate limit budget unavailable, not checked: {error}")
+        return BudgetToken(endpoint)
+
+    def _settle(self, endpoint, windows, now):
+        """mutate() for observe: takes the call's token, then records what X reported"""
+        def mutate(budget):
+            buckets = budget['buckets']
+            changed = False
+            for bucket in self._buckets(budget, endpoint):
+                _refill(bucket, now)
+                bucket['remaining'] = max(bucket['remaining'] - 1, 0)
+                changed = True
+            for name, seconds, limit, remaining, reset in windows:
+                key = f"{endpoint}|{name}"
+                previous = buckets.get(key)
+                if previous and previous['reset'] == reset:
+                    # Same window: tokens taken by calls X has not answered yet stay taken
+                    remaining = min(remaining, previous['remaining'])
+                bucket = {'limit': limit, 'remaining': remaining, 'reset': reset, 'window': seconds}
+                if bucket != previous:
+                    buckets[key] = bucket
+                    changed = True
+            # Forget buckets no call has refreshed for a whole window
+            for key in [key for key, bucket in buckets.items() if bucket['reset'] + bucket['window'] < now]:
+                del buckets[key]
+                changed = True
+            return changed
+        return mutate
+
+    def acquire(self, endpoint):
+        """A token for one call; its wait is 0 if the call may go ahead, else the seconds to wait"""
+        try:
+            with instrumentation.phase('rate_budget'):
+                current = self.state_store.read_with_etag(self.blob_name)
+        except Exception as e:
+            return self._unchecked(endpoint, e)
+        return self._token(endpoint, current, self.clock())
+
+    def observe(self, token, headers):
+        """Settle the token of a call that was made, with its response's rate-limit headers (ok or not)"""
+        if token.wait:
+            return
+        mutate = self._settle(token.endpoint, observed_windows(headers or {}), self.clock())
+        try:
+            with instrumentation.phase('rate_budget'):
+                self.state_store.update(self.blob_name, mutate, self._default, current=token.current)
+        except Exception as e:
+            logging.warning(f"Failed to record rate limits for {token.endpoint}: {e}")
+
+
+class AsyncRateBudget(RateBudget):
+    """RateBudget over an AsyncBlobStateStore"""
+
+    async def acquire(self, endpoint):
+        try:
+            with instrumentation.phase('rate_budget'):
+                current = await self.state_store.read_with_etag(self.blob_name)
+        except Exception as e:
+            return self._unchecked(endpoint, e)
+        return self._token(endpoint, current, self.clock())
+
+    async def observe(self, token, headers):
+        if token.wait:
+            return
+        mutate = self._settle(token.endpoint, observed_windows(headers or {}), self.clock())
+        try:
+            with instrumentation.phase('rate_budget'):
+                await self.state_store.update(self.blob_name, mutate, self._default, current=token.current)
+        except Exception as e:
+            logging.warning(f"Failed to record rate limits for {token.endpoint}: {e}")
@@ -0,0 +1,235 @@
+import asyncio
+import importlib
+import json
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from zoneinfo import ZoneInfo
+from bot_engines.client_pool import TWITTER_CREDENTIAL_KEYS
+from bot_engines.instrumentation import instrumented_run
+from bot_engines.schedule import DailySchedule, IntervalSchedule
+
+# Engine name -> "module:Class", imported on first use
+ENGINES = {
+    'sequential': 'bot_engines.sequential_content_bot:SequentialContentBot',
+    'constant_phrase': 'bot_engines.constant_phrase_bot:ConstantPhraseBot',
+    'mention_reply': 'bot_engines.mention_reply_bot:MentionReplyBot',
+}
+ASYNC_ENGINES = {
+    'sequential': 'bot_engines.async_sequential_content_bot:AsyncSequentialContentBot',
+    'constant_phrase': 'bot_engines.async_constant_phrase_bot:AsyncConstantPhraseBot',
+}
+
+# Value deploy_infra.ps1 gives credential settings until the real ones are entered
+PLACEHOLDER_SETTING = 'PLACEHOLDER'
+
+# Config values of these types are converted from their JSON representation
+_INT_KEYS = {'target_hour'}
+_TIMEZONE_KEYS = {'timezone'}
+
+
+def _engine_class(engine, asynchronous=False):
+    module_name, class_name = (ASYNC_ENGINES if asynchronous else ENGINES)[engine].split(':')
+    return getattr(importlib.import_module(module_name), class_name)
+
+
+class BotSpec:
+    """
+    One bot declared in the registry file.
+    {
+        'name': str,
+        'engine': str,  # Key of ENGINES
+        'credentials_prefix': str,  # {prefix}_CONSUMER_KEY, {prefix}_ACCESS_TOKEN, ...
+        'enabled': bool,  # Optional, false to keep the bot from running (default true)
+        'schedule': {'every_hours': int, 'offset_hours': int}
+                    or {'daily_hour'/'daily_hour_env': ..., 'timezone': str, 'retry_hours': int}
+                    (omitted for bots run by their engine's own trigger, e.g. mention_reply),
+        'config': dict  # Engine config; see the engine docstrings. Keys ending in '_env' are
+                        # read from that environment variable, '*_path' is relative to the app
+                        # and 'description_template_env' lists %-arguments for description_template.
+    }
+    """
+
+    def __init__(self, spec, base_dir):
+        self.spec = spec
+        self.base_dir = base_dir
+        self.name = spec['name']
+        self.engine = spec['engine']
+        if self.engine not in ENGINES:
+            raise ValueError(f"Bot '{self.name}': unknown engine '{self.engine}'")
+        if 'credentials_prefix' not in spec:
+            raise ValueError(f"Bot '{self.name}': missing 'credentials_prefix'")
+        self._schedule = None
+        self.enabled = spec.get('enabled', True)
+
+    def missing_credentials(self):
+        """Names of the credential settings that are unset, empty or still the deployment placeholder"""
+        prefix = self.spec['credentials_prefix']
+        return [name for name in (f'{prefix}_{key.upper()}' for key in TWITTER_CREDENTIAL_KEYS)
+                if os.environ.get(name, '').strip() in ('', PLACEHOLDER_SETTING)]
+
+    @property
+    def schedule(self):
+        """The dispatcher schedule, or None for bots without one"""
+        if self._schedule is None and 'schedule' in self.spec:
+            schedule = self.spec['schedule']
+            if 'every_hours' in schedule:
+                self._schedule = IntervalSchedule(schedule['every_hours'], schedule.get('offset_hours', 0))
+            else:
+                hour = schedule['daily_hour'] if 'daily_hour' in schedule else os.environ[schedule['daily_hour_env']]
+                self._schedule = DailySchedule(
+                    ZoneInfo(schedule['timezone']), int(hour), retry_hours=schedule.get('retry_hours', 0)
+                )
+        return self._schedule
+
+    def build_config(self):
+        """Resolve the engine config from the registry entry and environment variables"""
+        prefix = self.spec['credentials_prefix']
+        config = {
+            'consumer_key': os.environ[f'{prefix}_CONSUMER_KEY'],
+            'consumer_secret': os.environ[f'{prefix}_CONSUMER_SECRET'],
+            'access_token': os.environ[f'{prefix}_ACCESS_TOKEN'],
+            'access_token_secret': os.environ[f'{prefix}_ACCESS_TOKEN_SECRET'],
+            'blob_connection_string': os.environ['BLOB_CONNECTION_STRING'],
+        }
+
+        raw = self.spec.get('config', {})
+        config.update(self._resolve_config(raw, environ=True))
+
+        # Daily bots drain failed posts in the schedule's follow-up slots
+        if 'retry_hours' in self.spec.get('schedule', {}):
+            config['retry_hours'] = self.spec['schedule']['retry_hours']
+
+        # Sequential bots project their posting calendar from it
+        if self.schedule is not None:
+            config['schedule'] = self.schedule
+
+        if 'description_template_env' in raw:
+            args = tuple(os.environ[name] for name in raw['description_template_env'])
+            config['description_template'] = config['description_template'] % args
+        return config
+
+    def _resolve_config(self, raw, environ):
+        config = {}
+        for key, value in raw.items():
+            if key == 'description_template_env':
+                continue
+            if key.endswith('_env'):
+                if not environ:
+                    continue
+                key, value = key[:-len('_env')], os.environ[value]
+            if key.endswith('_path'):
+                value = os.path.join(self.base_dir, value)
+            if key in _INT_KEYS:
+                value = int(value)
+            if key in _TIMEZONE_KEYS:
+                value = ZoneInfo(value)
+            config[key] = value
+        return config
+
+    def content_config(self):
+        """
+        The engine config without credentials or environment values: enough to render
+        content offline (build tools), not to run the bot
+        """
+        return self._resolve_config(self.spec.get('config', {}), environ=False)
+
+    def create_bot(self, asynchronous=False):
+        return _engine_class(self.engine, asynchronous)(self.build_config())
+
+
+class BotRegistry:
+    """
+    The bots declared in the registry file. A malformed entry is logged and skipped, and an
+    unreadable file leaves the registry empty, so the app's triggers still load.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.bots = {}
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entries = json.load(f)['bots']
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logging.error(f"Bot registry '{path}' could not be loaded, no bots registered: {e}")
+            return
+        base_dir = os.path.dirname(os.path.abspath(path))
+        for entry in entries:
+            try:
+                spec = BotSpec(entry, base_dir)
+            except (KeyError, TypeError, ValueError) as e:
+                logging.error(f"Bot registry: skipped invalid entry {entry!r}: {e}")
+                continue
+            self.bots[spec.name] = spec
+
+    def get(self, name):
+        return self.bots.get(name)
+
+    def names(self, engine=None):
+        return [name for name, spec in self.bots.items() if engine is None or spec.engine == engine]
+
+    def runnable(self, engine):
+        """Enabled bots of an engine whose credentials are configured; the others are logged and skipped"""
+        specs = []
+        for name in self.names(engine):
+            spec = self.bots[name]
+            if not spec.enabled:
+                continue
+            missing = spec.missing_credentials()
+            if missing:
+                logging.warning(f"Bot '{name}': skipped, missing settings {', '.join(missing)}")
+                continue
+            specs.append(spec)
+        return specs
+
+    def due(self, now=None):
+        """Bots whose schedule fires now. A bot with a broken schedule is logged and skipped."""
+        now = now or datetime.now(timezone.utc)
+        due = []
+        for spec in self.bots.values():
+            try:
+                if not spec.enabled or spec.schedule is None:
+                    continue
+                if spec.schedule.is_due(now) or spec.schedule.is_retry_due(now):
+                    due.append(spec)
+            except Exception as e:
+                logging.error(f"Bot '{spec.name}': invalid schedule: {e}")
+        return due
+
+
+def _run_one(spec):
+    try:
+        logging.info(f"Running bot '{spec.name}'")
+        with instrumented_run(spec.name, spec.engine):
+            result = spec.create_bot().run()
+        return {'bot': spec.name, 'ok': True, 'result': result}
+    except Exception as e:
+        logging.exception(f"Bot '{spec.name}' failed: {e}")
+        return {'bot': spec.name, 'ok': False, 'error': str(e)}
+
+
+def run_bots(specs, max_workers=4):
+    """Run bots concurrently on a bounded thread pool; one failure never affects the others"""
+    if not specs:
+        return []
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(specs)), thread_name_prefix='bot') as pool:
+        return list(pool.map(_run_one, specs))
+
+
+async def _run_one_async(spec, semaphore):
+    async with semaphore:
+        try:
+            logging.info(f"Running bot '{spec.name}' (async)")
+            with instrumented_run(spec.name, spec.engine):
+                result = await spec.create_bot(asynchronous=True).run()
+            return {'bot': spec.name, 'ok': True, 'result': result}
+        except Exception as e:
+            logging.exception(f"Bot '{spec.name}' failed: {e}")
+            return {'bot': spec.name, 'ok': False, 'error': str(e)}
+
+
+async def run_bots_async(specs, max_concurrency=16):
+    """Run bots concurrently on the current event loop, bounded by a semaphore"""
+    semaphore = asyncio.Semaphore(max_concurrency)
+    return list(await asyncio.gather(*(_run_one_async(spec, semaphore) for spec in specs)))
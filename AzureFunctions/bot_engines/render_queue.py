@@ -0,0 +1,62 @@
+import hashlib
+import json
+import os
+
+
+def content_fingerprint(config):
+    """
+    Identifies everything a rendered tweet depends on: the templates, label format and the
+    content files (by size and mtime). A queue built under another fingerprint is stale.
+    """
+    parts = [config.get(key) for key in ('template', 'description_template', 'minor_label_format', 'minor_label_style')]
+    for key in ('content_pack_path', 'content_file_path', 'custom_numbers_path'):
+        path = config.get(key)
+        if path and os.path.exists(path):
+            st = os.stat(path)
+            parts.append(f"{key}:{st.st_size}:{st.st_mtime_ns}")
+    return hashlib.sha1(json.dumps(parts, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+
+class RenderQueue:
+    """
+    Pre-rendered upcoming posts for a sequential bot, starting at global position `start`.
+    {
+        'fingerprint': str,
+        'total': int,  # Items in the corpus, for wrap-around
+        'start': int,
+        'items': [{'text': str, 'description': str (only when it changes)}, ...]
+    }
+    """
+
+    def __init__(self, data):
+        self.data = data
+
+    @classmethod
+    def build(cls, render_item, index, start, count, fingerprint):
+        """render_item(position) -> SequentialContentBot.render_item() dict"""
+        items = []
+        for offset in range(min(count, index.total)):
+            rendered = render_item(index.advance(start, offset))
+            item = {'text': rendered['tweet_text']}
+            if rendered['description']:
+                item['description'] = rendered['description']
+            items.append(item)
+        return cls({'fingerprint': fingerprint, 'total': index.total, 'start': start, 'items': items})
+
+    def item_for(self, position, fingerprint, total):
+        """
+        The rendered item for a position as {'position', 'tweet_text', 'description'},
+        or None if the queue is stale or does not cover it.
+        """
+        if self.data.get('fingerprint') != fingerprint or self.data.get('total') != total:
+            return None
+        offset = (position - self.data['start']) % total
+        if offset >= len(self.data['items']):
+            return None
+        item = self.data['items'][offset]
+        return {'position': position, 'tweet_text': item['text'], 'description': item.get('description')}
+
+    def remaining(self, position):
+        """Items left in the queue from position onwards"""
+        offset = (position - self.data['start']) % self.data['total']
+        return max(0, len(self.data['items']) - offset)
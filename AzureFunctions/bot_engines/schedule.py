@@ -0,0 +1,192 @@
+from bisect import bisect_left
+from datetime import date, datetime, time, timedelta, timezone
+from functools import lru_cache
+
+
+@lru_cache(maxsize=1024)
+def _fire_instant_utc(tz, target_hour, local_date):
+    # Wall-clock times skipped by a DST jump resolve to the hour after the gap
+    local = datetime.combine(local_date, time(hour=target_hour), tzinfo=tz)
+    return local.astimezone(timezone.utc)
+
+
+class DailySchedule:
+    """
+    Exact UTC fire instants for a daily post at target_hour:00 local time.
+    Instants are computed per local date through the ZoneInfo rules, so DST
+    transitions are handled without rounding.
+    """
+
+    def __init__(self, tz, target_hour, tolerance=timedelta(minutes=30), retry_hours=0):
+        self.tz = tz
+        self.target_hour = target_hour
+        self.tolerance = tolerance
+        # Hourly follow-up slots after the fire instant, used to drain a failed post
+        self.retry_hours = retry_hours
+
+    def fire_instant(self, local_date):
+        """UTC instant of the post for a local calendar date"""
+        return _fire_instant_utc(self.tz, self.target_hour, local_date)
+
+    def due_instant(self, now=None):
+        """The fire instant within tolerance of now, or None"""
+        now = now or datetime.now(timezone.utc)
+        local_today = now.astimezone(self.tz).date()
+        for offset in (0, -1, 1):
+            instant = self.fire_instant(local_today + timedelta(days=offset))
+            if abs(now - instant) <= self.tolerance:
+                return instant
+        return None
+
+    def is_due(self, now=None):
+        return self.due_instant(now) is not None
+
+    def retry_instant(self, now=None):
+        """The follow-up slot (fire instant + 1..retry_hours hours) within tolerance of now, or None"""
+        if not self.retry_hours:
+            return None
+        now = now or datetime.now(timezone.utc)
+        local_today = now.astimezone(self.tz).date()
+        for offset in (0, -1):
+            instant = self.fire_instant(local_today + timedelta(days=offset))
+            for hours in range(1, self.retry_hours + 1):
+                slot = instant + timedelta(hours=hours)
+                if abs(now - slot) <= self.tolerance:
+                    return slot
+        return None
+
+    def is_retry_due(self, now=None):
+        return self.retry_instant(now) is not None
+
+    def retry_deadline(self, instant):
+        """Last moment a post for the fire instant may still go out"""
+        return instant + timedelta(hours=self.retry_hours) + self.tolerance
+
+    def next_fire(self, now=None):
+        """Next fire instant strictly after now"""
+        now = now or datetime.now(timezone.utc)
+        local_day = now.astimezone(self.tz).date() - timedelta(days=1)
+        while True:
+            instant = self.fire_instant(local_day)
+            if instant > now:
+                return instant
+            local_day += timedelta(days=1)
+
+    def nth_fire(self, n, now=None):
+        """The n-th fire instant after now (0 is next_fire), without stepping through the ones before"""
+        return next(self.fires(n, 1, now))
+
+    def fires(self, start=0, count=None, now=None):
+        """Fire instants start, start + 1, ... after now (count of them, or endless)"""
+        first_date = self.next_fire(now).astimezone(self.tz).date()
+        n = start
+        while count is None or n < start + count:
+            yield self.fire_instant(first_date + timedelta(days=n))
+            n += 1
+
+    def fire_index(self, instant, now=None):
+        """Number of fire instants after now and before instant (the n of the first one at or after it)"""
+        first = self.next_fire(now)
+        if instant <= first:
+            return 0
+        local_date = instant.astimezone(self.tz).date()
+        n = (local_date - first.astimezone(self.tz).date()).days
+        return n + (1 if self.fire_instant(local_date) < instant else 0)
+
+    def utc_hours(self, year=None):
+        """Every UTC hour the target maps to over a year (e.g. {20, 21} for 23:00 in Israel)"""
+        year = year or datetime.now(timezone.utc).year
+        day = date(year, 1, 1)
+        hours = set()
+        while day.year == year:
+            hours.add(self.fire_instant(day).hour)
+            day += timedelta(days=1)
+        return hours
+
+    def cron_expression(self, year=None):
+        """NCRONTAB (UTC) that fires on every candidate hour; is_due picks the exact one"""
+        return "0 0 %s * * *" % ",".join(str(h) for h in sorted(self.utc_hours(year)))
+
+
+class IntervalSchedule:
+    """
+    Every N hours on the UTC clock, at hours where hour % every_hours == offset_hours.
+    Requires 1 <= every_hours <= 24 and 0 <= offset_hours < every_hours, so every day
+    has at least one fire hour.
+    """
+
+    def __init__(self, every_hours, offset_hours=0, tolerance=timedelta(minutes=30)):
+        for name, value in (('every_hours', every_hours), ('offset_hours', offset_hours)):
+            if not isinstance(value, int) or isinstance(value, bool):
+                raise ValueError(f"{name} must be a whole number of hours, got {value!r}")
+        if not 1 <= every_hours <= 24:
+            raise ValueError(f"every_hours must be between 1 and 24, got {every_hours}")
+        if not 0 <= offset_hours < every_hours:
+            raise ValueError(f"offset_hours must be between 0 and {every_hours - 1}, got {offset_hours}")
+        self.every_hours = every_hours
+        self.offset_hours = offset_hours
+        self.tolerance = tolerance
+
+    def _slot(self, now):
+        """Nearest whole UTC hour to now"""
+        return (now.astimezone(timezone.utc) + timedelta(minutes=30)).replace(minute=0, second=0, microsecond=0)
+
+    def due_instant(self, now=None):
+        now = now or datetime.now(timezone.utc)
+        slot = self._slot(now)
+        if slot.hour % self.every_hours == self.offset_hours and abs(now - slot) <= self.tolerance:
+            return slot
+        return None
+
+    def is_due(self, now=None):
+        return self.due_instant(now) is not None
+
+    def is_retry_due(self, now=None):
+        # The next slot is never far away; sequential bots drain their outbox then
+        return False
+
+    def next_fire(self, now=None):
+        now = now or datetime.now(timezone.utc)
+        instant = now.astimezone(timezone.utc).replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
+        # A valid schedule fires at least once in any 24 hours
+        for _ in range(24):
+            if instant.hour % self.every_hours == self.offset_hours:
+                return instant
+            instant += timedelta(hours=1)
+        raise ValueError(f"Schedule every {self.every_hours}h at offset {self.offset_hours}h never fires")
+
+    def _day_hours(self):
+        return [hour for hour in range(24) if hour % self.every_hours == self.offset_hours]
+
+    def nth_fire(self, n, now=None):
+        """The n-th fire instant after now (0 is next_fire), without stepping through the ones before"""
+        return next(self.fires(n, 1, now))
+
+    def fires(self, start=0, count=None, now=None):
+        """Fire instants start, start + 1, ... after now (count of them, or endless)"""
+        first = self.next_fire(now)
+        hours = [timedelta(hours=hour) for hour in self._day_hours()]
+        day, slot = divmod(hours.index(timedelta(hours=first.hour)) + start, len(hours))
+        midnight = first.replace(hour=0) + timedelta(days=day)
+        n = 0
+        while count is None or n < count:
+            yield midnight + hours[slot]
+            n += 1
+            slot += 1
+            if slot == len(hours):
+                midnight += timedelta(days=1)
+                slot = 0
+
+    def fire_index(self, instant, now=None):
+        """Number of fire instants after now and before instant (the n of the first one at or after it)"""
+        first = self.next_fire(now)
+        if instant <= first:
+            return 0
+        hours = self._day_hours()
+        midnight = first.replace(hour=0)
+        days, rest = divmod(instant - midnight, timedelta(days=1))
+        earlier_today = bisect_left(hours, rest / timedelta(hours=1))
+        return days * len(hours) + earlier_today - hours.index(first.hour)
+
+    def cron_expression(self):
+        return "0 0 %d-23/%d * * *" % (self.offset_hours, self.every_hours)
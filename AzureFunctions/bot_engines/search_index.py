@@ -0,0 +1,228 @@
+import math
+import mmap
+import re
+import struct
+import unicodedata
+from bot_engines.content_cache import load_cached
+
+# =============================================================================
+# Search index format (all integers little-endian)
+#
+#   header:        magic b"SQSI", version u16, min_prefix u16, item_count u32,
+#                  word_count u32, prefix_count u32, keys_size u32
+#   word table:    (word_count + 1)   x (key_off u32, postings_off u32)
+#   prefix table:  (prefix_count + 1) x (key_off u32, postings_off u32)
+#   keys:          UTF-8 normalised keys; each table is sorted by key bytes
+#   postings:      per key, ascending item positions as LEB128 varint deltas
+#
+# A key and its postings end where the next entry's begin; the extra entry at the
+# end of each table marks the end of its last key.
+# Positions are the global item positions of the content pack built alongside.
+# The word table maps whole normalised words; the prefix table maps every prefix
+# of at least min_prefix characters (the whole word included), of each word and of
+# the word without up to two attached prefix letters (ו, ה, ב, כ, ל, מ, ש), so that
+# "ארץ" also finds "הארץ" and "בארץ".
+# =============================================================================
+
+INDEX_MAGIC = b"SQSI"
+INDEX_VERSION = 1
+MIN_PREFIX = 2
+
+_HEADER = struct.Struct('<4sHHIIII')
+_ENTRY = struct.Struct('<II')
+
+# Niqqud, cantillation and other combining marks (after NFD) are dropped;
+# final letter forms are folded so prefixes match inside longer words
+_STRIP_MARKS = {
+    cp: None for low, high in ((0x0300, 0x036F), (0x0591, 0x05C7))
+    for cp in range(low, high + 1) if unicodedata.category(chr(cp)) == 'Mn'
+}
+_FOLD_FINALS = str.maketrans('ךםןףץ', 'כמנפצ')
+# The corpora split the divine name with maqafs (י־הו־ה); index it as one word
+_DIVINE_NAME = re.compile('י[־-]?הו[־-]?ה')
+_WORD = re.compile(r'[^\W_]+')
+_PREFIX_LETTERS = 'והבכלמש'
+
+
+def tokenize(text):
+    """Normalised words of a text: no niqqud or cantillation, final forms folded, casefolded"""
+    text = unicodedata.normalize('NFD', text).translate(_STRIP_MARKS)
+    text = _DIVINE_NAME.sub('יהוה', text).translate(_FOLD_FINALS).casefold()
+    return _WORD.findall(text)
+
+
+def _stems(word, min_length):
+    """The word and the word without one or two attached prefix letters"""
+    yield word
+    for i in range(2):
+        if word[i] not in _PREFIX_LETTERS or len(word) - i - 1 < min_length:
+            break
+        yield word[i + 1:]
+
+
+def _encode_postings(positions, out):
+    previous = 0
+    for position in positions:
+        delta = position - previous
+        previous = position
+        while delta >= 0x80:
+            out.append((delta & 0x7F) | 0x80)
+            delta >>= 7
+        out.append(delta)
+
+
+class SearchIndex:
+    """Read-only, memory-mapped view over a search index file"""
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, min_prefix, item_count, word_count, prefix_count, keys_size = \
+            _HEADER.unpack_from(self._mm, 0)
+        if magic != INDEX_MAGIC or version != INDEX_VERSION:
+            raise ValueError(f"Not a supported search index: {path}")
+
+        self.min_prefix = min_prefix
+        self.item_count = item_count
+        self._words = (_HEADER.size, word_count)
+        self._prefixes = (_HEADER.size + (word_count + 1) * _ENTRY.size, prefix_count)
+        self._keys_off = _HEADER.size + (word_count + prefix_count + 2) * _ENTRY.size
+        self._postings_off = self._keys_off + keys_size
+
+    def _find(self, table, key):
+        """(postings_start, postings_end) for key in a table, or None (binary search over sorted keys)"""
+        table_off, count = table
+        wanted = key.encode('utf-8')
+        low, high = 0, count
+        while low < high:
+            middle = (low + high) // 2
+            entry_off = table_off + middle * _ENTRY.size
+            key_off, postings_off = _ENTRY.unpack_from(self._mm, entry_off)
+            key_end, postings_end = _ENTRY.unpack_from(self._mm, entry_off + _ENTRY.size)
+            current = self._mm[self._keys_off + key_off:self._keys_off + key_end]
+            if current == wanted:
+                return self._postings_off + postings_off, self._postings_off + postings_end
+            if current < wanted:
+                low = middle + 1
+            else:
+                high = middle
+        return None
+
+    def _postings(self, found):
+        if found is None:
+            return []
+        offset, end = found
+        mm = self._mm
+        positions = []
+        position = 0
+        while offset < end:
+            delta, shift = 0, 0
+            while True:
+                byte = mm[offset]
+                offset += 1
+                delta |= (byte & 0x7F) << shift
+                if byte < 0x80:
+                    break
+                shift += 7
+            position += delta
+            positions.append(position)
+        return positions
+
+    def word(self, word):
+        """Positions of items containing the normalised word"""
+        return self._postings(self._find(self._words, word))
+
+    def prefix(self, prefix):
+        """Positions of items with a word starting with the normalised prefix"""
+        if len(prefix) < self.min_prefix:
+            return []
+        return self._postings(self._find(self._prefixes, prefix))
+
+    def search(self, query, limit=10, text=None):
+        """
+        Ranked matches for a query: [(position, score), ...], best first.
+        Every query word must match a word in the item, whole or as a prefix. Words are
+        weighted by rarity, whole words count double, and when text(position) is given
+        items containing the query as a phrase rank first.
+        """
+        words = tokenize(query)
+        if not words:
+            return []
+
+        scores = None
+        for word in words:
+            whole = set(self.word(word))
+            matches = set(self.prefix(word)) | whole
+            if not matches:
+                return []
+            idf = math.log(1 + self.item_count / len(matches))
+            word_scores = {position: idf * (2 if position in whole else 1) for position in matches}
+            if scores is None:
+                scores = word_scores
+            else:
+                scores = {position: score + word_scores[position]
+                          for position, score in scores.items() if position in word_scores}
+            if not scores:
+                return []
+
+        ranked = sorted(scores.items(), key=lambda entry: (-entry[1], entry[0]))
+        if text is not None and len(words) > 1:
+            # Phrase check on the best candidates only; it needs the item text
+            candidates = ranked[:max(limit * 10, 100)]
+            boosted = [(position, score + (len(words) if contains_phrase(tokenize(text(position)), words) else 0))
+                       for position, score in candidates]
+            ranked = sorted(boosted, key=lambda entry: (-entry[1], entry[0])) + ranked[len(candidates):]
+        return [(position, round(score, 3)) for position, score in ranked[:limit]]
+
+
+def contains_phrase(item_words, query_words):
+    """True if query_words appear consecutively in item_words (the last one may be a prefix)"""
+    n = len(query_words)
+    for i in range(len(item_words) - n + 1):
+        if item_words[i:i + n - 1] == query_words[:-1] and item_words[i + n - 1].startswith(query_words[-1]):
+            return True
+    return False
+
+
+def open_index(path):
+    """Open a search index, sharing the mapping across requests in this worker"""
+    return load_cached(path, SearchIndex)
+
+
+# =============================================================================
+# Writing
+# =============================================================================
+
+def write_index(path, texts, min_prefix=MIN_PREFIX):
+    """Write a search index for the item texts, given in global position order"""
+    words, prefixes = {}, {}
+    for position, text in enumerate(texts):
+        for word in set(tokenize(text)):
+            words.setdefault(word, []).append(position)
+            for stem in _stems(word, min_prefix):
+                for length in range(min_prefix, len(stem) + 1):
+                    postings = prefixes.setdefault(stem[:length], [])
+                    if not postings or postings[-1] != position:
+                        postings.append(position)
+
+    keys = bytearray()
+    postings_blob = bytearray()
+    tables = []
+    for mapping in (words, prefixes):
+        entries = []
+        for key in sorted(mapping, key=lambda k: k.encode('utf-8')):
+            entries.append((len(keys), len(postings_blob)))
+            keys.extend(key.encode('utf-8'))
+            _encode_postings(mapping[key], postings_blob)
+        entries.append((len(keys), len(postings_blob)))
+        tables.append(entries)
+
+    with open(path, 'wb') as f:
+        f.write(_HEADER.pack(INDEX_MAGIC, INDEX_VERSION, min_prefix, len(texts), len(words), len(prefixes),
+                             len(keys)))
+        for entries in tables:
+            for entry in entries:
+                f.write(_ENTRY.pack(*entry))
+        f.write(keys)
+        f.write(postings_blob)
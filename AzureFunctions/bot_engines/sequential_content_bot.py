@@ -1,10 +1,48 @@
-from logging import config
-import tweepy
-import json
+import hashlib
 import logging
-from azure.storage.blob import BlobServiceClient
+from datetime import datetime, timezone
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+from bot_engines import instrumentation
+from bot_engines.content_cache import load_json_cached
+from bot_engines.content_pack import open_content
+from bot_engines.search_index import open_index
+from bot_engines.hebrew_numerals import gematria, PLAIN
+from bot_engines.blob_state import BlobStateStore
+from bot_engines.client_pool import get_twitter_client, get_twitter_api_v1, get_blob_service_client
+from bot_engines.posting import TweetPoster, Outbox, DUPLICATE, PERMANENT, response_headers, last_response_headers
+from bot_engines.post_journal import PostJournal, TimelineVerifier
+from bot_engines.posting_calendar import PostingCalendar
+from bot_engines.rate_budget import RateBudget, UPDATE_PROFILE
+from bot_engines.render_queue import RenderQueue, content_fingerprint
+from bot_engines.tweet_length import split_tweet
+
+
+# Most posts in one calendar response; longer ranges are paged with 'start'
+MAX_CALENDAR_PAGE = 500
+
+# Most results the search action returns
+MAX_SEARCH_RESULTS = 50
+
+# Runs in a row X may reject an item itself (400, 404, a 403 about its content) before the bot
+# skips it. Refused credentials or access (401, other 403s) stall the bot without counting.
+MAX_PERMANENT_FAILURES = 3
+
+
+def description_hash(description):
+    return hashlib.sha256(description.encode('utf-8')).hexdigest()
+
+
+def parse_time(value, tz=timezone.utc):
+    """ISO date or datetime; without an offset it is taken in tz"""
+    parsed = datetime.fromisoformat(value)
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=tz)
+
 
 class SequentialContentBot:
+    # The async variant swaps in its storage classes
+    state_store_class = BlobStateStore
+    budget_class = RateBudget
+
     def __init__(self, config):
         """
         config: {
@@ -14,129 +52,632 @@ class SequentialContentBot:
             'access_token_secret': str,
             'blob_connection_string': str,
             'state_blob_name': str,
-            'content_file_path': str,
-            'minor_list_key': str, # JSON key for the list of items within a major unit
-            'text_key': str, # JSON key for the text content to post
-            'major_label_key': str, # JSON key for major unit label
+            'content_pack_path': str, # Preferred, path to a memory-mapped content pack
+            'content_file_path': str, # Legacy JSON corpus, used when no content pack is configured
+            'search_index_path': str, # Optional, search index built with the content pack (HTTP search / seek by query)
+            'minor_list_key': str, # JSON key for the list of items within a major unit (JSON corpus only)
+            'text_key': str, # JSON key for the text content to post (JSON corpus only)
+            'major_label_key': str, # JSON key for major unit label (JSON corpus only)
             'minor_label_key': str, # JSON key for minor unit label (or None to use custom numbering)
             'template': str,
             'description_template': str,
-            'custom_numbers_path': str # Optional, path to custom numbering file
+            'custom_numbers_path': str, # Optional, path to custom numbering file
+            'minor_label_format': str, # Optional, 'gematria' to number unlabelled items in Hebrew numerals (default digits)
+            'minor_label_style': str, # Optional, gematria punctuation: 'plain', 'ascii' or 'hebrew' (default 'plain')
+            'post_time_budget_seconds': int, # Optional, time allowed for posting retries (default 60)
+            'outbox_max_entries': int, # Optional, max tweets kept for the next run after failures (default 12)
+            'max_permanent_failures': int, # Optional, permanent post failures of an item before it is skipped (default 3)
+            'render_queue_size': int, # Optional, number of upcoming tweets to pre-render into {state}_queue.json
+            'schedule': IntervalSchedule # Set by the registry from the bot's schedule; needed for the posting calendar
         }
         """
         self.config = config
-        self.client = tweepy.Client(
-            consumer_key=config['consumer_key'],
-            consumer_secret=config['consumer_secret'],
-            access_token=config['access_token'],
-            access_token_secret=config['access_token_secret']
-        )
-        auth = tweepy.OAuth1UserHandler(
-            config['consumer_key'],
-            config['consumer_secret'],
-            config['access_token'],
-            config['access_token_secret']
-        )
-        self.api_v1 = tweepy.API(auth)
-
-        self.blob_service_client = BlobServiceClient.from_connection_string(config['blob_connection_string'])
+        # Clients are pooled per worker and reused across invocations
+        self.blob_service_client = self.make_blob_service_client()
         self.container_name = "bot-state"
         self.blob_name = config['state_blob_name']
+        self.state_store = self.state_store_class(self.blob_service_client, self.container_name)
+        self.queue_blob_name = self.blob_name.rsplit('.json', 1)[0] + '_queue.json'
+        # One per run, shared by the posts and the profile update
+        self.budget = self.budget_class(self.state_store, config)
+
+    def make_blob_service_client(self):
+        return get_blob_service_client(self.config['blob_connection_string'])
+
+    @property
+    def client(self):
+        # Created on first use, so cursor management requests never load tweepy
+        return get_twitter_client(self.config)
+
+    @property
+    def api_v1(self):
+        # Only needed when the profile description changes
+        return get_twitter_api_v1(self.config)
 
     def load_json(self, path):
-        with open(path, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        # Served from the worker-wide cache; reparsed only when the file changes
+        return load_json_cached(path)
 
     def get_state(self):
         try:
-            container_client = self.blob_service_client.get_container_client(self.container_name)
-            if not container_client.exists():
-                logging.info(f"Container '{self.container_name}' does not exist, creating it")
-                container_client.create_container()
-
-            blob_client = container_client.get_blob_client(self.blob_name)
-            if blob_client.exists():
-                data = blob_client.download_blob().readall()
-                state = json.loads(data)
-                logging.info(f"Loaded state from blob '{self.blob_name}': major={state['major']}, minor={state['minor']}")
-                return state
-            else:
-                logging.info(f"Blob '{self.blob_name}' does not exist")
+            # Single conditional GET; a missing blob (or container) means no state yet
+            with instrumentation.phase('state_read'):
+                return self.loaded_state(self.state_store.read(self.blob_name))
         except Exception as e:
             logging.warning(f"Error loading state: {e}")
         return None
 
+    def loaded_state(self, state):
+        if state is not None:
+            logging.info(f"Loaded state from blob '{self.blob_name}': {state}")
+        else:
+            logging.info(f"Blob '{self.blob_name}' does not exist")
+        return state
+
     def save_state(self, state):
         try:
-            blob_client = self.blob_service_client.get_blob_client(container=self.container_name, blob=self.blob_name)
-            blob_client.upload_blob(json.dumps(state), overwrite=True)
-            logging.info(f"Saved state to blob '{self.blob_name}': major={state['major']}, minor={state['minor']}")
+            with instrumentation.phase('state_write'):
+                self.state_store.write(self.blob_name, state)
+            logging.info(f"Saved state to blob '{self.blob_name}': {state}")
+            return True
         except Exception as e:
             logging.error(f"Error saving state: {e}")
+            return False
+
+    def make_state(self, position, index, outbox=None, profile=None, journal=None, failures=None):
+        """
+        State document for a global position. major/minor are informational only.
+        profile: {'description', 'hash', 'pending'} - the last description applied to the
+        profile and one still to apply after a failed update
+        journal: the PostJournal entry for the post in flight or last posted
+        failures: {'position', 'count'} - permanent post failures of the item at position
+        """
+        major_idx, minor_idx = index.locate(position)
+        state = {"position": position, "major": major_idx, "minor": minor_idx}
+        if outbox:
+            state["outbox"] = outbox.entries
+        if profile:
+            state["profile"] = profile
+        if journal:
+            state["journal"] = journal
+        if failures and failures.get('position') == position:
+            state["failures"] = failures
+        return state
+
+    def make_poster(self):
+        return TweetPoster(self.client, time_budget_seconds=self.config.get('post_time_budget_seconds', 60),
+                           budget=self.budget)
+
+    def make_outbox(self, state):
+        return Outbox((state or {}).get('outbox'), max_entries=self.config.get('outbox_max_entries', 12))
 
-    def validate_state(self, state, content):
-        """Validate and return a corrected state. Returns default state if invalid or None."""
+    def settle_post(self, result, tweet_text, position, index, outbox, profile=None, journal=None, failures=None,
+                    changed=False):
+        """
+        Decide the next state after posting the current item.
+        failures: the state's record of earlier permanent failures.
+        changed: the rest of the state changed (a journal entry to clear, a new profile record).
+        Returns the state to save, or None if nothing changed.
+        """
+        journal = journal or PostJournal()
+        if result.ok or result.kind == DUPLICATE:
+            if result.ok:
+                logging.info(f"Posted tweet: {tweet_text}")
+            else:
+                # Rejected as identical to a recent tweet: an earlier attempt went out
+                logging.warning(f"Tweet was already posted: {tweet_text}")
+            if journal.entry:
+                journal.complete(result.tweet_id)
+            if result.unsent:
+                # The item counts as posted; the rest of its thread goes out with the outbox
+                logging.warning(f"Thread incomplete, queueing {len(result.unsent)} remaining part(s)")
+                outbox.enqueue_thread(result.unsent, result.thread_ids[-1])
+            return self.make_state(index.advance(position), index, outbox, profile, journal.entry)
+
+        journal.abandon()
+        # Still failing after retries: hand transient failures to the outbox and move on
+        if result.retryable and outbox.enqueue_thread(split_tweet(tweet_text)):
+            return self.make_state(index.advance(position), index, outbox, profile)
+        if result.kind == PERMANENT:
+            return self.permanent_failure(failures, tweet_text, position, index, outbox, profile)
+
+        # Don't advance state if failed and it will try again next trigger.
+        if outbox.changed or changed:
+            return self.make_state(position, index, outbox, profile, failures=failures)
+        return None
+
+    def permanent_failure(self, failures, tweet_text, position, index, outbox, profile):
+        """
+        Count a permanent failure of the item at position. The item is retried on the next
+        runs, and skipped after max_permanent_failures so one bad item cannot stall the bot.
+        """
+        count = failures['count'] + 1 if failures and failures.get('position') == position else 1
+        limit = self.config.get('max_permanent_failures', MAX_PERMANENT_FAILURES)
+        if count >= limit:
+            instrumentation.count('post_skipped')
+            logging.error(f"Skipping position {position} after {count} permanent failure(s): {tweet_text}")
+            return self.make_state(index.advance(position), index, outbox, profile)
+        logging.warning(f"Permanent failure {count}/{limit} for position {position}, retrying next run")
+        return self.make_state(position, index, outbox, profile, failures={'position': position, 'count': count})
+
+    def validate_state(self, state, index):
+        """Validate state and return the global position to post next. Returns 0 if invalid or None."""
         if state is None:
-            logging.warning("State not found. Starting from beginning: major=0, minor=0")
-            return {"major": 0, "minor": 0}
+            logging.warning("State not found. Starting from beginning: position=0")
+            return 0
 
-        major_idx = state['major']
-        minor_idx = state['minor']
+        position = state.get('position')
+        if position is None and 'major' in state:
+            # Legacy {"major", "minor"} state
+            try:
+                position = index.position_of(state['major'], state.get('minor', 0))
+            except IndexError:
+                position = None
 
         # Validate state - reset to beginning if corrupted
-        if (major_idx < 0 or major_idx >= len(content) or
-            minor_idx < 0 or minor_idx >= len(content[major_idx][self.config['minor_list_key']])):
-            logging.warning(f"Invalid state: major={major_idx}, minor={minor_idx}. Resetting to 0,0")
-            return {"major": 0, "minor": 0}
+        if not index.is_valid(position):
+            logging.warning(f"Invalid state: {state}. Resetting to position 0")
+            return 0
 
-        return state
+        return position
 
-    def run(self):
-        content = self.load_json(self.config['content_file_path'])
-        state = self.get_state()
-        state = self.validate_state(state, content)
-        major_idx = state['major']
-        minor_idx = state['minor']
+    def render_item(self, content, index, position):
+        """
+        Render the post for a global position.
+        Returns: {'position', 'major', 'minor', 'tweet_text', 'description' (None unless the
+        major unit starts here and a description_template is configured)}
+        """
+        major_idx, minor_idx = index.locate(position)
+
+        text = content.text(major_idx, minor_idx)
+        major_label = content.major_label(major_idx)
+        minor_label = self.minor_label(content, major_idx, minor_idx)
 
-        current_major = content[major_idx]
-        minor_list = current_major[self.config['minor_list_key']]
+        # Description changes at the start of a major unit
+        description = None
+        if minor_idx == 0 and self.config.get('description_template'):
+            description = self.config['description_template'].format(major_label)
 
-        current_item = minor_list[minor_idx]
-        text = current_item[self.config['text_key']]
-        major_label = current_major[self.config['major_label_key']]
+        return {
+            'position': position,
+            'major': major_idx,
+            'minor': minor_idx,
+            'tweet_text': self.config['template'].format(text, major_label, minor_label),
+            'description': description
+        }
 
-        # Determine minor label
-        if self.config.get('minor_label_key'):
-            minor_label = current_item[self.config['minor_label_key']]
-        elif self.config.get('custom_numbers_path'):
+    def minor_label(self, content, major_idx, minor_idx):
+        """Label of an item within its major unit: from the content, the custom numbering or numbered"""
+        if content.has_minor_labels:
+            return content.minor_label(major_idx, minor_idx)
+        if self.config.get('custom_numbers_path'):
             custom_numbers = self.load_json(self.config['custom_numbers_path'])
-            minor_label = custom_numbers[minor_idx]
+            # Items past the end of the table are numbered instead
+            if minor_idx < len(custom_numbers):
+                return custom_numbers[minor_idx]
+        return self.number_label(minor_idx)
+
+    def number_label(self, minor_idx):
+        """Label for an item with no label in the content: memoized gematria or digits"""
+        if self.config.get('minor_label_format') == 'gematria':
+            return gematria(minor_idx + 1, self.config.get('minor_label_style', PLAIN))
+        return str(minor_idx + 1)
+
+    # ============================================================================
+    # Profile description
+    # ============================================================================
+
+    def description_to_apply(self, profile, description):
+        """
+        The description to set on the profile this run, or None if the profile already shows it.
+        description: the item's rendered description (None unless a major unit starts here).
+        A failed update stays pending in the profile record and is retried on later runs;
+        a newly rendered description replaces it.
+        """
+        if description:
+            profile.pop('pending', None)
+        target = description or profile.get('pending')
+        if target and description_hash(target) != profile.get('hash'):
+            return target
+        if target:
+            logging.info("Profile description already up to date")
+        profile.pop('pending', None)
+        return None
+
+    def record_description(self, profile, description, applied):
+        """Note the outcome of a profile update in the state's profile record"""
+        if applied:
+            profile.update(description=description, hash=description_hash(description))
+            profile.pop('pending', None)
         else:
-            minor_label = str(minor_idx + 1)
+            profile['pending'] = description
 
-        # Update Description if at start of major unit
-        if minor_idx == 0 and self.config.get('description_template'):
-            try:
-                new_desc = self.config['description_template'].format(major_label)
-                self.api_v1.update_profile(description=new_desc)
-                logging.info(f"Updated profile description: {new_desc}")
-            except Exception as e:
-                logging.error(f"Failed to update description: {e}")
-
-        # Post Tweet
-        tweet_text = self.config['template'].format(text, major_label, minor_label)
+    def set_profile_description(self, description):
+        """update_profile. Returns (applied, the response's rate-limit headers)."""
         try:
-            self.client.create_tweet(text=tweet_text)
-            logging.info(f"Posted tweet: {tweet_text}")
+            instrumentation.count('twitter_calls')
+            with instrumentation.phase('description'):
+                self.api_v1.update_profile(description=description)
+            logging.info(f"Updated profile description: {description}")
+            return True, last_response_headers(self.api_v1)
         except Exception as e:
-            logging.error(f"Failed to post tweet: {e}")
-            # Don't advance state if failed and it will try again next trigger.
+            logging.error(f"Failed to update description: {e}")
+            return False, response_headers(e)
+
+    def update_description(self, description):
+        # Deferred by the rate limit budget, the description stays pending for a later run
+        token = self.budget.acquire(UPDATE_PROFILE)
+        if token.wait:
+            return False
+        applied, headers = self.set_profile_description(description)
+        self.budget.observe(token, headers)
+        return applied
+
+    # ============================================================================
+    # Posting journal
+    # ============================================================================
+
+    def make_verifier(self):
+        return TimelineVerifier(self.client)
+
+    def reconcile(self, entry, tweet_text):
+        """
+        An earlier run saved its intent to post this item but not the outcome.
+        Returns the tweet id if the account's timeline shows the post, else None: the item is
+        posted again, and X refuses it as a duplicate if it went out after all.
+        """
+        self.begin_reconcile(entry)
+        try:
+            tweet_id = self.make_verifier().find(entry, split_tweet(tweet_text)[0])
+        except Exception as e:
+            logging.warning(f"Could not check the timeline, relying on duplicate detection: {e}")
+            return None
+        return self.reconciled(tweet_id)
+
+    @staticmethod
+    def begin_reconcile(entry):
+        logging.warning(f"Unconfirmed post for position {entry['position']} since {entry['started_at']}, "
+                        f"checking the timeline")
+        instrumentation.count('journal_reconcile')
+        instrumentation.count('twitter_calls', 2)
+
+    @staticmethod
+    def reconciled(tweet_id):
+        if tweet_id:
+            logging.info(f"Found the post as tweet {tweet_id}, not posting it again")
+        return tweet_id
+
+    # ============================================================================
+    # Pre-rendered queue
+    # ============================================================================
+
+    def load_queue(self):
+        """The pre-rendered queue, or None if queueing is off or no queue was built"""
+        if not self.config.get('render_queue_size'):
+            return None
+        try:
+            # Unchanged between refills, so normally answered from the worker's ETag cache
+            with instrumentation.phase('queue_read'):
+                data = self.state_store.read(self.queue_blob_name)
+            return RenderQueue(data) if data else None
+        except Exception as e:
+            logging.warning(f"Error loading render queue: {e}")
+            return None
+
+    def next_item(self, content, index, position, queue=None):
+        """The post for a position: from the pre-rendered queue when it covers it, else rendered now"""
+        if queue is not None:
+            item = queue.item_for(position, content_fingerprint(self.config), index.total)
+            if item is not None:
+                instrumentation.count('render_queue_hit')
+                return item
+            logging.info(f"Render queue does not cover position {position}, rendering inline")
+        with instrumentation.phase('render'):
+            return self.render_item(content, index, position)
+
+    def build_queue(self, state, count=None):
+        """Render the next `count` posts from the state's position (no storage I/O)"""
+        count = count or self.config.get('render_queue_size') or 48
+        content = open_content(self.config)
+        index = content.cursor_index()
+        position = self.validate_state(state, index)
+        queue = RenderQueue.build(
+            lambda p: self.render_item(content, index, p),
+            index,
+            position,
+            count,
+            content_fingerprint(self.config)
+        )
+        logging.info(f"Rendered {len(queue.data['items'])} queued post(s) from position {position}")
+        return queue
+
+    def refill_queue(self, count=None):
+        """Render the next `count` posts from the current position and store them as the queue"""
+        queue = self.build_queue(self.get_state(), count)
+        self.state_store.write(self.queue_blob_name, queue.data, ensure_ascii=False, separators=(',', ':'))
+        return queue
+
+    def run(self):
+        with instrumentation.phase('content'):
+            content = open_content(self.config)
+            index = content.cursor_index()
+        state = self.get_state()
+        position = self.validate_state(state, index)
+        item = self.next_item(content, index, position, self.load_queue())
+        poster = self.make_poster()
+
+        # Tweets left over from earlier failed runs go out first, in order
+        outbox = self.make_outbox(state)
+        with instrumentation.phase('outbox'):
+            outbox.drain(poster)
+
+        # Update Description if at start of major unit (or still pending), unless already applied
+        profile = dict((state or {}).get('profile') or {})
+        previous_profile = dict(profile)
+        description = self.description_to_apply(profile, item['description'])
+        if description:
+            self.record_description(profile, description, self.update_description(description))
+
+        # A post an earlier run started but could not confirm is checked before posting again
+        tweet_text = item['tweet_text']
+        failures = (state or {}).get('failures')
+        journal = PostJournal((state or {}).get('journal'))
+        pending = journal.pending_for(position, tweet_text)
+        tweet_id = self.reconcile(pending, tweet_text) if pending else None
+        if tweet_id:
+            journal.complete(tweet_id)
+            self.save_state(self.make_state(index.advance(position), index, outbox, profile, journal.entry))
             return
 
-        # Advance State
-        minor_idx += 1
-        if minor_idx >= len(minor_list):
-            minor_idx = 0
-            major_idx = (major_idx + 1) % len(content)
+        # Record the intent first, so a failed save after posting cannot lead to a double post
+        journalled = not poster.blocked
+        if journalled:
+            journal.begin(position, tweet_text)
+            if not self.save_state(self.make_state(position, index, outbox, profile, journal.entry, failures)):
+                logging.error("Not posting: could not save the posting journal")
+                return
+
+        # Post Tweet (deferred without a call if the outbox is still blocked by a rate limit or refused access).
+        # Items over the length limit go out as a reply chain.
+        with instrumentation.phase('post'):
+            result = poster.post_thread(split_tweet(tweet_text))
+
+        new_state = self.settle_post(result, tweet_text, position, index, outbox, profile, journal, failures,
+                                     changed=journalled or profile != previous_profile)
+        if new_state is not None:
+            self.save_state(new_state)
+
+    # ============================================================================
+    # HTTP API - Cursor Management
+    # ============================================================================
+
+    def describe_position(self, position, index):
+        major_idx, minor_idx = index.locate(position)
+        return {
+            "position": position,
+            "total": index.total,
+            "major": major_idx + 1,
+            "minor": minor_idx + 1,
+            "percent": round(100 * position / index.total, 2)
+        }
+
+    def search(self, content, index, query, limit=10):
+        """Ranked items matching a query, as describe_position entries with labels, text and score"""
+        if not self.config.get('search_index_path'):
+            raise ValueError("Search is not configured for this bot")
+        search_index = open_index(self.config['search_index_path'])
+        if search_index.item_count != index.total:
+            raise ValueError("Search index does not match the content; rebuild it with corpus_compiler.py")
+
+        results = []
+        for position, score in search_index.search(query, limit, lambda p: content.text(*index.locate(p))):
+            major_idx, minor_idx = index.locate(position)
+            results.append({
+                **self.describe_position(position, index),
+                "major_label": content.major_label(major_idx),
+                "minor_label": self.minor_label(content, major_idx, minor_idx),
+                "text": content.text(major_idx, minor_idx),
+                "score": score
+            })
+        return results
 
-        self.save_state({"major": major_idx, "minor": minor_idx})
+    def make_calendar(self, index, position, now=None):
+        if not self.config.get('schedule'):
+            raise ValueError("No schedule is configured for this bot")
+        return PostingCalendar(self.config['schedule'], index, position, now)
+
+    def calendar_entries(self, content, index, entries, tz=timezone.utc, with_text=False):
+        """Calendar rows for (post_at, position) pairs, rendered lazily in the given time zone"""
+        major_labels, minor_labels = {}, {}
+        for post_at, position in entries:
+            major_idx, minor_idx = index.locate(position)
+            if major_idx not in major_labels:
+                major_labels[major_idx] = content.major_label(major_idx)
+            # Labels the bot numbers itself depend on the minor index only
+            key = (major_idx, minor_idx) if content.has_minor_labels else minor_idx
+            if key not in minor_labels:
+                minor_labels[key] = self.minor_label(content, major_idx, minor_idx)
+            entry = {
+                "post_at": post_at.astimezone(tz).isoformat(),
+                "position": position,
+                "major": major_idx + 1,
+                "minor": minor_idx + 1,
+                "major_label": major_labels[major_idx],
+                "minor_label": minor_labels[key]
+            }
+            if with_text:
+                entry["text"] = content.text(major_idx, minor_idx)
+            yield entry
+
+    def calendar_request(self, params, content, index, calendar):
+        """
+        Body of a calendar request.
+        params: 'major' (+ 'minor'), 'position', 'percent' or 'q' - when that item goes out next;
+        otherwise a page of the posts from 'from' (default now; pass it to page a fixed range)
+        until 'to' (default endless): 'count' posts (default 24, at most MAX_CALENDAR_PAGE)
+        skipping the first 'start'. The body's 'next_start' is the next page's 'start', absent
+        once the range ends. 'tz' (IANA name) is used for times without an offset and for the
+        returned times; 'text' adds the item text.
+        """
+        try:
+            tz = ZoneInfo(params['tz']) if params.get('tz') else timezone.utc
+        except ZoneInfoNotFoundError:
+            raise ValueError(f"Unknown time zone: {params['tz']}")
+        with_text = params.get('text', '').lower() in ('1', 'true', 'yes')
+
+        target = {key: params[key] for key in ('major', 'minor', 'position', 'percent') if params.get(key)}
+        if params.get('q'):
+            target['query'] = params['q']
+        if target:
+            position = self.seek_position(target, index, content)
+            entry = next(self.calendar_entries(content, index, [(calendar.post_time(position), position)], tz,
+                                               with_text))
+            return {**entry, "posts_before": calendar.fire_of(position)}
+
+        start = parse_time(params['from'], tz) if params.get('from') else calendar.now
+        end = parse_time(params['to'], tz) if params.get('to') else None
+        offset = int(params.get('start', 0))
+        count = int(params.get('count', 24))
+        if offset < 0 or not 1 <= count <= MAX_CALENDAR_PAGE:
+            raise ValueError(f"'start' must be at least 0 and 'count' between 1 and {MAX_CALENDAR_PAGE}")
+        projected, next_start = calendar.page(start, end, offset, count)
+        entries = list(self.calendar_entries(content, index, projected, tz, with_text))
+        body = {
+            "position": calendar.position,
+            "cycle_end": calendar.cycle_end().astimezone(tz).isoformat(),
+            "start": offset,
+            "count": len(entries),
+            "entries": entries
+        }
+        if next_start is not None:
+            body["next_start"] = next_start
+        return body
+
+    def seek_position(self, request_body, index, content=None):
+        """
+        Resolve a seek request to a global position.
+        request_body: {'major': int, 'minor': int} (1-based), {'percent': number}, {'position': int}
+        or {'query': str} (the best search match)
+        """
+        if 'position' in request_body:
+            position = int(request_body['position'])
+            if not index.is_valid(position):
+                raise IndexError(f"Position out of range: {position}")
+            return position
+        if 'percent' in request_body:
+            return index.position_at_percent(float(request_body['percent']))
+        if 'query' in request_body:
+            matches = self.search(content, index, str(request_body['query']), limit=1)
+            if not matches:
+                raise ValueError(f"No item matches: {request_body['query']}")
+            return matches[0]['position']
+        if 'major' in request_body:
+            return index.position_of(int(request_body['major']) - 1, int(request_body.get('minor', 1)) - 1)
+        raise ValueError("Please provide 'major' (and optional 'minor'), 'percent', 'position' or 'query'")
+
+    def handle_http_request(self, req):
+        """
+        Handle HTTP API requests for the posting cursor
+        Returns: dict with 'status' and 'body' keys
+        """
+        try:
+            action = req.params.get('action')
+            if not action:
+                return {
+                    "status": 400,
+                    "body": {"error": "Missing required parameter 'action'. "
+                                      "Use 'status', 'seek', 'search', 'calendar', 'refill' or 'preview'"}
+                }
+
+            content = open_content(self.config)
+            index = content.cursor_index()
+
+            if action == 'status':
+                position = self.validate_state(self.get_state(), index)
+                return {"status": 200, "body": self.describe_position(position, index)}
+
+            elif action == 'seek':
+                try:
+                    request_body = req.get_json()
+                except ValueError:
+                    return {"status": 400, "body": {"error": "Invalid JSON in request body"}}
+                if not request_body:
+                    return {"status": 400, "body": {"error": "Request body required"}}
+
+                try:
+                    position = self.seek_position(request_body, index, content)
+                except (ValueError, IndexError) as e:
+                    return {"status": 400, "body": {"error": str(e)}}
+
+                # Keep the record of the applied description so it is not set again needlessly, and the
+                # outbox: its tweets are already rendered and the cursor has moved past them
+                state = self.get_state() or {}
+                outbox = self.make_outbox(state)
+                if not self.save_state(self.make_state(position, index, outbox, state.get('profile'),
+                                                       failures=state.get('failures'))):
+                    return {"status": 500, "body": {"error": "Failed to save state"}}
+                return {
+                    "status": 200,
+                    "body": {"success": True, **self.describe_position(position, index), "outbox": len(outbox)}
+                }
+
+            elif action == 'search':
+                query = req.params.get('q')
+                if not query:
+                    return {"status": 400, "body": {"error": "Missing required parameter 'q'"}}
+                try:
+                    limit = int(req.params.get('limit', 10))
+                    if not 1 <= limit <= MAX_SEARCH_RESULTS:
+                        raise ValueError(f"'limit' must be between 1 and {MAX_SEARCH_RESULTS}")
+                    results = self.search(content, index, query, limit)
+                except ValueError as e:
+                    return {"status": 400, "body": {"error": str(e)}}
+                return {"status": 200, "body": {"query": query, "count": len(results), "results": results}}
+
+            elif action == 'calendar':
+                try:
+                    calendar = self.make_calendar(index, self.validate_state(self.get_state(), index))
+                    body = self.calendar_request(req.params, content, index, calendar)
+                except (ValueError, IndexError) as e:
+                    return {"status": 400, "body": {"error": str(e)}}
+                return {"status": 200, "body": body}
+
+            elif action == 'refill':
+                count = req.params.get('count')
+                queue = self.refill_queue(int(count) if count else None)
+                return {
+                    "status": 200,
+                    "body": {"success": True, "start": queue.data['start'], "count": len(queue.data['items'])}
+                }
+
+            elif action == 'preview':
+                # Upcoming posts as they will go out, for auditing the queue
+                position = self.validate_state(self.get_state(), index)
+                queue = self.load_queue()
+                count = int(req.params.get('count', 5))
+                items = []
+                for offset in range(min(count, index.total)):
+                    p = index.advance(position, offset)
+                    item = self.next_item(content, index, p, queue)
+                    items.append({**self.describe_position(p, index), "tweet_text": item['tweet_text'],
+                                  "description": item['description']})
+                return {
+                    "status": 200,
+                    "body": {
+                        "queued": queue.remaining(position) if queue is not None else 0,
+                        "items": items
+                    }
+                }
+
+            else:
+                return {
+                    "status": 400,
+                    "body": {"error": f"Unknown action: {action}. Use 'status', 'seek', 'search', 'calendar', 'refill' or 'preview'"}
+                }
+
+        except Exception as e:
+            logging.error(f"Error processing request: {e}")
+            return {
+                "status": 500,
+                "body": {"error": str(e)}
+            }
@@ -0,0 +1,92 @@
+import re
+import unicodedata
+
+# X's weighted length (twitter-text config v3): code points in these ranges weigh 1,
+# everything else 2; URLs count as 23 whatever their length.
+MAX_WEIGHTED_LENGTH = 280
+URL_LENGTH = 23
+_LIGHT_RANGES = ((0x0000, 0x10FF), (0x2000, 0x200D), (0x2010, 0x201F), (0x2032, 0x2037))
+_HEAVY = re.compile('[^%s]' % ''.join(f'\\U{low:08x}-\\U{high:08x}' for low, high in _LIGHT_RANGES))
+_URL = re.compile(r'https?://\S+')
+_TOKEN = re.compile(r'\S+|\s+')
+
+
+def _char_weight(c):
+    cp = ord(c)
+    for low, high in _LIGHT_RANGES:
+        if low <= cp <= high:
+            return 1
+    return 2
+
+
+def _plain_weight(text):
+    # One per code point, plus one more for each code point outside the light ranges
+    return len(text) + len(_HEAVY.findall(text))
+
+
+def _token_weight(token):
+    if _URL.fullmatch(token):
+        return URL_LENGTH
+    return _plain_weight(token)
+
+
+def weighted_length(text):
+    """
+    Length of text as X counts it against MAX_WEIGHTED_LENGTH.
+    Emoji sequences are counted per code point, which can only overestimate.
+    """
+    text = unicodedata.normalize('NFC', text)
+    length = _plain_weight(text)
+    for url in _URL.findall(text):
+        length += URL_LENGTH - _plain_weight(url)
+    return length
+
+
+def _hard_split(word, limit):
+    """Split a single over-long word into chunks of at most limit"""
+    chunks, current, weight = [], '', 0
+    for c in word:
+        w = _char_weight(c)
+        if current and weight + w > limit:
+            chunks.append(current)
+            current, weight = '', 0
+        current += c
+        weight += w
+    chunks.append(current)
+    return chunks
+
+
+def split_tweet(text, limit=MAX_WEIGHTED_LENGTH):
+    """
+    Split text into parts of at most limit weighted characters, on word boundaries
+    (line breaks are kept inside a part). Returns [text] when it already fits.
+    """
+    text = unicodedata.normalize('NFC', text)
+    if weighted_length(text) <= limit:
+        return [text]
+
+    parts = []
+    current, weight = [], 0
+    for token in _TOKEN.findall(text):
+        token_weight = _token_weight(token)
+        if token.isspace():
+            if current:
+                current.append(token)
+                weight += token_weight
+            continue
+        if weight + token_weight > limit:
+            # Trailing whitespace of the finished part is dropped
+            while current and current[-1].isspace():
+                weight -= _token_weight(current.pop())
+            if current:
+                parts.append(''.join(current))
+            current, weight = [], 0
+            if token_weight > limit:
+                *full, token = _hard_split(token, limit)
+                parts.extend(full)
+                token_weight = _token_weight(token)
+        current.append(token)
+        weight += token_weight
+    if current:
+        parts.append(''.join(current).rstrip())
+    return parts
@@ -1,106 +1,142 @@
+import asyncio
+import importlib.util
 import logging
 import json
 import os
 import datetime
 import azure.functions as func
-from bot_engines.sequential_content_bot import SequentialContentBot
-from bot_engines.constant_phrase_bot import ConstantPhraseBot
-from zoneinfo import ZoneInfo
+from bot_engines import instrumentation
+from bot_engines.http_cache import ResponseCache
+from bot_engines.registry import BotRegistry, run_bots, run_bots_async
 
 # Initialize the function app
 app = func.FunctionApp()
 
-# Israel timezone for BiBi bot
-ISRAEL_TZ = ZoneInfo("Asia/Jerusalem")
+
+# Bots are declared in bots.json. Engines (and the tweepy / Azure Storage SDKs
+# behind them) are imported on first use, so a cold start only pays for
+# trigger registration. Measure with: python SetupUtils/startup_benchmark.py
+# Invalid entries are logged and skipped rather than failing the whole app.
+REGISTRY = BotRegistry(os.path.join(os.path.dirname(__file__), 'bots.json'))
+BOT_DISPATCH_WORKERS = int(os.environ.get('BOT_DISPATCH_WORKERS', '4'))
+# 'threads' runs the blocking engines on a thread pool; 'async' runs the asyncio
+# engines (tweepy AsyncClient, azure.storage.blob.aio) on the worker's event loop.
+# The async mode needs the packages in requirements-async.txt; without them the threads mode is used.
+BOT_DISPATCH_MODE = os.environ.get('BOT_DISPATCH_MODE', 'threads')
+if BOT_DISPATCH_MODE == 'async' and importlib.util.find_spec('aiohttp') is None:
+    logging.warning("BOT_DISPATCH_MODE=async needs requirements-async.txt installed, using threads")
+    BOT_DISPATCH_MODE = 'threads'
+
+
+# =============================================================================
+# Dispatcher - Runs every bot whose schedule is due, concurrently
+# =============================================================================
+
+@app.timer_trigger(schedule="0 0 * * * *", arg_name="mytimer", run_on_startup=False)
+async def bot_dispatcher_timer(mytimer: func.TimerRequest) -> None:
+    """Hourly timer - runs the registry's due bots concurrently"""
+    now = datetime.datetime.now(datetime.timezone.utc)
+    logging.info('Bot dispatcher ran at %s', now.isoformat())
+
+    # Schedules need no clients or storage, so bots that are not due cost nothing
+    with instrumentation.instrumented_run('dispatcher', BOT_DISPATCH_MODE):
+        due = REGISTRY.due(now)
+        logging.info('Due bots: %s', [spec.name for spec in due])
+        instrumentation.count('bots_due', len(due))
+
+        # Each bot emits its own run metrics
+        if BOT_DISPATCH_MODE == 'async':
+            results = await run_bots_async(due, max_concurrency=BOT_DISPATCH_WORKERS)
+        else:
+            results = await asyncio.get_running_loop().run_in_executor(None, run_bots, due, BOT_DISPATCH_WORKERS)
+
+        for result in results:
+            logging.info('Bot run result: %s', result)
+        instrumentation.count('bots_failed', sum(1 for result in results if not result['ok']))
+
+    # A constant phrase run may have cleaned up overrides
+    if any(spec.engine == 'constant_phrase' for spec in due):
+        _bibi_api_cache.invalidate()
+
 
 # =============================================================================
-# Tehilim Bot - Posts verses from Tehilim (Psalms) on even hours
+# Mention replies - Polls mentions and answers them (replaces the streaming NoBot)
 # =============================================================================
 
-@app.timer_trigger(schedule="0 0 */2 * * *", arg_name="mytimer", run_on_startup=False)
-def tehilim_timer(mytimer: func.TimerRequest) -> None:
-    """Timer trigger for Tehilim bot - posts on even hours (0, 2, 4, 6, ...)"""
-    utc_timestamp = datetime.datetime.now(datetime.timezone.utc).isoformat()
-    logging.info('Tehilim timer trigger function ran at %s', utc_timestamp)
-
-    config = {
-        'consumer_key': os.environ['TEHILIM_CONSUMER_KEY'],
-        'consumer_secret': os.environ['TEHILIM_CONSUMER_SECRET'],
-        'access_token': os.environ['TEHILIM_ACCESS_TOKEN'],
-        'access_token_secret': os.environ['TEHILIM_ACCESS_TOKEN_SECRET'],
-        'blob_connection_string': os.environ['BLOB_CONNECTION_STRING'],
-        'state_blob_name': 'tehilim_state.json',
-        'content_file_path': os.path.join(os.path.dirname(__file__), 'Data', 'parsed_tehilim.json'),
-        'minor_list_key': 'verses',
-        'text_key': 'verse_text',
-        'major_label_key': 'chapter_heb_ind',
-        'minor_label_key': 'verse_heb_ind',
-        'template': "{}\n~ {}', {}'",
-        'description_template': "מצייץ תהילים להצלת עם ישראל. עכשיו במזמור {}'. בוט מאת @%s" % (os.environ['TEHILIM_CREDIT_CREATOR'])
-    }
-
-    bot = SequentialContentBot(config)
-    bot.run()
+# Every 15 minutes: the mentions timeline allows one request per 15 minutes on the lowest API tier
+@app.timer_trigger(schedule="0 */15 * * * *", arg_name="mytimer", run_on_startup=False)
+def mention_reply_timer(mytimer: func.TimerRequest) -> None:
+    """Timer - polls each mention_reply bot's new mentions and sends a batch of replies"""
+    # Bots stay off until enabled in bots.json and given credentials
+    specs = REGISTRY.runnable(engine='mention_reply')
+    if not specs:
+        return
+    for result in run_bots(specs, BOT_DISPATCH_WORKERS):
+        logging.info('Bot run result: %s', result)
 
 
 # =============================================================================
-# Gilgamesh Bot - Posts lines from Epic of Gilgamesh on odd hours
+# Render queue - Pre-renders the sequential bots' upcoming posts off the hot path
 # =============================================================================
 
-@app.timer_trigger(schedule="0 0 1-23/2 * * *", arg_name="mytimer", run_on_startup=False)
-def gilgamesh_timer(mytimer: func.TimerRequest) -> None:
-    """Timer trigger for Gilgamesh bot - posts on odd hours (1, 3, 5, 7, ...)"""
-    utc_timestamp = datetime.datetime.now(datetime.timezone.utc).isoformat()
-    logging.info('Gilgamesh timer trigger function ran at %s', utc_timestamp)
-
-    config = {
-        'consumer_key': os.environ['GILGAMESH_CONSUMER_KEY'],
-        'consumer_secret': os.environ['GILGAMESH_CONSUMER_SECRET'],
-        'access_token': os.environ['GILGAMESH_ACCESS_TOKEN'],
-        'access_token_secret': os.environ['GILGAMESH_ACCESS_TOKEN_SECRET'],
-        'blob_connection_string': os.environ['BLOB_CONNECTION_STRING'],
-        'state_blob_name': 'gilgamesh_state.json',
-        'content_file_path': os.path.join(os.path.dirname(__file__), 'Data', 'parsed_gilgamesh.json'),
-        'minor_list_key': 'lines',
-        'text_key': 'line_text',
-        'major_label_key': 'tablet_heb_ind',
-        'custom_numbers_path': os.path.join(os.path.dirname(__file__), 'Data', 'heb_numbers.json'),
-        'template': "{}\n\n~ לוּחַ {} שׁוּרָה {}.",
-        'description_template': "מצייץ את עֲלִילוֹת גִּלְגָּמֶשׁ. עכשיו בלוח הָ{}. בוט בהשראת @%s מאת @%s" % (os.environ['GILGAMESH_CREDIT_INSPIRED'], os.environ['GILGAMESH_CREDIT_CREATOR'])
-    }
-
-    bot = SequentialContentBot(config)
-    bot.run()
+@app.timer_trigger(schedule="0 30 3 * * *", arg_name="mytimer", run_on_startup=False)
+def render_queue_timer(mytimer: func.TimerRequest) -> None:
+    """Daily timer - refills the pre-rendered queue of each sequential bot that uses one"""
+    for name in REGISTRY.names(engine='sequential'):
+        spec = REGISTRY.get(name)
+        if not spec.spec.get('config', {}).get('render_queue_size'):
+            continue
+        try:
+            with instrumentation.instrumented_run(name, spec.engine, trigger='render_queue'):
+                spec.create_bot().refill_queue()
+        except Exception as e:
+            logging.error(f"Failed to refill render queue for {name}: {e}")
 
 
 # =============================================================================
-# DidBiBiQuitToday Bot - Posts constant phrase at specific time daily
+# Sequential bots cursor API - status, search, posting calendar and seek (chapter / verse / percentage / phrase)
 # =============================================================================
 
-def _get_bibi_quit_config():
-    """Get BiBi Quit bot configuration from environment variables"""
-    return {
-        'consumer_key': os.environ['BIBI_QUIT_CONSUMER_KEY'],
-        'consumer_secret': os.environ['BIBI_QUIT_CONSUMER_SECRET'],
-        'access_token': os.environ['BIBI_QUIT_ACCESS_TOKEN'],
-        'access_token_secret': os.environ['BIBI_QUIT_ACCESS_TOKEN_SECRET'],
-        'blob_connection_string': os.environ['BLOB_CONNECTION_STRING'],
-        'bot_name': 'bibi_quit',
-        'constant_phrase': os.environ['BIBI_QUIT_PHRASE'],
-        'timezone': ISRAEL_TZ,
-        'target_hour': int(os.environ['BIBI_QUIT_HOUR'])
-    }
+@app.route(route="api/sequential", methods=["GET", "POST"], auth_level=func.AuthLevel.FUNCTION)
+def sequential_api(req: func.HttpRequest) -> func.HttpResponse:
+    """HTTP API for inspecting, searching, scheduling and repositioning the sequential bots' cursor"""
+    logging.info('Sequential bots API request received.')
+
+    bot_name = req.params.get('bot')
+    sequential_bots = REGISTRY.names(engine='sequential')
+    if bot_name not in sequential_bots:
+        result = {
+            "status": 400,
+            "body": {"error": f"Unknown bot: {bot_name}. Use one of: {', '.join(sequential_bots)}"}
+        }
+    else:
+        with instrumentation.instrumented_run(bot_name, 'sequential', trigger='http'):
+            result = REGISTRY.get(bot_name).create_bot().handle_http_request(req)
+
+    return func.HttpResponse(
+        json.dumps(result['body'], indent=2, ensure_ascii=False),
+        status_code=result['status'],
+        mimetype="application/json"
+    )
+
 
+# =============================================================================
+# DidBiBiQuitToday Bot - Management API for overrides and kill switch
+# =============================================================================
+
+# Read-only API calls served from this worker without touching storage.
+# Mutations through the API (or a timer run) in the same worker invalidate it;
+# other workers converge within the TTL.
+BIBI_API_CACHE_TTL_SECONDS = int(os.environ.get('BIBI_API_CACHE_TTL_SECONDS', '30'))
+BIBI_API_READ_ACTIONS = {('override', 'list'), ('killswitch', 'status')}
+_bibi_api_cache = ResponseCache(BIBI_API_CACHE_TTL_SECONDS)
 
-@app.timer_trigger(schedule="0 0 20,21 * * *", arg_name="mytimer", run_on_startup=False)
-def bibi_quit_timer(mytimer: func.TimerRequest) -> None:
-    """Timer trigger for BiBi Quit bot - posts at 23:00 Israel time"""
-    utc_timestamp = datetime.datetime.now(datetime.timezone.utc).isoformat()
-    logging.info('DidBiBiQuitToday timer trigger executed at %s', utc_timestamp)
 
-    config = _get_bibi_quit_config()
-    bot = ConstantPhraseBot(config)
-    bot.run()
+def _cached_response(entry, req):
+    """200 with validators, or 304 if the client already has this version"""
+    if entry.matches(req.headers.get('If-None-Match')):
+        return func.HttpResponse(status_code=304, headers=entry.headers())
+    return func.HttpResponse(entry.body, status_code=entry.status, headers=entry.headers(), mimetype="application/json")
 
 
 @app.route(route="api/bibi", methods=["GET", "POST"], auth_level=func.AuthLevel.ANONYMOUS)
@@ -108,12 +144,24 @@ def bibi_quit_api(req: func.HttpRequest) -> func.HttpResponse:
     """HTTP API for managing BiBi Quit bot overrides and kill switch"""
     logging.info('DidBiBiQuitToday API request received.')
 
-    config = _get_bibi_quit_config()
-    bot = ConstantPhraseBot(config)
-    result = bot.handle_http_request(req)
+    cache_key = (req.params.get('endpoint'), req.params.get('action'))
+    is_read = cache_key in BIBI_API_READ_ACTIONS
+    if is_read:
+        entry = _bibi_api_cache.get(cache_key)
+        if entry is not None:
+            return _cached_response(entry, req)
+
+    with instrumentation.instrumented_run('bibi_quit', 'constant_phrase', trigger='http'):
+        result = REGISTRY.get('bibi_quit').create_bot().handle_http_request(req)
+    body = json.dumps(result['body'], indent=2, ensure_ascii=False)
+
+    if is_read and result['status'] == 200:
+        return _cached_response(_bibi_api_cache.put(cache_key, body), req)
+    if not is_read:
+        _bibi_api_cache.invalidate()
 
     return func.HttpResponse(
-        json.dumps(result['body'], indent=2, ensure_ascii=False),
+        body,
         status_code=result['status'],
         mimetype="application/json"
     )
@@ -0,0 +1,70 @@
+import os
+import sys
+
+import pytest
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, '..'))
+sys.path.insert(0, os.path.join(HERE, '..', '..', 'SetupUtils'))
+
+from benchmark_fakes import CallLog, FakeBlobServiceClient
+from bot_engines import blob_state, client_pool
+
+
+@pytest.fixture(autouse=True)
+def fresh_worker():
+    """Every test starts like a new Functions worker"""
+    client_pool.clear_pool()
+    blob_state._etag_cache.clear()
+    blob_state._created_containers.clear()
+    yield
+    client_pool.clear_pool()
+    blob_state._etag_cache.clear()
+
+
+@pytest.fixture
+def blob_service():
+    return FakeBlobServiceClient(CallLog())
+
+
+@pytest.fixture
+def twitter(monkeypatch, blob_service):
+    """A fake Twitter client, and the fake storage, for the sequential bots"""
+    from benchmark_fakes import FakeTwitterClient
+    from bot_engines import sequential_content_bot
+
+    client = FakeTwitterClient(CallLog())
+    monkeypatch.setattr(sequential_content_bot, 'get_blob_service_client', lambda connection_string: blob_service)
+    monkeypatch.setattr(sequential_content_bot, 'get_twitter_client', lambda config: client)
+    return client
+
+
+@pytest.fixture
+def twitter_api(monkeypatch):
+    """A fake tweepy.API (v1.1) for the sequential bots' profile updates"""
+    from benchmark_fakes import FakeTwitterAPI
+    from bot_engines import sequential_content_bot
+
+    api = FakeTwitterAPI(CallLog())
+    monkeypatch.setattr(sequential_content_bot, 'get_twitter_api_v1', lambda config: api)
+    return api
+
+
+@pytest.fixture
+def sequential_bot(twitter):
+    """Factory for SequentialContentBot over the Tehilim pack and the fakes"""
+    from bot_engines.sequential_content_bot import SequentialContentBot
+
+    def make(**config):
+        return SequentialContentBot({
+            'consumer_key': 'key',
+            'consumer_secret': 'secret',
+            'access_token': 'token',
+            'access_token_secret': 'token-secret',
+            'blob_connection_string': 'UseDevelopmentStorage=true',
+            'state_blob_name': 'test_state.json',
+            'content_pack_path': os.path.join(HERE, '..', 'Data', 'tehilim.pack'),
+            'template': "{}\n~ {}', {}'",
+            **config
+        })
+    return make
@@ -0,0 +1,41 @@
+import asyncio
+
+from bot_engines import client_pool
+
+
+def pooled(identity='bot', credentials='v1'):
+    async def get():
+        return client_pool._get_or_create_async('test', identity, credentials, object)
+    return get
+
+
+def test_async_clients_are_reused_on_the_same_loop():
+    async def twice():
+        return await pooled()(), await pooled()()
+
+    first, second = asyncio.run(twice())
+    assert first is second
+
+
+def test_async_clients_are_replaced_when_credentials_change():
+    async def rotate():
+        return await pooled(credentials='v1')(), await pooled(credentials='v2')()
+
+    old, new = asyncio.run(rotate())
+    assert old is not new
+
+
+def test_closed_loops_are_dropped_with_their_clients():
+    first_loop, second_loop = asyncio.new_event_loop(), asyncio.new_event_loop()
+    first = first_loop.run_until_complete(pooled()())
+    first_loop.close()
+    second = second_loop.run_until_complete(pooled()())
+    second_loop.close()
+
+    assert first is not second
+    assert list(client_pool._async_pools) == [second_loop]
+
+
+def test_collected_loops_are_dropped():
+    asyncio.run(pooled()())
+    assert len(client_pool._async_pools) == 0
@@ -0,0 +1,90 @@
+import json
+import os
+import struct
+
+import pytest
+
+from bot_engines.content_pack import (FLAG_MINOR_LABELS, PACK_MAGIC, PACK_VERSION, ContentPack, JsonContent,
+                                      open_content, units_from_json, write_pack)
+
+CORPUS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'small_corpus.json')
+KEYS = {'minor_list_key': 'verses', 'text_key': 'verse_text', 'major_label_key': 'chapter_heb_ind'}
+
+
+@pytest.fixture
+def corpus():
+    with open(CORPUS_PATH, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def write(tmp_path, units, name='corpus.pack'):
+    path = str(tmp_path / name)
+    write_pack(path, units)
+    return path
+
+
+def items(content):
+    return [(content.major_label(major), content.minor_label(major, minor), content.text(major, minor))
+            for major in range(content.major_count()) for minor in range(content.minor_count(major))]
+
+
+def test_round_trip_matches_the_json_corpus(tmp_path, corpus):
+    pack = ContentPack(write(tmp_path, units_from_json(corpus, minor_label_key='verse_heb_ind', **KEYS)))
+    json_content = JsonContent(corpus, minor_label_key='verse_heb_ind', **KEYS)
+
+    assert pack.has_minor_labels
+    assert items(pack) == items(json_content)
+    assert pack.item_count() == json_content.item_count() == 6
+    assert pack.cursor_index().prefix == json_content.cursor_index().prefix == [0, 2, 3, 6]
+    # Empty strings survive as empty, not as a missing entry
+    assert pack.text(2, 2) == ''
+
+
+def test_header_and_offset_layout(tmp_path):
+    path = write(tmp_path, [('א', [('ab', None), ('ג', None)]), ('ב', [('d', None)])])
+    with open(path, 'rb') as f:
+        data = f.read()
+
+    assert struct.unpack_from('<4sHHII', data) == (PACK_MAGIC, PACK_VERSION, 0, 2, 3)
+    majors = [struct.unpack_from('<IIII', data, 16 + 16 * i) for i in range(2)]
+    entries = [struct.unpack_from('<IIII', data, 48 + 16 * i) for i in range(3)]
+    blob = data[96:]
+    # first_item is the prefix sum of the minor counts; labels and texts are offsets into the blob
+    assert [(first, count) for first, count, _, _ in majors] == [(0, 2), (2, 1)]
+    assert [blob[off:off + length].decode('utf-8') for _, _, off, length in majors] == ['א', 'ב']
+    assert [blob[off:off + length].decode('utf-8') for off, length, _, _ in entries] == ['ab', 'ג', 'd']
+    assert len('ג'.encode('utf-8')) == entries[1][1]
+
+
+def test_minor_labels_flag(tmp_path, corpus):
+    unlabelled = ContentPack(write(tmp_path, units_from_json(corpus, **KEYS), 'plain.pack'))
+    assert not unlabelled.has_minor_labels
+    assert unlabelled.minor_label(0, 0) is None
+
+    labelled = write(tmp_path, [('א', [('text', 'x')])], 'labelled.pack')
+    with open(labelled, 'rb') as f:
+        assert struct.unpack_from('<4sHHII', f.read())[2] & FLAG_MINOR_LABELS
+
+
+def test_out_of_range_and_bad_files(tmp_path, corpus):
+    pack = ContentPack(write(tmp_path, units_from_json(corpus, **KEYS)))
+    with pytest.raises(IndexError):
+        pack.text(3, 0)
+    with pytest.raises(IndexError):
+        pack.text(1, 1)
+
+    bad = tmp_path / 'bad.pack'
+    bad.write_bytes(b'JUNK' + bytes(12))
+    with pytest.raises(ValueError):
+        ContentPack(str(bad))
+
+
+def test_open_content_prefers_the_pack_and_falls_back_to_json(tmp_path, corpus):
+    pack_path = write(tmp_path, units_from_json(corpus, **KEYS))
+    assert isinstance(open_content({'content_pack_path': pack_path, 'content_file_path': CORPUS_PATH, **KEYS}),
+                      ContentPack)
+
+    content = open_content({'content_file_path': CORPUS_PATH, 'minor_label_key': 'verse_heb_ind', **KEYS})
+    assert isinstance(content, JsonContent)
+    assert content.text(2, 0) == corpus[2]['verses'][0]['verse_text']
+    assert content.minor_label(2, 1) == 'ב'
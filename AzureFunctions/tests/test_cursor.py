@@ -0,0 +1,44 @@
+import pytest
+
+from bot_engines.cursor import CursorIndex
+
+
+@pytest.fixture
+def index():
+    # Three chapters of 3, 1 and 2 verses
+    return CursorIndex([3, 1, 2])
+
+
+def test_locate_and_position_of_round_trip(index):
+    assert index.total == 6
+    assert index.major_count == 3
+    located = [index.locate(position) for position in range(index.total)]
+    assert located == [(0, 0), (0, 1), (0, 2), (1, 0), (2, 0), (2, 1)]
+    assert [index.position_of(*pair) for pair in located] == list(range(index.total))
+
+
+@pytest.mark.parametrize('position', [-1, 6, True, False, 1.0, '1', None])
+def test_invalid_positions(index, position):
+    assert not index.is_valid(position)
+    with pytest.raises(IndexError):
+        index.locate(position)
+
+
+@pytest.mark.parametrize('major, minor', [(3, 0), (-1, 0), (1, 1), (0, -1)])
+def test_position_of_out_of_range(index, major, minor):
+    with pytest.raises(IndexError):
+        index.position_of(major, minor)
+
+
+def test_advance_wraps(index):
+    assert index.advance(4) == 5
+    assert index.advance(5) == 0
+    assert index.advance(5, steps=3) == 2
+
+
+def test_position_at_percent(index):
+    assert index.position_at_percent(0) == 0
+    assert index.position_at_percent(50) == 3
+    assert index.position_at_percent(100) == 5
+    with pytest.raises(ValueError):
+        index.position_at_percent(101)
@@ -0,0 +1,30 @@
+import pytest
+
+from bot_engines.hebrew_numerals import ASCII, HEBREW, PLAIN, gematria
+
+
+@pytest.mark.parametrize('n, plain, ascii, hebrew', [
+    (1, 'א', "א'", 'א׳'),
+    (15, 'טו', 'ט"ו', 'ט״ו'),
+    (16, 'טז', 'ט"ז', 'ט״ז'),
+    (118, 'קיח', 'קי"ח', 'קי״ח'),
+    (515, 'תקטו', 'תקט"ו', 'תקט״ו'),
+    (900, 'תתק', 'תת"ק', 'תת״ק'),
+    (1000, 'א', "א'", 'א׳'),
+    (5785, 'התשפה', 'ה\'תשפ"ה', 'ה׳תשפ״ה'),
+])
+def test_styles(n, plain, ascii, hebrew):
+    assert gematria(n, PLAIN) == plain
+    assert gematria(n, ASCII) == ascii
+    assert gematria(n, HEBREW) == hebrew
+
+
+@pytest.mark.parametrize('n', [0, -1, 1.0, '1', True])
+def test_rejects_non_positive_integers(n):
+    with pytest.raises(ValueError):
+        gematria(n)
+
+
+def test_rejects_unknown_style():
+    with pytest.raises(ValueError):
+        gematria(5, 'Hebrew')
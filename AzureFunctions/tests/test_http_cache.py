@@ -0,0 +1,116 @@
+import json
+
+import azure.functions as func
+import pytest
+
+import function_app
+from bot_engines import http_cache
+from bot_engines.http_cache import ResponseCache
+
+
+@pytest.fixture
+def monotonic(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(http_cache.time, 'monotonic', lambda: now[0])
+    return now
+
+
+def test_entries_expire_after_the_ttl(monotonic):
+    cache = ResponseCache(30)
+    cache.put('key', '{}')
+    monotonic[0] += 29
+    assert cache.get('key') is not None
+    monotonic[0] += 1
+    assert cache.get('key') is None
+
+
+def test_invalidate_keeps_the_validators(monotonic):
+    cache = ResponseCache(30)
+    first = cache.put('key', '{"a": 1}')
+    cache.invalidate()
+    assert cache.get('key') is None
+    again = cache.put('key', '{"a": 1}')
+    assert (again.etag, again.last_modified) == (first.etag, first.last_modified)
+    assert cache.put('key', '{"a": 2}').etag != first.etag
+
+
+@pytest.mark.parametrize('header, matches', [
+    (None, False), ('"other"', False), ('*', True), ('"other", {etag}', True), ('W/{etag}', True),
+])
+def test_if_none_match(header, matches):
+    entry = ResponseCache(30).put('key', '{}')
+    assert entry.matches(header.format(etag=entry.etag) if header else header) == matches
+
+
+# =============================================================================
+# BiBi Quit API
+# =============================================================================
+
+class StubBot:
+    """handle_http_request over an in-memory kill switch and override list"""
+
+    calls = 0
+    state = {}
+
+    def handle_http_request(self, req):
+        StubBot.calls += 1
+        endpoint, action = req.params['endpoint'], req.params['action']
+        if endpoint == 'killswitch':
+            if action != 'status':
+                StubBot.state['enabled'] = action == 'enable'
+            return {'status': 200, 'body': {'enabled': StubBot.state['enabled']}}
+        if action != 'list':
+            StubBot.state['overrides'][req.get_json()['date']] = req.get_json().get('phrase')
+        return {'status': 200, 'body': {'overrides': StubBot.state['overrides']}}
+
+
+class StubRegistry:
+    def get(self, name):
+        return self
+
+    def create_bot(self):
+        return StubBot()
+
+
+@pytest.fixture
+def api(monkeypatch):
+    monkeypatch.setattr(function_app, 'REGISTRY', StubRegistry())
+    monkeypatch.setattr(function_app, '_bibi_api_cache', ResponseCache(30))
+    StubBot.calls = 0
+    StubBot.state = {'enabled': True, 'overrides': {}}
+    handler = function_app.bibi_quit_api._function.get_user_function()
+
+    def call(endpoint, action, method='GET', body=None, headers=None):
+        return handler(func.HttpRequest(method, '/api/bibi', headers=headers or {},
+                                        params={'endpoint': endpoint, 'action': action},
+                                        body=json.dumps(body).encode() if body is not None else b''))
+    return call
+
+
+def test_conditional_get_returns_304(api):
+    first = api('killswitch', 'status')
+    assert first.status_code == 200
+    etag = first.headers['ETag']
+
+    second = api('killswitch', 'status', headers={'If-None-Match': etag})
+    assert second.status_code == 304
+    assert second.get_body() == b''
+    assert StubBot.calls == 1
+
+
+def test_killswitch_change_invalidates_the_cached_status(api):
+    etag = api('killswitch', 'status').headers['ETag']
+    api('killswitch', 'disable', method='POST')
+
+    response = api('killswitch', 'status', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert json.loads(response.get_body()) == {'enabled': False}
+    assert StubBot.calls == 3
+
+
+def test_override_change_invalidates_the_cached_list(api):
+    assert json.loads(api('override', 'list').get_body()) == {'overrides': {}}
+    api('override', 'add', method='POST', body={'date': '2026-10-18', 'phrase': 'כן'})
+
+    assert json.loads(api('override', 'list').get_body()) == {'overrides': {'2026-10-18': 'כן'}}
+    assert StubBot.calls == 3
@@ -0,0 +1,36 @@
+import json
+import logging
+
+from bot_engines import instrumentation
+from bot_engines.mention_reply_bot import EVENTS_PREFIX, EventBuffer
+
+
+def logged_json(caplog, prefix):
+    [message] = [record.getMessage() for record in caplog.records if record.getMessage().startswith(prefix)]
+    return json.loads(message[len(prefix):])
+
+
+def test_run_metrics_are_in_the_message(caplog):
+    caplog.set_level(logging.INFO)
+    with instrumentation.instrumented_run('tehilim', 'sequential'):
+        instrumentation.count('twitter_calls', 2)
+        with instrumentation.phase('post'):
+            pass
+
+    data = logged_json(caplog, instrumentation.METRICS_PREFIX)
+    assert data['bot'] == 'tehilim'
+    assert data['ok'] is True
+    assert data['counters'] == {'twitter_calls': 2}
+    assert 'post' in data['phases_ms']
+
+
+def test_mention_events_are_in_the_message(caplog):
+    caplog.set_level(logging.INFO)
+    events = EventBuffer('no_bot')
+    events.add('replied', id='2')
+    events.add('replied', id='3')
+    events.flush()
+
+    data = logged_json(caplog, EVENTS_PREFIX)
+    assert data['counts'] == {'replied': 2}
+    assert [event['id'] for event in data['events']] == ['2', '3']
@@ -0,0 +1,93 @@
+import pytest
+
+from benchmark_fakes import CallLog, FakeTwitterClient, _Response, _Tweet
+from bot_engines import mention_reply_bot
+from bot_engines.mention_reply_bot import MentionReplyBot
+
+
+class MentionsTimeline(FakeTwitterClient):
+    """Mentions with ids 1..n, served newest first with since_id, until_id and pagination like X"""
+
+    def __init__(self, log):
+        super().__init__(log, reject_duplicates=False)
+        self.mentions = []
+        self.replied_to = []
+
+    def create_tweet(self, text=None, in_reply_to_tweet_id=None, **kwargs):
+        self.replied_to.append(int(in_reply_to_tweet_id))
+        return super().create_tweet(text, **kwargs)
+
+    def mention(self, count):
+        start = len(self.mentions) + 1
+        self.mentions.extend(range(start, start + count))
+
+    def get_users_mentions(self, id, since_id=None, until_id=None, pagination_token=None, max_results=10, **kwargs):
+        self.log.call('twitter_get_users_mentions')
+        ids = [i for i in reversed(self.mentions)
+               if (since_id is None or i > int(since_id)) and (until_id is None or i < int(until_id))]
+        offset = int(pagination_token or 0)
+        page = ids[offset:offset + max_results]
+        if not page:
+            return _Response(None, {'result_count': 0})
+        meta = {'result_count': len(page), 'newest_id': str(page[0]), 'oldest_id': str(page[-1])}
+        if offset + max_results < len(ids):
+            meta['next_token'] = str(offset + max_results)
+        return _Response([_Tweet(i, '@bot hi', author_id=2) for i in page], meta)
+
+
+@pytest.fixture
+def timeline(monkeypatch, blob_service):
+    client = MentionsTimeline(CallLog())
+    monkeypatch.setattr(mention_reply_bot, 'get_blob_service_client', lambda connection_string: blob_service)
+    monkeypatch.setattr(mention_reply_bot, 'get_twitter_client', lambda config: client)
+    return client
+
+
+def make_bot(**config):
+    return MentionReplyBot({
+        'consumer_key': 'key',
+        'consumer_secret': 'secret',
+        'access_token': '1-token',
+        'access_token_secret': 'token-secret',
+        'blob_connection_string': 'UseDevelopmentStorage=true',
+        'bot_name': 'test',
+        'reply_text': 'hi',
+        'page_size': 5,
+        'max_pages': 2,
+        'max_replies_per_run': 100,
+        'max_pending': 100,
+        **config
+    })
+
+
+def test_backlog_beyond_max_pages_is_fetched_by_later_runs(timeline):
+    timeline.mention(1)
+    make_bot().run()
+    assert make_bot().get_state()['since_id'] == '1'
+
+    timeline.mention(25)
+    fetched = [make_bot().run()['mentions'] for _ in range(3)]
+    assert fetched == [10, 10, 5]
+    state = make_bot().get_state()
+    assert state['since_id'] == '26'
+    assert 'backlog' not in state
+    assert sorted(timeline.replied_to) == list(range(2, 27))
+
+    # Caught up: back to polling for new mentions only
+    timeline.mention(1)
+    assert make_bot().run()['mentions'] == 1
+    assert make_bot().get_state()['since_id'] == '27'
+
+
+def test_backlog_is_kept_until_fetched(timeline):
+    timeline.mention(1)
+    make_bot().run()
+    timeline.mention(12)
+
+    make_bot().run()
+    assert make_bot().get_state()['backlog'] == {'since_id': '1', 'until_id': '4'}
+    make_bot().run()
+    state = make_bot().get_state()
+    assert 'backlog' not in state
+    assert state['since_id'] == '13'
+    assert sorted(timeline.replied_to) == list(range(2, 14))
@@ -0,0 +1,60 @@
+from bot_engines.posting import DUPLICATE, PERMANENT, TRANSIENT, Outbox, PostResult
+
+
+class ScriptedPoster:
+    """Returns the given results in order, recording each post"""
+
+    def __init__(self, *results):
+        self.results = list(results)
+        self.posts = []
+
+    def post(self, text, **kwargs):
+        self.posts.append((text, kwargs))
+        return self.results.pop(0)
+
+
+class _Posted:
+    def __init__(self, tweet_id):
+        self.data = {'id': tweet_id}
+
+
+def posted(tweet_id):
+    return PostResult(True, response=_Posted(tweet_id))
+
+
+def test_thread_parts_reply_to_each_other():
+    outbox = Outbox()
+    assert outbox.enqueue_thread(['one', 'two', 'three'], in_reply_to='10')
+    poster = ScriptedPoster(posted('11'), posted('12'), posted('13'))
+
+    assert outbox.drain(poster)
+    assert poster.posts == [('one', {'in_reply_to_tweet_id': '10'}), ('two', {'in_reply_to_tweet_id': '11'}),
+                            ('three', {'in_reply_to_tweet_id': '12'})]
+    assert [tweet_id for _, tweet_id in outbox.posted] == ['11', '12', '13']
+
+
+def test_permanent_failure_is_dropped_and_retryable_one_kept():
+    outbox = Outbox()
+    outbox.enqueue('one')
+    outbox.enqueue('two')
+    poster = ScriptedPoster(PostResult(False, kind=PERMANENT), PostResult(False, kind=TRANSIENT))
+
+    assert not outbox.drain(poster)
+    assert [entry['text'] for entry in outbox.entries] == ['two']
+
+
+def test_duplicate_counts_as_sent_without_an_id():
+    outbox = Outbox()
+    outbox.enqueue_thread(['one', 'two'])
+    poster = ScriptedPoster(PostResult(False, kind=DUPLICATE), posted('12'))
+
+    assert outbox.drain(poster)
+    # The duplicate's id is unknown, so the next part goes out on its own
+    assert poster.posts[1] == ('two', {})
+
+
+def test_full_outbox_refuses_whole_threads():
+    outbox = Outbox(max_entries=3)
+    assert outbox.enqueue('one')
+    assert not outbox.enqueue_thread(['two', 'three', 'four'])
+    assert len(outbox) == 1
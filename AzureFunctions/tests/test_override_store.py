@@ -0,0 +1,73 @@
+import pytest
+
+from bot_engines.override_store import (OverrideStore, apply_bulk_operations, parse_bulk_operations,
+                                        validate_bulk_operations)
+
+
+def test_overrides_are_kept_in_date_order():
+    store = OverrideStore({'2026-12-01': 'c', '2026-01-01': 'a'})
+    assert store.add('2026-06-01', 'b')
+    assert list(store.to_dict()) == ['2026-01-01', '2026-06-01', '2026-12-01']
+    assert not store.add('2026-06-01', 'b')
+    assert store.add('2026-06-01', 'B')
+    assert len(store) == 3
+
+
+def test_remove_and_expire():
+    store = OverrideStore({'2026-01-01': 'a', '2026-06-01': 'b', '2026-12-01': 'c'})
+    assert store.remove('2026-06-01')
+    assert not store.remove('2026-06-01')
+    assert store.expire_through('2026-01-01') == 1
+    assert store.to_dict() == {'2026-12-01': 'c'}
+    assert store.expire_through('2026-11-30') == 0
+
+
+@pytest.mark.parametrize('body', [
+    b'[{"op": "add", "date": "2026-01-01", "phrase": "a"}, {"op": "remove", "date": "2026-01-02"}]',
+    '{"operations": [{"op": "add", "date": "2026-01-01", "phrase": "a"}, {"op": "remove", "date": "2026-01-02"}]}',
+    '{"op": "add", "date": "2026-01-01", "phrase": "a"}\n\n{"op": "remove", "date": "2026-01-02"}\n',
+], ids=['list', 'object', 'ndjson'])
+def test_parse_bulk_formats(body):
+    assert [op['op'] for op in parse_bulk_operations(body)] == ['add', 'remove']
+
+
+@pytest.mark.parametrize('body', [
+    '{"op": "add", "date": "2026-01-01", "phrase": "a"}',
+    '{"op": "add", "date": "2026-01-01", "phrase": "a"}\n',
+    b'{"op": "add", "date": "2026-01-01", "phrase": "a"}\r\n',
+], ids=['bare', 'newline', 'crlf'])
+def test_parse_single_line_ndjson(body):
+    assert parse_bulk_operations(body) == [{'op': 'add', 'date': '2026-01-01', 'phrase': 'a'}]
+
+
+@pytest.mark.parametrize('body', ['[1, 2]', 'not json', '{"operations": {}}', '"add"', '{"op": "add"}\n[]'])
+def test_parse_bulk_rejects(body):
+    with pytest.raises(ValueError):
+        parse_bulk_operations(body)
+
+
+def test_validate_bulk_reports_each_bad_operation():
+    normalized, errors = validate_bulk_operations([
+        {'op': 'add', 'date': '2026-01-01', 'phrase': 'a'},
+        {'action': 'remove', 'date': '2026-01-02'},
+        {'op': 'add', 'date': '01/03/2026', 'phrase': 'a'},
+        {'op': 'add', 'date': '2026-01-04'},
+        {'op': 'add', 'date': '2026-01-05', 'phrase': '日' * 141},
+        {'op': 'rename', 'date': '2026-01-06'},
+        {'op': 'add', 'date': None, 'phrase': 'a'},
+    ])
+    assert normalized == [('add', '2026-01-01', 'a'), ('remove', '2026-01-02', None)]
+    assert [error.split(':')[0] for error in errors] == [f"Operation {i}" for i in (2, 3, 4, 5, 6)]
+
+
+def test_apply_bulk_in_order():
+    store = OverrideStore({'2026-01-01': 'a'})
+    summary = apply_bulk_operations(store, [
+        ('add', '2026-01-01', 'a'),
+        ('add', '2026-01-02', 'b'),
+        ('remove', '2026-01-02', None),
+        ('remove', '2026-01-03', None),
+        ('add', '2026-01-02', 'c'),
+    ])
+    assert summary == {'added': 2, 'unchanged': 1, 'removed': 1, 'not_found': 1}
+    assert store.to_dict() == {'2026-01-01': 'a', '2026-01-02': 'c'}
@@ -0,0 +1,46 @@
+def fail_final_save(bot):
+    """Let the journal entry be saved, then fail the save after the post"""
+    saves = []
+    save_state = bot.save_state
+
+    def flaky_save(state):
+        saves.append(state)
+        return save_state(state) if len(saves) == 1 else False
+
+    bot.save_state = flaky_save
+    return saves
+
+
+def test_failed_final_save_is_reconciled_from_the_timeline(twitter, sequential_bot):
+    bot = sequential_bot()
+    fail_final_save(bot)
+    bot.run()
+    assert len(twitter.timeline) == 1
+    assert bot.get_state()['journal'].keys() == {'position', 'hash', 'started_at'}
+
+    sequential_bot().run()
+
+    assert len(twitter.timeline) == 1
+    assert twitter.log.counts['twitter_create_tweet'] == 1
+    state = sequential_bot().get_state()
+    assert state['position'] == 1
+    assert state['journal']['tweet_id'] == str(twitter.timeline[0].id)
+
+
+def test_failed_final_save_falls_back_to_duplicate_detection(twitter, sequential_bot):
+    bot = sequential_bot()
+    fail_final_save(bot)
+    bot.run()
+
+    def no_read_access(*args, **kwargs):
+        raise RuntimeError("403 Forbidden")
+
+    twitter.get_users_tweets = no_read_access
+    sequential_bot().run()
+
+    # Posted again, refused as a duplicate, and counted as posted
+    assert len(twitter.timeline) == 1
+    assert twitter.log.counts['twitter_create_tweet'] == 2
+    state = sequential_bot().get_state()
+    assert state['position'] == 1
+    assert state['journal']['tweet_id'] is None
@@ -0,0 +1,168 @@
+import pytest
+import requests
+import tweepy
+
+from benchmark_fakes import (_HttpResponse, _Response, duplicate_error, forbidden_error, rate_limited_error,
+                             unauthorized_error)
+from bot_engines import posting
+from bot_engines.posting import (ACCESS, DUPLICATE, PERMANENT, RATE_LIMITED, TRANSIENT, TweetPoster, classify_error,
+                                 server_delay)
+
+NOW = 1_000_000
+
+
+def limits(prefix, remaining, reset):
+    return {f'{prefix}-limit': '17', f'{prefix}-remaining': str(remaining), f'{prefix}-reset': str(reset)}
+
+
+def test_server_delay_waits_for_the_15_minute_window():
+    error = rate_limited_error(limits('x-rate-limit', 0, NOW + 300))
+    assert server_delay(error, now=NOW) == 300
+
+
+def test_server_delay_prefers_an_exhausted_24_hour_window():
+    headers = {**limits('x-rate-limit', 3, NOW + 300), **limits('x-user-limit-24hour', 0, NOW + 40000)}
+    assert server_delay(rate_limited_error(headers), now=NOW) == 40000
+    headers = {**limits('x-rate-limit', 0, NOW + 300), **limits('x-app-limit-24hour', 0, NOW + 7200)}
+    assert server_delay(rate_limited_error(headers), now=NOW) == 7200
+
+
+def test_server_delay_falls_back_to_retry_after():
+    assert server_delay(rate_limited_error({'retry-after': '12'}), now=NOW) == 12
+    assert server_delay(rate_limited_error({}), now=NOW) is None
+
+
+def test_daily_cap_is_not_retried_within_the_time_budget(monkeypatch):
+    calls = []
+
+    class Client:
+        def create_tweet(self, **kwargs):
+            calls.append(kwargs)
+            # The 15-minute window resets soon, but the user's 24-hour cap is used up
+            raise rate_limited_error({**limits('x-rate-limit', 5, NOW + 30),
+                                      **limits('x-user-limit-24hour', 0, NOW + 80000)})
+
+    monkeypatch.setattr(posting.time, 'time', lambda: NOW)
+    poster = TweetPoster(Client(), time_budget_seconds=60, sleep=lambda seconds: None)
+    result = poster.post('text')
+
+    assert result.kind == RATE_LIMITED
+    assert len(calls) == 1
+    assert poster.blocked == RATE_LIMITED
+
+
+# =============================================================================
+# Error classification and retries
+# =============================================================================
+
+def http_error(error_class, status_code, reason, headers=None, **response_json):
+    return error_class(_HttpResponse(status_code, reason, headers), response_json=response_json)
+
+
+@pytest.mark.parametrize('error, kind', [
+    (lambda: rate_limited_error({}), RATE_LIMITED),
+    (lambda: http_error(tweepy.TwitterServerError, 503, 'Service Unavailable'), TRANSIENT),
+    (lambda: ConnectionError('reset by peer'), TRANSIENT),
+    (lambda: requests.Timeout('read timed out'), TRANSIENT),
+    (duplicate_error, DUPLICATE),
+    (lambda: forbidden_error(186, 'Tweet needs to be a bit shorter.'), PERMANENT),
+    (lambda: http_error(tweepy.BadRequest, 400, 'Bad Request', detail='Invalid text'), PERMANENT),
+    (lambda: http_error(tweepy.NotFound, 404, 'Not Found'), PERMANENT),
+    (unauthorized_error, ACCESS),
+    (lambda: forbidden_error(453, 'You currently have access to a subset of X API V2 endpoints only.'), ACCESS),
+])
+def test_classify_error(error, kind):
+    assert classify_error(error()) == kind
+
+
+class ScriptedClient:
+    """create_tweet raising or answering from a script, one step per call"""
+
+    def __init__(self, *steps):
+        self.steps = list(steps)
+        self.calls = []
+        self.ids = iter(range(100, 200))
+
+    def create_tweet(self, text=None, **kwargs):
+        self.calls.append((text, kwargs))
+        step = self.steps.pop(0) if self.steps else None
+        if step is not None:
+            raise step()
+        return _Response({'id': str(next(self.ids)), 'text': text})
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Wall and monotonic time that only the poster's sleep moves"""
+    now = [float(NOW)]
+    monkeypatch.setattr(posting.time, 'time', lambda: now[0])
+    clock = lambda: now[0]
+    clock.sleeps = []
+
+    def sleep(seconds):
+        clock.sleeps.append(seconds)
+        now[0] += seconds
+    clock.sleep = sleep
+    return clock
+
+
+def make_poster(client, clock, **kwargs):
+    return TweetPoster(client, sleep=clock.sleep, clock=clock, **kwargs)
+
+
+def test_rate_limit_waits_for_the_reset(clock):
+    client = ScriptedClient(lambda: rate_limited_error(limits('x-rate-limit', 0, NOW + 20)))
+    result = make_poster(client, clock, time_budget_seconds=60).post('text')
+    assert result.ok and result.attempts == 2
+    assert clock.sleeps == [20]
+
+
+def test_rate_limit_past_the_budget_blocks_the_run(clock):
+    client = ScriptedClient(lambda: rate_limited_error(limits('x-rate-limit', 0, NOW + 600)))
+    poster = make_poster(client, clock, time_budget_seconds=60)
+    assert poster.post('one').kind == RATE_LIMITED
+    # Later posts of the run are deferred without calling X
+    assert poster.post('two').kind == RATE_LIMITED
+    assert len(client.calls) == 1
+    assert clock.sleeps == []
+
+
+def test_server_errors_back_off_and_retry(clock, monkeypatch):
+    monkeypatch.setattr(posting.random, 'uniform', lambda low, high: high)
+    server_error = lambda: http_error(tweepy.TwitterServerError, 503, 'Service Unavailable')
+    client = ScriptedClient(server_error, server_error)
+    result = make_poster(client, clock, base_delay=2.0).post('text')
+    assert result.ok and result.attempts == 3
+    assert clock.sleeps == [2.0, 4.0]
+
+
+def test_server_errors_give_up_after_max_attempts(clock):
+    server_error = lambda: http_error(tweepy.TwitterServerError, 502, 'Bad Gateway')
+    client = ScriptedClient(*[server_error] * 5)
+    result = make_poster(client, clock, max_attempts=3).post('text')
+    assert result.kind == TRANSIENT and result.retryable
+    assert len(client.calls) == 3
+
+
+@pytest.mark.parametrize('error, kind', [
+    (duplicate_error, DUPLICATE),
+    (lambda: http_error(tweepy.BadRequest, 400, 'Bad Request', detail='Invalid text'), PERMANENT),
+])
+def test_refusals_are_not_retried(clock, error, kind):
+    client = ScriptedClient(error)
+    result = make_poster(client, clock).post('text')
+    assert result.kind == kind and not result.retryable
+    assert len(client.calls) == 1
+    assert clock.sleeps == []
+
+
+def test_thread_stops_at_the_failed_part(clock):
+    bad_request = lambda: http_error(tweepy.BadRequest, 400, 'Bad Request', detail='Invalid text')
+    client = ScriptedClient(None, bad_request)
+    result = make_poster(client, clock).post_thread(['one', 'two', 'three'])
+
+    assert result.ok
+    assert result.thread_ids == ['100']
+    assert result.unsent == ['two', 'three']
+    assert client.calls[1] == ('two', {'in_reply_to_tweet_id': '100'})
+    assert len(client.calls) == 2
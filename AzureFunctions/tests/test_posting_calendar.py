@@ -0,0 +1,82 @@
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+import pytest
+
+from benchmark_fakes import FakeHttpRequest
+from bot_engines.content_pack import open_content
+from bot_engines.posting_calendar import PostingCalendar
+from bot_engines.schedule import DailySchedule, IntervalSchedule
+from bot_engines.sequential_content_bot import MAX_CALENDAR_PAGE
+
+JERUSALEM = ZoneInfo('Asia/Jerusalem')
+# Israel leaves DST on 2026-10-25 at 02:00
+NOW = datetime(2026, 10, 20, 12, 0, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def bot(sequential_bot):
+    return sequential_bot(schedule=DailySchedule(JERUSALEM, 23))
+
+
+def calendar_body(bot, schedule=None, position=0, **params):
+    content = open_content(bot.config)
+    index = content.cursor_index()
+    calendar = PostingCalendar(schedule or bot.config['schedule'], index, position, NOW)
+    return bot.calendar_request(params, content, index, calendar)
+
+
+@pytest.mark.parametrize('schedule', [DailySchedule(JERUSALEM, 23), IntervalSchedule(2, 1)],
+                         ids=['daily', 'interval'])
+def test_entries_follow_the_schedule_across_dst(bot, schedule):
+    body = calendar_body(bot, schedule, position=5, count='40', tz='Asia/Jerusalem')
+    expected = list(schedule.fires(0, 40, NOW))
+    assert [entry['post_at'] for entry in body['entries']] == [t.astimezone(JERUSALEM).isoformat() for t in expected]
+    assert [entry['position'] for entry in body['entries']] == list(range(5, 45))
+
+
+def test_daily_posts_keep_the_local_hour_across_dst(bot):
+    body = calendar_body(bot, count='8', tz='Asia/Jerusalem')
+    times = [datetime.fromisoformat(entry['post_at']) for entry in body['entries']]
+    assert {t.hour for t in times} == {23}
+    assert {t.astimezone(timezone.utc).hour for t in times} == {20, 21}
+
+
+def test_pages_of_a_range(bot):
+    params = {'from': '2026-10-21T00:00', 'to': '2026-11-02T00:00', 'tz': 'Asia/Jerusalem'}
+    whole = calendar_body(bot, count='50', **params)
+    assert whole['count'] == 12
+    assert 'next_start' not in whole
+
+    entries, start = [], 0
+    while start is not None:
+        page = calendar_body(bot, count='5', start=str(start), **params)
+        assert page['start'] == start
+        entries.extend(page['entries'])
+        start = page.get('next_start')
+    assert entries == whole['entries']
+
+
+def test_endless_range_always_has_a_next_page(bot):
+    first = calendar_body(bot, count='3')
+    second = calendar_body(bot, count='3', start=str(first['next_start']))
+    assert first['next_start'] == 3
+    assert [entry['position'] for entry in second['entries']] == [3, 4, 5]
+    assert datetime.fromisoformat(second['entries'][0]['post_at']) - \
+        datetime.fromisoformat(first['entries'][-1]['post_at']) <= timedelta(days=1, hours=1)
+
+
+@pytest.mark.parametrize('params', [
+    {'count': str(MAX_CALENDAR_PAGE + 1)}, {'count': '0'}, {'start': '-1'}, {'count': 'all'},
+])
+def test_page_limits(bot, params):
+    response = bot.handle_http_request(FakeHttpRequest({'action': 'calendar', **params}))
+    assert response['status'] == 400
+
+
+def test_when_an_item_goes_out(bot):
+    # Psalm 2:3 is two posts after 2:1 (position 6)
+    body = calendar_body(bot, position=6, major='2', minor='3')
+    assert body['position'] == 8
+    assert body['posts_before'] == 2
+    assert body['post_at'] == DailySchedule(JERUSALEM, 23).nth_fire(2, NOW).isoformat()
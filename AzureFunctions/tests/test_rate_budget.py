@@ -0,0 +1,103 @@
+import pytest
+
+from bot_engines.blob_state import BlobStateStore
+from bot_engines.rate_budget import RateBudget, CREATE_TWEET, LIKE, _refill
+
+CONFIG = {'consumer_key': 'app', 'access_token': 'user'}
+NOW = 1_000_000
+
+
+def headers(remaining, limit=5, reset=NOW + 900):
+    return {'x-rate-limit-limit': str(limit), 'x-rate-limit-remaining': str(remaining),
+            'x-rate-limit-reset': str(reset)}
+
+
+@pytest.fixture
+def clock():
+    now = [NOW]
+    clock = lambda: now[0]
+    clock.now = now
+    return clock
+
+
+@pytest.fixture
+def store(blob_service):
+    return BlobStateStore(blob_service, 'bot-state')
+
+
+def test_refill_after_reset():
+    bucket = {'limit': 5, 'remaining': 0, 'reset': 100, 'window': 60}
+    _refill(bucket, 99)
+    assert bucket['remaining'] == 0
+    _refill(bucket, 100)
+    assert bucket == {'limit': 5, 'remaining': 5, 'reset': 160, 'window': 60}
+    bucket['remaining'] = 1
+    _refill(bucket, 400)
+    assert bucket == {'limit': 5, 'remaining': 5, 'reset': 460, 'window': 60}
+
+
+def test_unknown_endpoint_is_allowed(store, clock):
+    budget = RateBudget(store, CONFIG, clock=clock)
+    token = budget.acquire(CREATE_TWEET)
+    assert token.wait == 0
+    # No headers and no bucket: nothing to store
+    budget.observe(token, {})
+    assert store.read(budget.blob_name) is None
+
+
+def test_defers_until_the_window_resets(store, clock):
+    budget = RateBudget(store, CONFIG, clock=clock)
+    budget.observe(budget.acquire(CREATE_TWEET), headers(remaining=1))
+    budget.observe(budget.acquire(CREATE_TWEET), headers(remaining=1))
+    # The budget took the second call's token although X still reported 1 left
+    assert store.read(budget.blob_name)['buckets']['create_tweet|15m']['remaining'] == 0
+
+    clock.now[0] += 300
+    assert budget.acquire(CREATE_TWEET).wait == 600
+    clock.now[0] += 600
+    assert budget.acquire(CREATE_TWEET).wait == 0
+
+
+def test_one_read_and_one_write_per_call(store, blob_service, clock):
+    budget = RateBudget(store, CONFIG, clock=clock)
+    budget.observe(budget.acquire(CREATE_TWEET), headers(remaining=4))
+    blob_service.log.counts.clear()
+
+    budget.observe(budget.acquire(CREATE_TWEET), headers(remaining=3))
+    assert blob_service.log.counts['blob_get'] == 1
+    assert blob_service.log.counts['blob_put'] == 1
+
+
+def test_deferred_token_is_not_settled(store, blob_service, clock):
+    budget = RateBudget(store, CONFIG, clock=clock)
+    budget.observe(budget.acquire(LIKE), headers(remaining=0))
+    token = budget.acquire(LIKE)
+    assert token.wait
+    puts = blob_service.log.counts['blob_put']
+    budget.observe(token, headers(remaining=0))
+    assert blob_service.log.counts['blob_put'] == puts
+
+
+def test_one_blob_per_credentials(store, clock):
+    first = RateBudget(store, CONFIG, clock=clock)
+    other_user = RateBudget(store, {**CONFIG, 'access_token': 'other'}, clock=clock)
+    assert first.blob_name != other_user.blob_name
+    assert 'user' not in first.blob_name
+
+    first.observe(first.acquire(CREATE_TWEET), headers(remaining=0))
+    assert first.acquire(CREATE_TWEET).wait
+    assert other_user.acquire(CREATE_TWEET).wait == 0
+
+
+def test_storage_failure_lets_the_call_through(clock):
+    class BrokenStore:
+        def read_with_etag(self, blob_name):
+            raise ConnectionError("storage down")
+
+        def update(self, *args, **kwargs):
+            raise ConnectionError("storage down")
+
+    budget = RateBudget(BrokenStore(), CONFIG, clock=clock)
+    token = budget.acquire(CREATE_TWEET)
+    assert token.wait == 0
+    budget.observe(token, headers(remaining=0))
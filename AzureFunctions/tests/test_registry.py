@@ -0,0 +1,69 @@
+import json
+import logging
+import os
+
+from bot_engines.registry import BotRegistry
+
+REGISTRY_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'bots.json')
+
+
+def registry_of(tmp_path, bots):
+    path = tmp_path / 'bots.json'
+    path.write_text(json.dumps({'bots': bots}))
+    return BotRegistry(str(path))
+
+
+def mention_bot(name, **spec):
+    return {'name': name, 'engine': 'mention_reply', 'credentials_prefix': name.upper(), **spec}
+
+
+def set_credentials(monkeypatch, prefix):
+    for key in ('CONSUMER_KEY', 'CONSUMER_SECRET', 'ACCESS_TOKEN', 'ACCESS_TOKEN_SECRET'):
+        monkeypatch.setenv(f'{prefix}_{key}', 'value')
+
+
+def test_mention_bot_is_disabled_by_default():
+    assert BotRegistry(REGISTRY_PATH).get('no_bot').enabled is False
+
+
+def test_runnable_skips_disabled_bots_and_missing_credentials(tmp_path, monkeypatch, caplog):
+    registry = registry_of(tmp_path, [mention_bot('ready'), mention_bot('off', enabled=False),
+                                      mention_bot('unset')])
+    set_credentials(monkeypatch, 'READY')
+    set_credentials(monkeypatch, 'OFF')
+    monkeypatch.delenv('UNSET_ACCESS_TOKEN', raising=False)
+
+    with caplog.at_level(logging.WARNING):
+        assert [spec.name for spec in registry.runnable('mention_reply')] == ['ready']
+    assert 'UNSET_ACCESS_TOKEN' in caplog.text
+    assert "'off'" not in caplog.text
+
+
+def test_invalid_entries_are_skipped(tmp_path, caplog):
+    with caplog.at_level(logging.ERROR):
+        registry = registry_of(tmp_path, [mention_bot('first'), {'name': 'typo', 'engine': 'sequentail'},
+                                          {'engine': 'mention_reply'}, 'no_bot', mention_bot('last'),
+                                          {'name': 'anonymous', 'engine': 'mention_reply'}])
+    assert registry.names() == ['first', 'last']
+    assert "unknown engine 'sequentail'" in caplog.text
+    assert "'anonymous': missing 'credentials_prefix'" in caplog.text
+
+
+def test_unreadable_registry_is_empty(tmp_path, caplog):
+    path = tmp_path / 'bots.json'
+    path.write_text('{"bots": [')
+    with caplog.at_level(logging.ERROR):
+        registry = BotRegistry(str(path))
+    assert registry.names() == []
+    assert registry.due() == []
+    assert 'could not be loaded' in caplog.text
+
+
+def test_placeholder_credentials_count_as_missing(tmp_path, monkeypatch):
+    registry = registry_of(tmp_path, [mention_bot('no_bot')])
+    set_credentials(monkeypatch, 'NO_BOT')
+    monkeypatch.setenv('NO_BOT_ACCESS_TOKEN', 'PLACEHOLDER')
+    monkeypatch.setenv('NO_BOT_CONSUMER_KEY', ' ')
+
+    assert registry.get('no_bot').missing_credentials() == ['NO_BOT_CONSUMER_KEY', 'NO_BOT_ACCESS_TOKEN']
+    assert registry.runnable('mention_reply') == []
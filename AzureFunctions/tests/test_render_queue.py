@@ -0,0 +1,87 @@
+import os
+import shutil
+import unicodedata
+
+import pytest
+
+from bot_engines.content_pack import open_content
+from bot_engines.render_queue import content_fingerprint
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Data')
+
+
+@pytest.fixture
+def pack_copy(tmp_path):
+    path = str(tmp_path / 'tehilim.pack')
+    shutil.copy(os.path.join(DATA_DIR, 'tehilim.pack'), path)
+    return path
+
+
+def test_fingerprint_follows_templates_and_content(pack_copy):
+    config = {'template': '{}\n~ {}', 'content_pack_path': pack_copy}
+    fingerprint = content_fingerprint(config)
+    assert content_fingerprint(dict(config)) == fingerprint
+
+    assert content_fingerprint({**config, 'template': '{} ({})'}) != fingerprint
+    assert content_fingerprint({**config, 'description_template': 'פרק {}'}) != fingerprint
+    assert content_fingerprint({**config, 'minor_label_format': 'gematria'}) != fingerprint
+
+    # A rebuilt content file, even of the same size
+    stat = os.stat(pack_copy)
+    os.utime(pack_copy, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    assert content_fingerprint(config) != fingerprint
+
+
+def posted(twitter):
+    return twitter.timeline[-1].text
+
+
+def rendered(bot, position):
+    """The post for a position rendered now, as it goes out (NFC, like split_tweet)"""
+    content = open_content(bot.config)
+    return unicodedata.normalize('NFC', bot.render_item(content, content.cursor_index(), position)['tweet_text'])
+
+
+def test_run_posts_from_a_fresh_queue(twitter, sequential_bot):
+    bot = sequential_bot(render_queue_size=3)
+    bot.refill_queue()
+    queue = bot.state_store.read(bot.queue_blob_name)
+    queue['items'][0]['text'] = 'from the queue'
+    bot.state_store.write(bot.queue_blob_name, queue)
+
+    sequential_bot(render_queue_size=3).run()
+    assert posted(twitter) == 'from the queue'
+
+
+def test_stale_queue_is_rendered_inline(twitter, sequential_bot):
+    sequential_bot(render_queue_size=3).refill_queue()
+    bot = sequential_bot(render_queue_size=3, template='{} ({} {})')
+    bot.run()
+    assert posted(twitter) == rendered(bot, 0)
+    assert posted(twitter).endswith("(א א)")
+
+
+def test_content_change_makes_the_queue_stale(twitter, sequential_bot, pack_copy):
+    bot = sequential_bot(render_queue_size=3, content_pack_path=pack_copy)
+    bot.refill_queue()
+    queue = bot.state_store.read(bot.queue_blob_name)
+    queue['items'][0]['text'] = 'from the queue'
+    bot.state_store.write(bot.queue_blob_name, queue)
+
+    stat = os.stat(pack_copy)
+    os.utime(pack_copy, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    sequential_bot(render_queue_size=3, content_pack_path=pack_copy).run()
+    assert posted(twitter) != 'from the queue'
+
+
+def test_missing_or_used_up_queue_is_rendered_inline(twitter, sequential_bot):
+    bot = sequential_bot(render_queue_size=1)
+    bot.run()
+    assert posted(twitter) == rendered(bot, 0)
+
+    # The queue covers position 1 only; position 2 is rendered at post time
+    bot.refill_queue()
+    for position in (1, 2):
+        sequential_bot(render_queue_size=1).run()
+        assert posted(twitter) == rendered(bot, position)
+    assert sequential_bot().get_state()['position'] == 3
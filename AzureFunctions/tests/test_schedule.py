@@ -0,0 +1,105 @@
+import json
+from datetime import date, datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+import pytest
+
+from bot_engines.registry import BotRegistry
+from bot_engines.schedule import DailySchedule, IntervalSchedule
+
+
+def utc(*args):
+    return datetime(*args, tzinfo=timezone.utc)
+
+
+# =============================================================================
+# IntervalSchedule
+# =============================================================================
+
+@pytest.mark.parametrize('every_hours, offset_hours', [
+    (0, 0), (-2, 0), (25, 0), (2, 2), (2, -1), (24, 24), (2.5, 0), (2, '1'), (True, 0),
+])
+def test_interval_rejects_unreachable_hours(every_hours, offset_hours):
+    with pytest.raises(ValueError):
+        IntervalSchedule(every_hours, offset_hours)
+
+
+@pytest.mark.parametrize('every_hours, offset_hours, now, expected', [
+    (2, 0, utc(2026, 10, 18, 9, 15), utc(2026, 10, 18, 10)),
+    (2, 1, utc(2026, 10, 18, 9, 15), utc(2026, 10, 18, 11)),
+    (24, 23, utc(2026, 10, 18, 23, 0), utc(2026, 10, 19, 23)),
+    (5, 0, utc(2026, 10, 18, 21, 0), utc(2026, 10, 19, 0)),
+    (1, 0, utc(2026, 12, 31, 23, 59), utc(2027, 1, 1, 0)),
+])
+def test_interval_next_fire(every_hours, offset_hours, now, expected):
+    assert IntervalSchedule(every_hours, offset_hours).next_fire(now) == expected
+
+
+def test_invalid_schedule_is_skipped_by_the_registry(tmp_path):
+    bots = [{'name': name, 'engine': 'sequential', 'credentials_prefix': name.upper(),
+             'schedule': {'every_hours': 2, 'offset_hours': offset}} for name, offset in (('good', 0), ('broken', 3))]
+    path = tmp_path / 'bots.json'
+    path.write_text(json.dumps({'bots': bots}))
+    registry = BotRegistry(str(path))
+
+    assert [spec.name for spec in registry.due(utc(2026, 10, 18, 10))] == ['good']
+    with pytest.raises(ValueError):
+        registry.get('broken').schedule
+
+
+# =============================================================================
+# DailySchedule
+# =============================================================================
+
+JERUSALEM = ZoneInfo('Asia/Jerusalem')
+
+
+@pytest.mark.parametrize('target_hour, local_date, expected', [
+    (23, date(2026, 1, 15), utc(2026, 1, 15, 21)),
+    (23, date(2026, 7, 15), utc(2026, 7, 15, 20)),
+    # 02:00 does not exist on the spring-forward night: the post goes out at 03:00 IDT
+    (2, date(2026, 3, 27), utc(2026, 3, 27, 0)),
+    (2, date(2026, 3, 28), utc(2026, 3, 27, 23)),
+    # 01:00 happens twice on the fall-back night: the first one
+    (1, date(2026, 10, 25), utc(2026, 10, 24, 22)),
+])
+def test_daily_fire_instant_across_dst(target_hour, local_date, expected):
+    assert DailySchedule(JERUSALEM, target_hour).fire_instant(local_date) == expected
+
+
+def test_daily_cron_covers_both_utc_offsets():
+    schedule = DailySchedule(JERUSALEM, 23)
+    assert schedule.utc_hours(2026) == {20, 21}
+    assert schedule.cron_expression(2026) == "0 0 20,21 * * *"
+
+
+def test_daily_is_due_only_on_the_local_hour():
+    schedule = DailySchedule(JERUSALEM, 23)
+    assert schedule.due_instant(utc(2026, 7, 15, 20, 10)) == utc(2026, 7, 15, 20)
+    # The other cron hour of the year is the off-target invocation
+    assert not schedule.is_due(utc(2026, 7, 15, 21))
+    assert schedule.is_due(utc(2026, 1, 15, 21))
+
+
+def test_daily_retry_slots():
+    schedule = DailySchedule(JERUSALEM, 23, retry_hours=2)
+    assert schedule.retry_instant(utc(2026, 7, 15, 22)) == utc(2026, 7, 15, 22)
+    assert schedule.retry_instant(utc(2026, 7, 15, 23)) is None
+    assert schedule.retry_deadline(utc(2026, 7, 15, 20)) == utc(2026, 7, 15, 22, 30)
+
+
+@pytest.mark.parametrize('schedule', [
+    DailySchedule(JERUSALEM, 2),
+    DailySchedule(JERUSALEM, 23),
+    IntervalSchedule(5, 3),
+    IntervalSchedule(24, 0),
+], ids=['daily-02', 'daily-23', 'every-5h', 'every-24h'])
+def test_fire_index_counts_the_fires_before_an_instant(schedule):
+    now = utc(2026, 3, 20, 12, 7)
+    fires = list(schedule.fires(0, 30, now))
+    assert fires[0] == schedule.next_fire(now)
+    assert all(schedule.nth_fire(n, now) == fire for n, fire in enumerate(fires))
+    for n, fire in enumerate(fires[:-1]):
+        assert schedule.fire_index(fire, now) == n
+        assert schedule.fire_index(fire + timedelta(minutes=1), now) == n + 1
+    assert schedule.fire_index(now, now) == 0
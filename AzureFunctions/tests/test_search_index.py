@@ -0,0 +1,106 @@
+import json
+import os
+
+import pytest
+
+from benchmark_fakes import FakeHttpRequest
+from bot_engines.content_pack import open_pack
+from bot_engines.search_index import SearchIndex, _encode_postings, _stems, tokenize, write_index
+from bot_engines.sequential_content_bot import MAX_SEARCH_RESULTS
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Data')
+
+
+@pytest.fixture(scope='module')
+def tehilim():
+    pack = open_pack(os.path.join(DATA_DIR, 'tehilim.pack'))
+    index = pack.cursor_index()
+    return pack, index, [pack.text(*index.locate(position)) for position in range(index.total)]
+
+
+def build(tmp_path, texts, name='test.idx'):
+    path = str(tmp_path / name)
+    write_index(path, texts)
+    return SearchIndex(path)
+
+
+def test_tokenize_normalises_hebrew():
+    # Niqqud and cantillation dropped, final forms folded, the split divine name joined
+    assert tokenize('מִזְמוֹר לְדָוִד יְ־הוָ־ה רֹעִי לֹא אֶחְסָר') == ['מזמור', 'לדוד', 'יהוה', 'רעי', 'לא', 'אחסר']
+    assert tokenize('הָאָרֶץ') == ['הארצ']
+
+
+def test_stems_strip_up_to_two_prefix_letters():
+    assert list(_stems('והארצ', 2)) == ['והארצ', 'הארצ', 'ארצ']
+    assert list(_stems('בארצ', 2)) == ['בארצ', 'ארצ']
+    # Not a prefix letter, or too little left after it
+    assert list(_stems('ארצ', 2)) == ['ארצ']
+    assert list(_stems('של', 2)) == ['של']
+
+
+@pytest.mark.parametrize('positions', [[0], [5, 127, 128, 129], [0, 300, 16384, 16385 + 2 ** 21]])
+def test_postings_round_trip_as_leb128_deltas(tmp_path, positions):
+    out = bytearray()
+    _encode_postings(positions, out)
+    # One byte per 7 bits of each delta
+    deltas = [b - a for a, b in zip([0] + positions, positions)]
+    assert len(out) == sum(max(1, (delta.bit_length() + 6) // 7) for delta in deltas)
+
+    texts = [''] * (positions[-1] + 1)
+    for position in positions:
+        texts[position] = 'needle'
+    assert build(tmp_path, texts).word('needle') == positions
+
+
+def test_prefixed_forms_are_found(tmp_path):
+    search_index = build(tmp_path, ['הארץ', 'בארץ', 'והארץ', 'ארצות', 'ירושלים'])
+    assert search_index.word('ארצ') == []
+    assert search_index.prefix('ארצ') == [0, 1, 2, 3]
+    assert [position for position, _ in search_index.search('ארץ')] == [0, 1, 2, 3]
+    assert search_index.search('א') == []
+
+
+def test_whole_words_rank_before_prefix_matches(tmp_path):
+    search_index = build(tmp_path, ['ארצות הברית', 'ארץ ישראל'])
+    assert [position for position, _ in search_index.search('ארץ')] == [1, 0]
+
+
+def test_limit(tmp_path):
+    search_index = build(tmp_path, ['שלום'] * 30)
+    assert len(search_index.search('שלום')) == 10
+    assert [position for position, _ in search_index.search('שלום', limit=3)] == [0, 1, 2]
+
+
+def test_tehilim_build_and_query(tmp_path, tehilim):
+    pack, index, texts = tehilim
+    search_index = build(tmp_path, texts)
+    # The committed index is what write_index builds from the pack
+    with open(os.path.join(DATA_DIR, 'tehilim.idx'), 'rb') as committed, open(tmp_path / 'test.idx', 'rb') as built:
+        assert committed.read() == built.read()
+
+    text = lambda position: texts[position]
+    [(position, _)] = search_index.search('רעי לא אחסר', text=text)
+    assert index.locate(position) == (22, 0)
+    # Phrase matches rank first
+    assert index.locate(search_index.search('יהוה רעי', text=text)[0][0]) == (22, 0)
+    # "והארץ" and "בארץ" items are found from the bare word
+    found = {position for position, _ in search_index.search('ארץ', limit=1000)}
+    words = set().union(*(tokenize(texts[position]) for position in found))
+    assert {'ארצ', 'הארצ', 'והארצ', 'בארצ'} <= words
+
+
+def search_request(sequential_bot, **params):
+    bot = sequential_bot(search_index_path=os.path.join(DATA_DIR, 'tehilim.idx'))
+    return bot.handle_http_request(FakeHttpRequest({'action': 'search', **params}))
+
+
+def test_search_action(sequential_bot):
+    response = search_request(sequential_bot, q='רעי לא אחסר', limit='1')
+    assert response['status'] == 200
+    [result] = response['body']['results']
+    assert (result['major'], result['minor']) == (23, 1)
+
+
+@pytest.mark.parametrize('limit', ['0', str(MAX_SEARCH_RESULTS + 1), '100000', 'many'])
+def test_search_action_caps_the_limit(sequential_bot, limit):
+    assert search_request(sequential_bot, q='יהוה', limit=limit)['status'] == 400
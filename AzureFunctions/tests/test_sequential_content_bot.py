@@ -0,0 +1,179 @@
+import asyncio
+import json
+
+import pytest
+
+from benchmark_fakes import FakeHttpRequest, forbidden_error, unauthorized_error
+from bot_engines.async_sequential_content_bot import AsyncSequentialContentBot
+from bot_engines.blob_state import BlobStateStore
+
+
+def refuse_posts(twitter, error):
+    def create_tweet(text=None, **kwargs):
+        twitter.log.call('twitter_create_tweet')
+        raise error()
+
+    twitter.create_tweet = create_tweet
+
+
+def too_long():
+    return forbidden_error(186, 'Tweet needs to be a bit shorter.')
+
+
+def test_rejected_item_is_skipped_after_the_limit(twitter, sequential_bot):
+    refuse_posts(twitter, too_long)
+    for count in (1, 2):
+        sequential_bot(max_permanent_failures=3).run()
+        state = sequential_bot().get_state()
+        assert state['position'] == 0
+        assert state['failures'] == {'position': 0, 'count': count}
+
+    sequential_bot(max_permanent_failures=3).run()
+    state = sequential_bot().get_state()
+    assert state['position'] == 1
+    assert 'failures' not in state
+    assert twitter.log.counts['twitter_create_tweet'] == 3
+
+
+@pytest.mark.parametrize('error', [
+    unauthorized_error,
+    lambda: forbidden_error(453, 'You currently have access to a subset of X API V2 endpoints only.'),
+    lambda: forbidden_error(261, 'Application cannot perform write actions.'),
+], ids=['401', '403-453', '403-261'])
+def test_refused_access_stalls_without_skipping(twitter, sequential_bot, error):
+    refuse_posts(twitter, error)
+    for _ in range(5):
+        sequential_bot(max_permanent_failures=3).run()
+
+    state = sequential_bot().get_state()
+    assert state['position'] == 0
+    assert 'failures' not in state
+    assert 'outbox' not in state
+    # One call per run: no retries within a run
+    assert twitter.log.counts['twitter_create_tweet'] == 5
+
+
+def test_success_clears_the_failure_count(twitter, sequential_bot):
+    create_tweet = twitter.create_tweet
+    refuse_posts(twitter, too_long)
+    sequential_bot().run()
+    assert sequential_bot().get_state()['failures']['count'] == 1
+
+    twitter.create_tweet = create_tweet
+    sequential_bot().run()
+    state = sequential_bot().get_state()
+    assert state['position'] == 1
+    assert 'failures' not in state
+
+
+def seek(bot, **body):
+    return bot.handle_http_request(FakeHttpRequest({'action': 'seek'}, body=json.dumps(body).encode()))
+
+
+def test_seek_keeps_the_outbox(twitter, sequential_bot):
+    refuse_posts(twitter, too_long)
+    sequential_bot().run()
+    bot = sequential_bot()
+    state = bot.get_state()
+    state['outbox'] = [{'text': 'left over', 'queued_at': '2026-10-18T00:00:00+00:00'}]
+    bot.save_state(state)
+
+    response = seek(bot, position=0)
+    assert response['status'] == 200
+    assert response['body']['outbox'] == 1
+    state = bot.get_state()
+    assert [entry['text'] for entry in state['outbox']] == ['left over']
+    assert state['failures'] == {'position': 0, 'count': 1}
+
+    seek(bot, position=10)
+    state = bot.get_state()
+    assert state['position'] == 10
+    assert [entry['text'] for entry in state['outbox']] == ['left over']
+    assert 'failures' not in state
+
+
+# =============================================================================
+# Profile description
+# =============================================================================
+
+def record_descriptions(twitter_api, failures=0):
+    """Record the descriptions set on the profile; the first `failures` updates fail"""
+    descriptions = []
+
+    def update_profile(description=None, **kwargs):
+        descriptions.append(description)
+        if len(descriptions) <= failures:
+            raise ConnectionError("connection reset")
+
+    twitter_api.update_profile = update_profile
+    return descriptions
+
+
+def test_unchanged_description_is_not_set_again(twitter, twitter_api, sequential_bot):
+    descriptions = record_descriptions(twitter_api)
+    sequential_bot(description_template='פרק {}').run()
+    assert descriptions == ['פרק א']
+    assert sequential_bot().get_state()['profile']['description'] == 'פרק א'
+
+    # Back to the start of the chapter: the profile already shows its description
+    seek(sequential_bot(), position=0)
+    twitter.reject_duplicates = False
+    sequential_bot(description_template='פרק {}').run()
+    assert descriptions == ['פרק א']
+    assert sequential_bot().get_state()['position'] == 1
+
+
+def test_failed_description_is_retried_on_the_next_run(twitter, twitter_api, sequential_bot):
+    descriptions = record_descriptions(twitter_api, failures=1)
+    sequential_bot(description_template='פרק {}').run()
+    state = sequential_bot().get_state()
+    # The post still goes out; the description waits
+    assert state['position'] == 1
+    assert state['profile'] == {'pending': 'פרק א'}
+
+    sequential_bot(description_template='פרק {}').run()
+    assert descriptions == ['פרק א', 'פרק א']
+    state = sequential_bot().get_state()
+    assert state['position'] == 2
+    assert state['profile']['description'] == 'פרק א'
+    assert 'pending' not in state['profile']
+
+
+# =============================================================================
+# Async variant
+# =============================================================================
+
+class AwaitableStateStore(BlobStateStore):
+    """The async store's interface over the fake (synchronous) blob service"""
+
+    async def read(self, blob_name):
+        return super().read(blob_name)
+
+    async def write(self, blob_name, state, **kwargs):
+        return super().write(blob_name, state, **kwargs)
+
+
+@pytest.fixture
+def async_bot(monkeypatch, blob_service, sequential_bot):
+    monkeypatch.setattr(AsyncSequentialContentBot, 'state_store_class', AwaitableStateStore)
+    monkeypatch.setattr(AsyncSequentialContentBot, 'make_blob_service_client', lambda self: blob_service)
+    return lambda **config: AsyncSequentialContentBot(sequential_bot(render_queue_size=4, **config).config)
+
+
+def test_async_refill_queue_renders_from_the_saved_position(sequential_bot, async_bot):
+    seek(sequential_bot(), position=10)
+    queue = asyncio.run(async_bot().refill_queue(3))
+    assert queue.data['start'] == 10
+    stored = sequential_bot(render_queue_size=4).load_queue()
+    assert stored.data == queue.data
+    assert len(stored.data['items']) == 3
+
+
+def test_async_http_request_is_answered(sequential_bot, async_bot):
+    bot = async_bot()
+    response = asyncio.run(bot.handle_http_request(
+        FakeHttpRequest({'action': 'seek'}, body=json.dumps({'position': 7}).encode())))
+    assert response['status'] == 200
+    response = asyncio.run(bot.handle_http_request(FakeHttpRequest({'action': 'refill'})))
+    assert response['body'] == {'success': True, 'start': 7, 'count': 4}
+    assert sequential_bot().get_state()['position'] == 7
@@ -0,0 +1,43 @@
+import pytest
+
+from bot_engines.tweet_length import MAX_WEIGHTED_LENGTH, URL_LENGTH, split_tweet, weighted_length
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('hello', 5),
+    ('שלום', 4),
+    ('日本', 4),
+    ('👍', 2),
+    # Combining marks are counted after NFC normalization
+    ('e\u0301', 1),
+    ('see https://example.com/' + 'a' * 50, 4 + URL_LENGTH),
+])
+def test_weighted_length(text, expected):
+    assert weighted_length(text) == expected
+
+
+def test_text_that_fits_is_not_split():
+    text = 'א' * MAX_WEIGHTED_LENGTH
+    assert split_tweet(text) == [text]
+
+
+def test_split_on_word_boundaries_within_the_limit():
+    text = 'word ' * 70
+    parts = split_tweet(text, 50)
+    assert all(weighted_length(part) <= 50 for part in parts)
+    assert all(part == part.strip() for part in parts)
+    assert ' '.join(parts).split() == text.split()
+
+
+def test_line_breaks_stay_inside_a_part():
+    assert split_tweet('line one\nline two ' * 3, 20) == ['line one\nline two'] * 3
+
+
+def test_overlong_word_is_split_by_weight():
+    assert split_tweet('a' * 25, 10) == ['a' * 10, 'a' * 10, 'a' * 5]
+    assert split_tweet('日' * 12, 10) == ['日' * 5, '日' * 5, '日' * 2]
+
+
+def test_url_is_never_split():
+    url = 'https://example.com/' + 'a' * 100
+    assert split_tweet('x' * 270 + ' ' + url) == ['x' * 270, url]
@@ -0,0 +1,259 @@
+"""
+In-memory stand-ins for Azure Blob Storage and the Twitter API, used by bot_benchmark.py.
+
+They implement only the calls the bot engines make, honour ETag match conditions
+like the real services, count every call and can add a fixed latency per call.
+Requires azure-core (installed with azure-storage-blob) and tweepy for the exception types.
+"""
+import itertools
+import json
+import time
+from collections import Counter, deque
+from datetime import datetime, timezone
+
+import tweepy
+from azure.core import MatchConditions
+from azure.core.exceptions import (
+    ResourceExistsError, ResourceModifiedError, ResourceNotFoundError, ResourceNotModifiedError
+)
+
+
+class CallLog:
+    """Call counters shared by the fakes, plus the simulated per-call latency"""
+
+    def __init__(self, latency_ms=0.0):
+        self.counts = Counter()
+        self.latency = latency_ms / 1000
+
+    def call(self, name):
+        """Count a service call and wait the simulated round trip"""
+        self.counts[name] += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def add(self, name, n):
+        self.counts[name] += n
+
+
+# =============================================================================
+# Blob Storage
+# =============================================================================
+
+class _BlobProperties:
+    def __init__(self, etag):
+        self.etag = etag
+
+
+class _Downloader:
+    def __init__(self, raw, etag):
+        self._raw = raw
+        self.properties = _BlobProperties(etag)
+
+    def readall(self):
+        return self._raw
+
+
+class FakeBlobClient:
+    def __init__(self, service, container, blob):
+        self.service = service
+        self.key = (container, blob)
+
+    def download_blob(self, etag=None, match_condition=None):
+        self.service.log.call('blob_get')
+        if self.key[0] not in self.service.containers:
+            raise ResourceNotFoundError("The specified container does not exist.")
+        if self.key not in self.service.blobs:
+            raise ResourceNotFoundError("The specified blob does not exist.")
+        raw, current = self.service.blobs[self.key]
+        if match_condition == MatchConditions.IfModified and etag == current:
+            raise ResourceNotModifiedError("Not modified")
+        self.service.log.add('blob_bytes_read', len(raw))
+        return _Downloader(raw, current)
+
+    def upload_blob(self, data, overwrite=False, etag=None, match_condition=None):
+        self.service.log.call('blob_put')
+        if self.key[0] not in self.service.containers:
+            raise ResourceNotFoundError("The specified container does not exist.")
+        current = self.service.blobs.get(self.key)
+        if current is not None and not overwrite:
+            raise ResourceExistsError("The specified blob already exists.")
+        if match_condition == MatchConditions.IfNotModified and (current is None or current[1] != etag):
+            raise ResourceModifiedError("The condition specified using HTTP conditional header(s) is not met.")
+        raw = data.encode('utf-8') if isinstance(data, str) else bytes(data)
+        new_etag = f'"0x{next(self.service.etags):016X}"'
+        self.service.blobs[self.key] = (raw, new_etag)
+        self.service.log.add('blob_bytes_written', len(raw))
+        return {'etag': new_etag}
+
+
+class FakeContainerClient:
+    def __init__(self, service, container):
+        self.service = service
+        self.container = container
+
+    def create_container(self):
+        self.service.log.call('container_create')
+        if self.container in self.service.containers:
+            raise ResourceExistsError("The specified container already exists.")
+        self.service.containers.add(self.container)
+
+    def get_blob_client(self, blob):
+        return FakeBlobClient(self.service, self.container, blob)
+
+
+class FakeBlobServiceClient:
+    """BlobServiceClient over a dict of {(container, blob): (bytes, etag)}"""
+
+    account_name = 'benchmark'
+
+    def __init__(self, log, containers=('bot-state',)):
+        self.log = log
+        self.blobs = {}
+        self.containers = set(containers)
+        self.etags = itertools.count(1)
+
+    def get_blob_client(self, container, blob):
+        return FakeBlobClient(self, container, blob)
+
+    def get_container_client(self, container):
+        return FakeContainerClient(self, container)
+
+
+# =============================================================================
+# Twitter
+# =============================================================================
+
+class _Response:
+    def __init__(self, data, meta=None):
+        self.data = data
+        self.meta = meta
+
+
+class _Tweet:
+    def __init__(self, id, text, author_id, in_reply_to_user_id=None, referenced_tweets=None, created_at=None):
+        self.id = id
+        self.text = text
+        self.author_id = author_id
+        self.in_reply_to_user_id = in_reply_to_user_id
+        self.referenced_tweets = referenced_tweets
+        self.created_at = created_at
+
+
+class _User:
+    def __init__(self, id):
+        self.id = id
+
+
+class _HttpResponse:
+    """The parts of requests.Response tweepy's HTTPException reads"""
+
+    def __init__(self, status_code, reason, headers=None):
+        self.status_code = status_code
+        self.reason = reason
+        self.headers = headers or {}
+
+
+def forbidden_error(code, message):
+    """A 403 from X with one API error"""
+    return tweepy.Forbidden(_HttpResponse(403, 'Forbidden'), response_json={'errors': [{'code': code, 'message': message}]})
+
+
+def unauthorized_error():
+    """The 401 X answers for revoked or invalid credentials"""
+    return tweepy.Unauthorized(_HttpResponse(401, 'Unauthorized'),
+                               response_json={'title': 'Unauthorized', 'detail': 'Unauthorized', 'status': 401})
+
+
+def rate_limited_error(headers):
+    """A 429 from X with the given rate-limit headers"""
+    return tweepy.TooManyRequests(_HttpResponse(429, 'Too Many Requests', headers),
+                                  response_json={'title': 'Too Many Requests', 'detail': 'Too Many Requests'})
+
+
+def duplicate_error():
+    """The 403 X answers for a tweet identical to a recent one from the same account"""
+    return forbidden_error(187, 'Status is a duplicate.')
+
+
+# Tweet ids keep increasing across client instances, like the real snowflake ids
+_tweet_ids = itertools.count(10 ** 18)
+
+
+class FakeTwitterClient:
+    """
+    tweepy.Client with create_tweet, like, get_me, get_users_tweets and get_users_mentions.
+    Posted tweets go to the account's recent timeline (newest last; pass the same deque
+    to the clients of one account), and with reject_duplicates create_tweet refuses a
+    text already on it, like X does.
+    """
+
+    # New mentions returned by each get_users_mentions call after the first
+    mentions_per_call = 0
+    user_id = 1
+    # Tweets kept on the timeline, and checked for duplicates
+    timeline_size = 200
+
+    def __init__(self, log, timeline=None, reject_duplicates=True):
+        self.log = log
+        self.ids = _tweet_ids
+        self.timeline = timeline if timeline is not None else deque(maxlen=self.timeline_size)
+        self.reject_duplicates = reject_duplicates
+
+    def create_tweet(self, text=None, **kwargs):
+        self.log.call('twitter_create_tweet')
+        if self.reject_duplicates and any(tweet.text == text for tweet in self.timeline):
+            raise duplicate_error()
+        tweet = _Tweet(next(self.ids), text, author_id=self.user_id, created_at=datetime.now(timezone.utc))
+        self.timeline.append(tweet)
+        return _Response({'id': str(tweet.id), 'text': text})
+
+    def like(self, tweet_id, **kwargs):
+        self.log.call('twitter_like')
+        return _Response({'liked': True})
+
+    def get_me(self, **kwargs):
+        self.log.call('twitter_get_me')
+        return _Response(_User(self.user_id))
+
+    def get_users_tweets(self, id, start_time=None, max_results=10, **kwargs):
+        self.log.call('twitter_get_users_tweets')
+        tweets = [tweet for tweet in reversed(self.timeline)
+                  if start_time is None or tweet.created_at >= start_time][:max_results]
+        return _Response(tweets or None, {'result_count': len(tweets)})
+
+    def get_users_mentions(self, id, since_id=None, max_results=10, **kwargs):
+        self.log.call('twitter_get_users_mentions')
+        count = min(max_results, self.mentions_per_call) if since_id else 1
+        tweets = [_Tweet(next(self.ids), f'@bot {i}', author_id=1) for i in range(count)][::-1]
+        if not tweets:
+            return _Response(None, {'result_count': 0})
+        return _Response(tweets, {'result_count': len(tweets), 'newest_id': str(tweets[0].id)})
+
+
+class FakeTwitterAPI:
+    """tweepy.API (v1.1) with update_profile only"""
+
+    def __init__(self, log):
+        self.log = log
+
+    def update_profile(self, description=None, **kwargs):
+        self.log.call('twitter_update_profile')
+
+
+# =============================================================================
+# Azure Functions HTTP request
+# =============================================================================
+
+class FakeHttpRequest:
+    """The parts of func.HttpRequest the management APIs read"""
+
+    def __init__(self, params=None, body=b'', headers=None):
+        self.params = params or {}
+        self.headers = headers or {}
+        self._body = body
+
+    def get_body(self):
+        return self._body
+
+    def get_json(self):
+        return json.loads(self._body)
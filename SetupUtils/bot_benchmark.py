@@ -0,0 +1,300 @@
+"""
+Offline benchmark for the bot engines.
+
+Runs the engines from AzureFunctions/bots.json against in-memory Blob Storage and
+Twitter fakes (benchmark_fakes.py). No network access or credentials are needed.
+Each scenario runs many times on the warm path, where the worker's clients,
+content and ETag caches persist as in a long-lived Functions worker, and on the
+cold path, where they are cleared before every invocation. The report gives:
+    - latency percentiles (p50 / p90 / p99 / max, in ms)
+    - peak traced allocation per invocation (KiB, from a separate tracemalloc pass)
+    - storage and Twitter calls per invocation
+
+Usage (from the repository root):
+    python SetupUtils/bot_benchmark.py
+    python SetupUtils/bot_benchmark.py --iterations 5000 --scenario sequential.run
+    python SetupUtils/bot_benchmark.py --blob-latency-ms 5 --twitter-latency-ms 80
+    python SetupUtils/bot_benchmark.py --report after.json --baseline before.json
+"""
+import argparse
+import gc
+import json
+import logging
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'AzureFunctions'))
+from benchmark_fakes import CallLog, FakeBlobServiceClient, FakeTwitterClient, FakeTwitterAPI, FakeHttpRequest
+from bot_engines import blob_state, client_pool, content_cache
+from bot_engines import constant_phrase_bot, mention_reply_bot, sequential_content_bot
+from bot_engines.registry import BotRegistry
+
+REGISTRY_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'AzureFunctions', 'bots.json')
+
+
+# =============================================================================
+# Environment - fake credentials and clients
+# =============================================================================
+
+def fake_environment(registry):
+    """Set placeholder values for every environment variable the registry reads"""
+    os.environ.setdefault('BLOB_CONNECTION_STRING', 'UseDevelopmentStorage=true')
+    for spec in registry.bots.values():
+        prefix = spec.spec['credentials_prefix']
+        for key in client_pool.TWITTER_CREDENTIAL_KEYS:
+            os.environ.setdefault(f'{prefix}_{key.upper()}', f'benchmark-{key}')
+        config = spec.spec.get('config', {})
+        for key, value in {**config, **spec.spec.get('schedule', {})}.items():
+            if key == 'description_template_env':
+                for name in value:
+                    os.environ.setdefault(name, 'benchmark')
+            elif key.endswith('_env'):
+                # Hours are the only numeric values read from the environment
+                os.environ.setdefault(value, '12' if 'hour' in key else 'benchmark')
+
+
+def install_fakes(blob_log, twitter_log):
+    """
+    Point the engines at the fakes. Clients still go through the worker pool,
+    so the cold path pays for creating them just like in production.
+    """
+    blob_service = FakeBlobServiceClient(blob_log)
+
+    def get_blob_service_client(connection_string):
+        return client_pool._get_or_create('blob', connection_string, connection_string, lambda: blob_service)
+
+    def get_twitter_client(config):
+        # Scenarios post the same tweets over and over, which X would refuse as duplicates
+        identity = client_pool._twitter_identity(config)
+        return client_pool._get_or_create('twitter_v2', identity, identity,
+                                          lambda: FakeTwitterClient(twitter_log, reject_duplicates=False))
+
+    def get_twitter_api_v1(config):
+        identity = client_pool._twitter_identity(config)
+        return client_pool._get_or_create('twitter_v1', identity, identity, lambda: FakeTwitterAPI(twitter_log))
+
+    for module in (sequential_content_bot, constant_phrase_bot, mention_reply_bot):
+        module.get_blob_service_client = get_blob_service_client
+        module.get_twitter_client = get_twitter_client
+    sequential_content_bot.get_twitter_api_v1 = get_twitter_api_v1
+    return blob_service
+
+
+def reset_worker():
+    """Forget everything a Functions worker keeps between invocations"""
+    content_cache.clear_cache()
+    client_pool.clear_pool()
+    blob_state._etag_cache.clear()
+    blob_state._created_containers.clear()
+
+
+# =============================================================================
+# Scenarios - name -> (engine, factory(spec) -> invoke())
+# =============================================================================
+
+def _sequential_run(spec):
+    return lambda: spec.create_bot().run()
+
+
+def _sequential_status(spec):
+    request = FakeHttpRequest({'action': 'status'})
+    return lambda: spec.create_bot().handle_http_request(request)
+
+
+def _sequential_calendar(spec):
+    # The largest page of posts
+    request = FakeHttpRequest({'action': 'calendar', 'count': str(sequential_content_bot.MAX_CALENDAR_PAGE)})
+    return lambda: spec.create_bot().handle_http_request(request)
+
+
+def _constant_run(target_time):
+    def factory(spec):
+        def invoke():
+            bot = spec.create_bot()
+            bot.is_target_time = lambda now=None: target_time
+            bot.schedule.is_retry_due = lambda now=None: False
+            return bot.run()
+        return invoke
+    return factory
+
+
+def _constant_api(endpoint, action):
+    def factory(spec):
+        request = FakeHttpRequest({'endpoint': endpoint, 'action': action})
+        return lambda: spec.create_bot().handle_http_request(request)
+    return factory
+
+
+def _mention_poll(new_mentions):
+    def factory(spec):
+        def invoke():
+            FakeTwitterClient.mentions_per_call = new_mentions
+            return spec.create_bot().run()
+        return invoke
+    return factory
+
+
+SCENARIOS = {
+    'sequential.run': ('sequential', _sequential_run),
+    'sequential.http_status': ('sequential', _sequential_status),
+    'sequential.http_calendar': ('sequential', _sequential_calendar),
+    'constant_phrase.run': ('constant_phrase', _constant_run(True)),
+    'constant_phrase.off_target': ('constant_phrase', _constant_run(False)),
+    'constant_phrase.http_list': ('constant_phrase', _constant_api('override', 'list')),
+    'constant_phrase.http_status': ('constant_phrase', _constant_api('killswitch', 'status')),
+    'mention_reply.quiet': ('mention_reply', _mention_poll(0)),
+    'mention_reply.reply': ('mention_reply', _mention_poll(1)),
+}
+
+
+# =============================================================================
+# Measurement
+# =============================================================================
+
+def percentile(sorted_samples, p):
+    index = min(len(sorted_samples) - 1, int(round(p / 100 * (len(sorted_samples) - 1))))
+    return sorted_samples[index]
+
+
+def measure(invoke, iterations, cold, logs, alloc_iterations):
+    """Latency and calls per invocation, then peak allocations from a traced pass"""
+    samples = []
+    before = [log.counts.copy() for log in logs]
+    gc.collect()
+    for _ in range(iterations):
+        if cold:
+            reset_worker()
+        start = time.perf_counter()
+        invoke()
+        samples.append((time.perf_counter() - start) * 1000)
+
+    calls = {}
+    for log, counts in zip(logs, before):
+        for name, n in (log.counts - counts).items():
+            calls[name] = round(n / iterations, 2)
+
+    peaks = []
+    tracemalloc.start()
+    for _ in range(alloc_iterations):
+        if cold:
+            reset_worker()
+        tracemalloc.reset_peak()
+        baseline = tracemalloc.get_traced_memory()[0]
+        invoke()
+        peaks.append((tracemalloc.get_traced_memory()[1] - baseline) / 1024)
+    tracemalloc.stop()
+
+    samples.sort()
+    return {
+        'iterations': iterations,
+        'p50_ms': round(percentile(samples, 50), 3),
+        'p90_ms': round(percentile(samples, 90), 3),
+        'p99_ms': round(percentile(samples, 99), 3),
+        'max_ms': round(samples[-1], 3),
+        'mean_ms': round(statistics.fmean(samples), 3),
+        'peak_alloc_kib': round(statistics.median(peaks), 1) if peaks else None,
+        'calls_per_invocation': calls
+    }
+
+
+def run_benchmarks(registry, scenarios, bots, iterations, warmup, paths, blob_log, twitter_log):
+    results = []
+    for scenario in scenarios:
+        engine, factory = SCENARIOS[scenario]
+        for name in registry.names(engine=engine):
+            if bots and name not in bots:
+                continue
+            invoke = factory(registry.get(name))
+            for path in paths:
+                reset_worker()
+                for _ in range(warmup):
+                    invoke()
+                cold_iterations = max(1, iterations // 10) if path == 'cold' else iterations
+                entry = measure(invoke, cold_iterations, path == 'cold', (blob_log, twitter_log),
+                                min(cold_iterations, 200))
+                results.append({'scenario': scenario, 'bot': name, 'path': path, **entry})
+                print_entry(results[-1])
+    return results
+
+
+# =============================================================================
+# Reporting
+# =============================================================================
+
+def print_entry(entry):
+    calls = ', '.join(f"{k}={v}" for k, v in sorted(entry['calls_per_invocation'].items()) if 'bytes' not in k)
+    print(f"{entry['scenario']:<28} {entry['bot']:<10} {entry['path']:<5} "
+          f"p50 {entry['p50_ms']:8.3f}  p90 {entry['p90_ms']:8.3f}  p99 {entry['p99_ms']:8.3f}  "
+          f"max {entry['max_ms']:8.3f} ms  alloc {entry['peak_alloc_kib']:7.1f} KiB  [{calls}]")
+
+
+def compare(results, baseline_path):
+    """Print the p50 / p99 / allocation change against an earlier report"""
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = {(e['scenario'], e['bot'], e['path']): e for e in json.load(f)['results']}
+
+    print(f"\n=== Compared to {baseline_path} ===")
+    for entry in results:
+        before = baseline.get((entry['scenario'], entry['bot'], entry['path']))
+        if before is None:
+            continue
+        deltas = []
+        for key in ('p50_ms', 'p99_ms', 'peak_alloc_kib'):
+            if before.get(key):
+                deltas.append(f"{key} {100 * (entry[key] - before[key]) / before[key]:+6.1f}%")
+        print(f"{entry['scenario']:<28} {entry['bot']:<10} {entry['path']:<5} {'  '.join(deltas)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scenario', action='append', choices=sorted(SCENARIOS), help='Scenario to run (repeatable)')
+    parser.add_argument('--bot', action='append', help='Registry bot to run (repeatable, default all)')
+    parser.add_argument('--iterations', type=int, default=2000, help='Warm invocations per scenario (cold runs a tenth)')
+    parser.add_argument('--warmup', type=int, default=20)
+    parser.add_argument('--path', action='append', choices=['warm', 'cold'], help='Default: both')
+    parser.add_argument('--blob-latency-ms', type=float, default=0.0, help='Simulated round trip per storage call')
+    parser.add_argument('--twitter-latency-ms', type=float, default=0.0, help='Simulated round trip per Twitter call')
+    parser.add_argument('--report', help='Write the JSON report to this path')
+    parser.add_argument('--baseline', help='Earlier JSON report to compare against')
+    args = parser.parse_args()
+
+    # The engines log every step; keep the measurement about the engines
+    logging.disable(logging.WARNING)
+
+    registry = BotRegistry(REGISTRY_PATH)
+    fake_environment(registry)
+    blob_log = CallLog(args.blob_latency_ms)
+    twitter_log = CallLog(args.twitter_latency_ms)
+    install_fakes(blob_log, twitter_log)
+
+    print(f"=== Bot engines, {args.iterations} warm invocations per scenario ===")
+    results = run_benchmarks(
+        registry,
+        args.scenario or list(SCENARIOS),
+        args.bot,
+        args.iterations,
+        args.warmup,
+        args.path or ['warm', 'cold'],
+        blob_log,
+        twitter_log
+    )
+
+    report = {
+        'python': sys.version.split()[0],
+        'blob_latency_ms': args.blob_latency_ms,
+        'twitter_latency_ms': args.twitter_latency_ms,
+        'results': results
+    }
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as fout:
+            json.dump(report, fout, indent=2)
+        print(f"\nReport written to {args.report}")
+    if args.baseline:
+        compare(results, args.baseline)
+
+
+if __name__ == '__main__':
+    main()
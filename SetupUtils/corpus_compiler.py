@@ -0,0 +1,405 @@
+"""
+Corpus compiler - builds the sequential bots' content from plain-text sources.
+
+Each corpus in corpora.json names a source file, a unit-splitting rule and its
+outputs: the memory-mapped content pack read by SequentialContentBot, its search
+index (words without niqqud or cantillation, and their prefixes) and, optionally,
+the legacy JSON corpus. Sources are streamed line by line. Every unit
+(chapter, tablet, ...) is content-hashed, and only units whose source or rule
+changed since the last build are split, normalised and validated again; that
+work runs on a process pool when many units changed. A corpus whose source and
+config are unchanged is skipped entirely.
+
+Corpora that name their "bot" in AzureFunctions/bots.json are also rendered with
+that bot's template, and every post is measured with X's weighted length. Posts
+over the limit are reported; the bot sends them as a reply chain (--strict makes
+them a build error instead).
+
+Adding a corpus is a corpora.json entry; a new source layout is a new rule class
+registered with @rule.
+
+Usage (from the repository root):
+    python SetupUtils/corpus_compiler.py
+    python SetupUtils/corpus_compiler.py tehilim --force
+    python SetupUtils/corpus_compiler.py --strict
+    python SetupUtils/corpus_compiler.py --config my_corpora.json --workers 8
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+import unicodedata
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'AzureFunctions'))
+from bot_engines.content_pack import write_pack, open_pack
+from bot_engines.search_index import write_index
+from bot_engines.registry import BotRegistry
+from bot_engines.sequential_content_bot import SequentialContentBot
+from bot_engines.tweet_length import weighted_length, split_tweet, MAX_WEIGHTED_LENGTH
+
+SETUP_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_CONFIG = os.path.join(SETUP_DIR, 'corpora.json')
+CACHE_DIR = os.path.join(SETUP_DIR, '.corpus_cache')
+REGISTRY_PATH = os.path.join(SETUP_DIR, '..', 'AzureFunctions', 'bots.json')
+
+# Below this many changed units the pool costs more than it saves
+PARALLEL_THRESHOLD = 64
+
+
+class CorpusError(Exception):
+    """A source that does not fit its rule, or units that fail validation"""
+
+
+# =============================================================================
+# Unit-splitting rules
+# =============================================================================
+
+RULES = {}
+
+
+def rule(name):
+    """Register a SplitRule subclass under a name usable in corpora.json"""
+    def register(cls):
+        cls.name = name
+        RULES[name] = cls
+        return cls
+    return register
+
+
+class SplitRule:
+    """
+    Turns a stream of source lines into units, in two steps:
+        feed(line) / finish() - run while streaming; yield (label, [raw lines]) for each
+                                completed unit. Must be cheap: only finds unit boundaries.
+        items(lines)          - run per changed unit, possibly in a worker process;
+                                returns [(text, minor_label or None), ...].
+    Options come from the corpus' "options" object. Rules must be picklable.
+    """
+
+    def __init__(self, **options):
+        self.options = options
+        self._label = None
+        self._lines = []
+
+    def feed(self, line):
+        raise NotImplementedError
+
+    def finish(self):
+        if self._label is not None:
+            yield self._label, self._lines
+        self._label, self._lines = None, []
+
+    def items(self, lines):
+        raise NotImplementedError
+
+
+@rule('heading_lines')
+class HeadingLinesRule(SplitRule):
+    """
+    A line starting with heading_prefix opens a unit; its label is the first word after
+    the prefix. Every other non-empty line is one item. Text before the first heading
+    is ignored.
+    """
+
+    def __init__(self, heading_prefix, **options):
+        super().__init__(heading_prefix=heading_prefix, **options)
+        self.heading_prefix = heading_prefix
+
+    def feed(self, line):
+        stripped = line.strip()
+        if not stripped:
+            return
+        if stripped.startswith(self.heading_prefix):
+            yield from self.finish()
+            self._label = stripped[len(self.heading_prefix):].split(" ")[0]
+        elif self._label is not None:
+            self._lines.append(stripped)
+
+    def items(self, lines):
+        return [(line, None) for line in lines]
+
+
+@rule('heading_inline')
+class HeadingInlineRule(HeadingLinesRule):
+    """
+    Like heading_lines, but the lines of a unit hold several items separated by
+    item_separator. With numbered_items, each item starts with its own label word.
+    """
+
+    def __init__(self, heading_prefix, item_separator, numbered_items=False, **options):
+        super().__init__(heading_prefix, item_separator=item_separator, numbered_items=numbered_items, **options)
+        self.item_separator = item_separator
+        self.numbered_items = numbered_items
+
+    def items(self, lines):
+        items = []
+        for line in lines:
+            for segment in line.split(self.item_separator):
+                segment = segment.strip()
+                if not segment:
+                    continue
+                if self.numbered_items:
+                    label, _, text = segment.partition(" ")
+                    items.append((text, label))
+                else:
+                    items.append((segment, None))
+        return items
+
+
+# =============================================================================
+# Normalisation and validation (per unit, in worker processes)
+# =============================================================================
+
+def normalize_text(text, options):
+    if options.get('unicode_form'):
+        text = unicodedata.normalize(options['unicode_form'], text)
+    if options.get('collapse_whitespace'):
+        text = " ".join(text.split())
+    return text.strip()
+
+
+def validate_unit(label, items):
+    errors = []
+    if not label:
+        errors.append("missing label")
+    if not items:
+        errors.append("no items")
+    for i, (text, _) in enumerate(items):
+        if not text:
+            errors.append(f"item {i + 1}: empty text")
+        elif any(unicodedata.category(c) == 'Cc' for c in text):
+            errors.append(f"item {i + 1}: control character in text")
+    return errors
+
+
+def compile_unit(job):
+    """(rule, label, lines) -> (label, items, errors)"""
+    split_rule, label, lines = job
+    items = [
+        (normalize_text(text, split_rule.options), minor_label)
+        for text, minor_label in split_rule.items(lines)
+    ]
+    return label, items, validate_unit(label, items)
+
+
+def unit_hash(rule_hash, label, lines):
+    digest = hashlib.sha256(rule_hash.encode('ascii'))
+    digest.update(label.encode('utf-8'))
+    for line in lines:
+        digest.update(b'\n')
+        digest.update(line.encode('utf-8'))
+    return digest.hexdigest()
+
+
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+# =============================================================================
+# Build
+# =============================================================================
+
+def _write_atomic(path, write):
+    tmp_path = path + '.tmp'
+    write(tmp_path)
+    os.replace(tmp_path, path)
+
+
+def write_json_corpus(path, units, keys):
+    """Legacy nested JSON corpus, as read by JsonContent"""
+    content = [
+        {
+            keys['major_index_key']: major_ind,
+            keys['major_label_key']: label,
+            keys['minor_list_key']: [
+                {
+                    keys['minor_index_key']: minor_ind,
+                    **({keys['minor_label_key']: minor_label} if keys.get('minor_label_key') else {}),
+                    keys['text_key']: text
+                }
+                for minor_ind, (text, minor_label) in enumerate(items)
+            ]
+        }
+        for major_ind, (label, items) in enumerate(units)
+    ]
+
+    _write_atomic(path, lambda tmp_path: _dump_json(tmp_path, content, sort_keys=True))
+
+
+def _dump_json(path, data, **kwargs):
+    with open(path, 'w', encoding='utf-8') as fout:
+        json.dump(data, fout, **kwargs)
+
+
+def _load_manifest(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def compile_corpus(corpus, base_dir, workers=None, force=False):
+    """Build one corpus. Returns a summary dict."""
+    started = time.perf_counter()
+    name = corpus['name']
+    source = os.path.join(base_dir, corpus['source'])
+    outputs = [os.path.join(base_dir, p)
+               for p in (corpus.get('pack'), corpus.get('index'), corpus.get('json', {}).get('path')) if p]
+    split_rule = RULES[corpus['rule']](**corpus.get('options', {}))
+
+    config_hash = hashlib.sha256(json.dumps(corpus, sort_keys=True).encode('utf-8')).hexdigest()
+    rule_hash = hashlib.sha256(json.dumps([corpus['rule'], corpus.get('options', {})], sort_keys=True).encode('utf-8')).hexdigest()
+    source_hash = file_hash(source)
+
+    manifest_path = os.path.join(CACHE_DIR, f'{name}.json')
+    manifest = _load_manifest(manifest_path)
+    if not force and manifest.get('source') == source_hash and manifest.get('config') == config_hash \
+            and all(os.path.exists(p) for p in outputs):
+        return {'corpus': name, 'status': 'up to date'}
+
+    cached_units = {} if force else manifest.get('units', {})
+    units = []  # (hash, label, items or None)
+    pending = []  # (position in units, job)
+    with open(source, 'r', encoding='utf-8') as fin:
+        def collect(completed):
+            for label, lines in completed:
+                h = unit_hash(rule_hash, label, lines)
+                cached = cached_units.get(h)
+                if cached is None:
+                    pending.append((len(units), (split_rule, label, lines)))
+                units.append((h, label, cached and [tuple(item) for item in cached['items']]))
+
+        for line in fin:
+            collect(split_rule.feed(line))
+        collect(split_rule.finish())
+
+    if not units:
+        raise CorpusError(f"{name}: no units found in {corpus['source']} with rule '{corpus['rule']}'")
+
+    jobs = [job for _, job in pending]
+    if len(jobs) >= PARALLEL_THRESHOLD and workers != 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            compiled = list(pool.map(compile_unit, jobs, chunksize=max(1, len(jobs) // (4 * (workers or os.cpu_count() or 1)))))
+    else:
+        compiled = [compile_unit(job) for job in jobs]
+
+    errors = []
+    for (position, _), (label, items, unit_errors) in zip(pending, compiled):
+        errors.extend(f"{name}, unit {position + 1} ({label}): {error}" for error in unit_errors)
+        units[position] = (units[position][0], label, items)
+    if errors:
+        raise CorpusError("\n".join(errors))
+
+    pack_units = [(label, items) for _, label, items in units]
+    if corpus.get('pack'):
+        _write_atomic(os.path.join(base_dir, corpus['pack']), lambda tmp_path: write_pack(tmp_path, pack_units))
+    if corpus.get('index'):
+        # Item positions in reading order, the same global positions as the pack
+        texts = [text for _, items in pack_units for text, _ in items]
+        _write_atomic(os.path.join(base_dir, corpus['index']), lambda tmp_path: write_index(tmp_path, texts))
+    if corpus.get('json'):
+        write_json_corpus(os.path.join(base_dir, corpus['json']['path']), pack_units, corpus['json'])
+
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    manifest = {
+        'source': source_hash,
+        'config': config_hash,
+        'units': {h: {'label': label, 'items': items} for h, label, items in units}
+    }
+    _write_atomic(manifest_path, lambda tmp_path: _dump_json(tmp_path, manifest))
+
+    return {
+        'corpus': name,
+        'status': 'built',
+        'units': len(units),
+        'items': sum(len(items) for _, _, items in units),
+        'rebuilt_units': len(pending),
+        'seconds': round(time.perf_counter() - started, 3)
+    }
+
+
+# =============================================================================
+# Post length check
+# =============================================================================
+
+class _OfflineRenderer(SequentialContentBot):
+    """SequentialContentBot.render_item without clients or state"""
+
+    def __init__(self, config):
+        self.config = config
+
+
+def check_post_lengths(corpus, base_dir):
+    """
+    Render every item of the corpus with its bot's template.
+    Returns {'max_weighted_length', 'overflow': [(position, label, length, parts), ...]}.
+    """
+    config = BotRegistry(REGISTRY_PATH).get(corpus['bot']).content_config()
+    config['content_pack_path'] = os.path.join(base_dir, corpus['pack'])
+    content = open_pack(config['content_pack_path'])
+    index = content.cursor_index()
+    renderer = _OfflineRenderer(config)
+
+    longest = 0
+    overflow = []
+    for position in range(index.total):
+        item = renderer.render_item(content, index, position)
+        length = weighted_length(item['tweet_text'])
+        longest = max(longest, length)
+        if length > MAX_WEIGHTED_LENGTH:
+            label = f"{content.major_label(item['major'])}/{item['minor'] + 1}"
+            overflow.append((position, label, length, len(split_tweet(item['tweet_text']))))
+    return {'max_weighted_length': longest, 'overflow': overflow}
+
+
+def load_corpora(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)['corpora']
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('corpus', nargs='*', help='Corpus names to build (default: all)')
+    parser.add_argument('--config', default=DEFAULT_CONFIG)
+    parser.add_argument('--workers', type=int, help='Worker processes for changed units (default: CPU count, 1 = none)')
+    parser.add_argument('--force', action='store_true', help='Ignore the unit cache and rebuild everything')
+    parser.add_argument('--strict', action='store_true', help='Fail if a rendered post exceeds the length limit')
+    args = parser.parse_args()
+
+    corpora = load_corpora(args.config)
+    known = [corpus['name'] for corpus in corpora]
+    unknown = set(args.corpus) - set(known)
+    if unknown:
+        parser.error(f"Unknown corpus: {', '.join(sorted(unknown))}. Use one of: {', '.join(known)}")
+
+    base_dir = os.path.dirname(os.path.abspath(args.config))
+    for corpus in corpora:
+        if args.corpus and corpus['name'] not in args.corpus:
+            continue
+        try:
+            summary = compile_corpus(corpus, base_dir, workers=args.workers, force=args.force)
+        except CorpusError as e:
+            print(f"=== {corpus['name']}: failed ===\n{e}")
+            sys.exit(1)
+        details = ', '.join(f"{k}={v}" for k, v in summary.items() if k not in ('corpus', 'status'))
+        print(f"=== {corpus['name']}: {summary['status']} === {details}".rstrip())
+
+        if corpus.get('bot') and corpus.get('pack'):
+            lengths = check_post_lengths(corpus, base_dir)
+            print(f"   longest post: {lengths['max_weighted_length']}/{MAX_WEIGHTED_LENGTH} weighted characters")
+            for position, label, length, parts in lengths['overflow']:
+                print(f"   over the limit: position {position} ({label}), {length} -> thread of {parts}")
+            if lengths['overflow'] and args.strict:
+                sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -42,6 +42,10 @@ az functionapp create --resource-group $resourceGroup --name $functionApp --stor
 Write-Host "Getting Storage Connection String..."
 $connString = az storage account show-connection-string --name $storageAccount --resource-group $resourceGroup --query connectionString --output tsv
 
+# Create the bot state container up front so the functions never create it on the hot path
+Write-Host "Creating Blob Container 'bot-state'..."
+az storage container create --name bot-state --connection-string $connString
+
 # Configure App Settings
 Write-Host "Configuring App Settings..."
 # Note: You need to fill in your Twitter secrets here or in the portal later
@@ -64,10 +68,14 @@ $settings = @(
     "BIBI_QUIT_ACCESS_TOKEN_SECRET=PLACEHOLDER",
     "BIBI_QUIT_PHRASE=PLACEHOLDER",
     "BIBI_QUIT_HOUR=23",
-    "AzureWebJobs.TehilimTrigger.Disabled=1",
-    "AzureWebJobs.GilgameshTrigger.Disabled=1",
-    "AzureWebJobs.bibi_quit_time_trigger.Disabled=1",
-    "AzureWebJobs.bibi_quit_api_trigger.Disabled=1"
+    "NO_BOT_CONSUMER_KEY=PLACEHOLDER",
+    "NO_BOT_CONSUMER_SECRET=PLACEHOLDER",
+    "NO_BOT_ACCESS_TOKEN=PLACEHOLDER",
+    "NO_BOT_ACCESS_TOKEN_SECRET=PLACEHOLDER",
+    "AzureWebJobs.bot_dispatcher_timer.Disabled=1",
+    "AzureWebJobs.mention_reply_timer.Disabled=1",
+    "AzureWebJobs.sequential_api.Disabled=1",
+    "AzureWebJobs.bibi_quit_api.Disabled=1"
 )
 az functionapp config appsettings set --name $functionApp --resource-group $resourceGroup --settings $settings
 
@@ -0,0 +1,127 @@
+"""
+Posting calendar - when the sequential bots' items go out.
+
+Projects a bot's future posts from its cursor and its schedule in
+AzureFunctions/bots.json. Every scheduled run posts the next item, so each post
+time is computed directly from the item's distance to the cursor instead of
+replaying the runs in between. Rows are printed as they are computed, so any
+range streams, whole cycles through the corpus included. The projection assumes
+every run posts; failed posts and seeks shift what follows.
+
+The cursor is read from the bot's state blob (BLOB_CONNECTION_STRING) unless
+--position or --at gives it. Times without an offset are in --tz (default UTC).
+
+Usage (from the repository root):
+    python SetupUtils/posting_calendar.py tehilim --when 23
+    python SetupUtils/posting_calendar.py tehilim --query "יהוה רעי" --tz Asia/Jerusalem
+    python SetupUtils/posting_calendar.py tehilim --from 2026-10-25 --to 2026-10-26 --tz Asia/Jerusalem
+    python SetupUtils/posting_calendar.py gilgamesh --at 3:1 --count 48 --text
+    python SetupUtils/posting_calendar.py tehilim --cycle --json > tehilim_cycle.ndjson
+"""
+import argparse
+import json
+import os
+import sys
+from datetime import datetime, timezone
+from zoneinfo import ZoneInfo
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'AzureFunctions'))
+from bot_engines.blob_state import BlobStateStore
+from bot_engines.client_pool import get_blob_service_client
+from bot_engines.content_pack import open_content
+from bot_engines.registry import BotRegistry
+from bot_engines.sequential_content_bot import SequentialContentBot, parse_time
+
+REGISTRY_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'AzureFunctions', 'bots.json')
+
+
+class _OfflineBot(SequentialContentBot):
+    """SequentialContentBot's cursor and calendar helpers without clients"""
+
+    def __init__(self, config):
+        self.config = config
+
+
+def _major_minor(value):
+    """'23' or '23:5' (1-based) -> a seek request"""
+    major, _, minor = value.partition(':')
+    return {'major': major, 'minor': minor or 1}
+
+
+def current_position(bot, index, args):
+    if args.position is not None:
+        return bot.seek_position({'position': args.position}, index)
+    if args.at:
+        return bot.seek_position(_major_minor(args.at), index)
+    if not os.environ.get('BLOB_CONNECTION_STRING'):
+        raise ValueError("Set BLOB_CONNECTION_STRING to read the bot state, or give --position or --at")
+    store = BlobStateStore(get_blob_service_client(os.environ['BLOB_CONNECTION_STRING']), 'bot-state')
+    return bot.validate_state(store.read(bot.config['state_blob_name']), index)
+
+
+def projected_posts(bot, content, index, calendar, args, tz):
+    """(post_at, position) pairs for the requested item or range, lazily"""
+    if args.when or args.query:
+        target = _major_minor(args.when) if args.when else {'query': args.query}
+        position = bot.seek_position(target, index, content)
+        return [(calendar.post_time(position), position)]
+
+    start = parse_time(args.start, tz) if args.start else calendar.now
+    if args.end:
+        return calendar.between(start, parse_time(args.end, tz))
+    return calendar.range_from(start, index.total if args.cycle else args.count)
+
+
+def format_row(row):
+    line = f"{row['post_at']}  {row['major_label']} {row['minor_label']}  (#{row['position']})"
+    if 'text' in row:
+        line += f"\n    {row['text']}"
+    return line
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('bot', help='Sequential bot in bots.json')
+    cursor = parser.add_mutually_exclusive_group()
+    cursor.add_argument('--position', type=int, help='Global position posted next (default: read the bot state)')
+    cursor.add_argument('--at', metavar='MAJOR[:MINOR]', help='Item posted next, 1-based')
+    selection = parser.add_mutually_exclusive_group()
+    selection.add_argument('--when', metavar='MAJOR[:MINOR]', help='When this item goes out next')
+    selection.add_argument('--query', help='When the best search match goes out next')
+    selection.add_argument('--cycle', action='store_true', help='A whole cycle through the corpus')
+    selection.add_argument('--to', dest='end', help='End of the range (exclusive), ISO date or datetime')
+    parser.add_argument('--from', dest='start', help='Start of the range, ISO date or datetime (default: now)')
+    parser.add_argument('--count', type=int, default=24, help='Posts to list when no --to is given (default 24)')
+    parser.add_argument('--now', help='Project as of this ISO datetime instead of the current time')
+    parser.add_argument('--tz', help='IANA time zone for input and output times (default UTC)')
+    parser.add_argument('--text', action='store_true', help='Include the item text')
+    parser.add_argument('--json', action='store_true', help='One JSON object per line')
+    args = parser.parse_args()
+
+    registry = BotRegistry(REGISTRY_PATH)
+    sequential_bots = registry.names(engine='sequential')
+    if args.bot not in sequential_bots:
+        parser.error(f"Unknown bot: {args.bot}. Use one of: {', '.join(sequential_bots)}")
+    spec = registry.get(args.bot)
+    bot = _OfflineBot({**spec.content_config(), 'schedule': spec.schedule})
+    tz = ZoneInfo(args.tz) if args.tz else timezone.utc
+
+    content = open_content(bot.config)
+    index = content.cursor_index()
+    try:
+        now = parse_time(args.now, tz) if args.now else datetime.now(timezone.utc)
+        calendar = bot.make_calendar(index, current_position(bot, index, args), now)
+        rows = bot.calendar_entries(content, index, projected_posts(bot, content, index, calendar, args, tz), tz,
+                                    args.text)
+        if not args.json:
+            major_idx, minor_idx = index.locate(calendar.position)
+            print(f"=== {args.bot}: next post {major_idx + 1}:{minor_idx + 1} (#{calendar.position}), "
+                  f"cycle of {index.total} ends {calendar.cycle_end().astimezone(tz).isoformat()} ===")
+        for row in rows:
+            print(json.dumps(row, ensure_ascii=False) if args.json else format_row(row))
+    except (ValueError, IndexError) as e:
+        parser.error(str(e))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+"""
+Cold-start benchmark for the Azure Functions app.
+
+Imports each target module in a fresh interpreter with `-X importtime`, repeats the
+measurement a few times and reports the total import time plus the most expensive
+modules (cumulative microseconds, median over runs).
+
+Usage (from the repository root):
+    python SetupUtils/startup_benchmark.py
+    python SetupUtils/startup_benchmark.py --runs 10 --top 30 --report startup_report.json
+    python SetupUtils/startup_benchmark.py --target bot_engines.sequential_content_bot
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+FUNCTIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'AzureFunctions')
+
+DEFAULT_TARGETS = [
+    'function_app',
+    'bot_engines.sequential_content_bot',
+    'bot_engines.constant_phrase_bot',
+    'tweepy',
+    'azure.storage.blob',
+]
+
+
+def measure_once(target):
+    """Return {module: cumulative_us} for one fresh import of target"""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {target}'],
+        cwd=FUNCTIONS_DIR,
+        capture_output=True,
+        text=True
+    )
+    if result.returncode != 0:
+        last_line = result.stderr.strip().splitlines()[-1] if result.stderr.strip() else 'unknown error'
+        raise RuntimeError(f"Importing {target} failed: {last_line}")
+
+    timings = {}
+    for line in result.stderr.splitlines():
+        # Format: "import time: self [us] | cumulative | imported package"
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        _, self_us, cumulative_us, name = [part.strip() for part in line.replace('import time:', '|', 1).split('|')]
+        timings[name.strip()] = int(cumulative_us)
+    return timings
+
+
+def measure(target, runs):
+    samples = [measure_once(target) for _ in range(runs)]
+    modules = set().union(*samples)
+    medians = {
+        name: statistics.median(s.get(name, 0) for s in samples)
+        for name in modules
+    }
+    top_level = target.split('.')[0]
+    return {
+        'target': target,
+        'runs': runs,
+        'total_ms': round(medians.get(target, medians.get(top_level, 0)) / 1000, 2),
+        'modules_ms': {name: round(us / 1000, 2) for name, us in medians.items()}
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--target', action='append', help='Module to import (repeatable)')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--top', type=int, default=15, help='Slowest modules to print per target')
+    parser.add_argument('--report', help='Write the full JSON report to this path')
+    args = parser.parse_args()
+
+    report = []
+    for target in args.target or DEFAULT_TARGETS:
+        try:
+            entry = measure(target, args.runs)
+        except RuntimeError as e:
+            print(f"\n=== {target} ===\n   skipped: {e}")
+            report.append({'target': target, 'error': str(e)})
+            continue
+
+        report.append(entry)
+        print(f"\n=== {target} ({entry['total_ms']} ms, median of {args.runs}) ===")
+        slowest = sorted(entry['modules_ms'].items(), key=lambda kv: kv[1], reverse=True)[:args.top]
+        for name, ms in slowest:
+            print(f"   {ms:10.2f} ms  {name}")
+
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as fout:
+            json.dump(report, fout, indent=2)
+        print(f"\nReport written to {args.report}")
+
+
+if __name__ == '__main__':
+    main()